@@ -1 +1,46 @@
-from .elektra import *
\ No newline at end of file
+"""
+Power block price creation and conversion.
+
+`import elektra` loads only the standard-library calendar core (elektra.core), the enums and the exceptions. The
+pandas-based functions (create_prices, translateBlocks, completeness_report, ...) and the submodules are imported
+the first time they are used, so light callers of is_peak_day or is_relevant_hour never import pandas.
+"""
+import importlib
+import importlib.util
+
+from .exceptions import InsufficientDataError, ElektraConfigError, NoRelevantHoursTodayError
+from .enums import Iso, Block, Frequency
+from .core import is_weekend_day, is_sunday, is_nerc_holiday, is_offpeak_day, is_peak_day, is_dst_transition, \
+    get_iso_details, is_relevant_hour, is_relevant_day, ldom, fdom, fhod, lhod
+
+# Public names served by modules that import pandas, and the module each one lives in
+_LAZY_NAMES = {
+    'elektra.elektra': ['hello', 'nhcal', 'get_nerc_holidays', 'adjust_dst', 'convert', 'translateBlocks',
+                        'merge_block_prices', 'get_blocks', 'get_required_hours', 'dst_hour', 'create_prices',
+                        'scrub_hourly_prices'],
+    'elektra.utils': ['NERCHolidayCalendar'],
+    'elektra.completeness': ['completeness_report', 'check_prices', 'broken_periods'],
+    'elektra.cube': ['create_price_cube'],
+    'elektra.hours': ['block_membership'],
+}
+_LAZY = {name: module for module, names in _LAZY_NAMES.items() for name in names}
+
+__all__ = ['InsufficientDataError', 'ElektraConfigError', 'NoRelevantHoursTodayError', 'Iso', 'Block', 'Frequency',
+           'is_weekend_day', 'is_sunday', 'is_nerc_holiday', 'is_offpeak_day', 'is_peak_day', 'is_dst_transition',
+           'get_iso_details', 'is_relevant_hour', 'is_relevant_day', 'ldom', 'fdom', 'fhod', 'lhod',
+           *_LAZY]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name]), name)
+    elif importlib.util.find_spec('{0}.{1}'.format(__name__, name)) is not None:
+        value = importlib.import_module('{0}.{1}'.format(__name__, name))
+    else:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,3 @@
+from elektra.cli import main
+
+main()
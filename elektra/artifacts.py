@@ -0,0 +1,166 @@
+"""
+Persistent, memory-mapped calendar tables.
+
+build_calendar_artifact precomputes the hour grid and every ISO's block masks for a range of years and saves them as
+.npy files. load_calendar_artifact memory-maps them and makes elektra.hours use them in place of building masks from
+the holiday and DST calendars, so pool workers share one copy of the tables through the OS page cache. The manifest
+records a fingerprint of each ISO's holidays; an artifact built under other holiday rules (see
+elektra.core.register_holidays) is refused when loaded, and an ISO whose rules change afterwards stops using it.
+
+    build_calendar_artifact('/var/cache/elektra/calendar', 2015, 2035)
+    pool = multiprocessing.Pool(initializer=load_calendar_artifact, initargs=('/var/cache/elektra/calendar',))
+"""
+import os
+import json
+import hashlib
+import logging
+import datetime as dt
+
+import numpy as np
+
+from elektra import hours
+from elektra.core import HOLIDAY_RULES, holiday_rule_set
+from elektra.exceptions import ElektraConfigError
+from elektra.hours import HOURS_PER_DAY, PRICED_BLOCKS, as_iso, as_block, hour_grid, block_masks, holiday_days
+from elektra.utils import Iso, Block
+
+log = logging.getLogger(__name__)
+
+# Bump whenever the layout or the calendar rules change, so stale artifacts are refused rather than trusted
+ARTIFACT_VERSION = 3
+
+MANIFEST = 'manifest.json'
+
+
+def holiday_fingerprint(iso, first_year, last_year):
+    """Hash of the ISO's holidays from first_year through last_year under the holiday rules in effect now"""
+    days = holiday_days(first_year, last_year, iso).astype('datetime64[D]')
+    return hashlib.sha1(','.join(str(d) for d in days).encode()).hexdigest()
+
+
+def build_calendar_artifact(path, first_year, last_year, isos=None, blocks=None):
+    """
+    Writes the calendar tables for every day from first_year through last_year to the directory at path:
+    expected.npy (LMP rows expected per grid hour), and for each ISO, <iso>/masks.npy (grid hour x block membership)
+    and <iso>/hours.npy (day x block hour counts). The manifest is written last, so a partial build is never loaded.
+    """
+    isos = [as_iso(i) for i in (isos or list(Iso))]
+    blocks = [as_block(b) for b in (blocks or PRICED_BLOCKS + [Block._1x1])]
+    grid = hour_grid(dt.datetime(first_year, 1, 1), dt.datetime(last_year, 12, 31))
+    days = len(grid) // HOURS_PER_DAY
+
+    os.makedirs(path, exist_ok=True)
+    expected = grid['expected'].to_numpy(dtype='int8')
+    np.save(os.path.join(path, 'expected.npy'), expected)
+
+    for iso in isos:
+        masks = block_masks(blocks, iso, grid).to_numpy()
+        day_hours = (masks * expected[:, None]).reshape(days, HOURS_PER_DAY, len(blocks)).sum(axis=1)
+        os.makedirs(os.path.join(path, iso.value), exist_ok=True)
+        np.save(os.path.join(path, iso.value, 'masks.npy'), masks)
+        np.save(os.path.join(path, iso.value, 'hours.npy'), day_hours.astype('int16'))
+
+    manifest = {
+        'version': ARTIFACT_VERSION,
+        'first_day': '{0}-01-01'.format(first_year),
+        'days': days,
+        'isos': [i.value for i in isos],
+        'blocks': [b.value for b in blocks],
+        'holidays': {i.value: holiday_fingerprint(i, first_year, last_year) for i in isos},
+    }
+    with open(os.path.join(path, MANIFEST + '.tmp'), 'w') as f:
+        json.dump(manifest, f)
+    os.replace(os.path.join(path, MANIFEST + '.tmp'), os.path.join(path, MANIFEST))
+
+    log.info('Calendar artifact: {0} days, {1} ISOs, {2} blocks written to {3}'.format(
+        days, len(isos), len(blocks), path))
+    return path
+
+
+class CalendarArtifact:
+    """Memory-mapped view of a calendar artifact directory"""
+
+    def __init__(self, path, mmap_mode='r'):
+        manifest_path = os.path.join(path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise ElektraConfigError('No calendar artifact at {0}'.format(path))
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('version') != ARTIFACT_VERSION:
+            raise ElektraConfigError('Calendar artifact version {0} at {1}; this elektra needs version {2}'.format(
+                manifest.get('version'), path, ARTIFACT_VERSION))
+
+        self.path = path
+        self.first_day = np.datetime64(manifest['first_day'], 'D')
+        self.days = manifest['days']
+        self.blocks = {value: i for i, value in enumerate(manifest['blocks'])}
+        self.expected = np.load(os.path.join(path, 'expected.npy'), mmap_mode=mmap_mode)
+        self.years = (int(str(self.first_day)[:4]), int(str(self.first_day + self.days - 1)[:4]))
+        self.holidays = manifest['holidays']
+        # Holiday rules each ISO's masks were last checked against: (rule set name, rules, whether they match)
+        self._rules = {}
+        for iso in manifest['isos']:
+            if not self.holidays_match(Iso(iso)):
+                raise ElektraConfigError('Calendar artifact at {0} was built with other {1} holidays; rebuild it'
+                                         .format(path, iso))
+
+        self.masks = {}
+        self.hours = {}
+        for iso in manifest['isos']:
+            self.masks[iso] = np.load(os.path.join(path, iso, 'masks.npy'), mmap_mode=mmap_mode)
+            self.hours[iso] = np.load(os.path.join(path, iso, 'hours.npy'), mmap_mode=mmap_mode)
+
+    def holidays_match(self, iso):
+        """True while the ISO's holiday rules give the holidays the artifact was built with"""
+        name = holiday_rule_set(iso)
+        checked = self._rules.get(iso.value)
+        if checked is None or checked[0] != name or checked[1] is not HOLIDAY_RULES[name]:
+            matches = holiday_fingerprint(iso, *self.years) == self.holidays.get(iso.value)
+            if not matches and checked is not None:
+                log.warning('{0} holidays changed since the calendar artifact at {1} was built; not using it for {0}'
+                            .format(iso.value, self.path))
+            checked = (name, HOLIDAY_RULES[name], matches)
+            self._rules[iso.value] = checked
+        return checked[2]
+
+    def day_offsets(self, flow_dates):
+        return (np.asarray(flow_dates, dtype='datetime64[D]') - self.first_day).astype('int64')
+
+    def covers(self, flow_dates, iso=None, block=None):
+        """
+        True if the artifact has every one of the flow dates, and the ISO (with its holidays unchanged) and block if
+        given
+        """
+        if (iso is not None and iso.value not in self.masks) or (block is not None and block.value not in self.blocks):
+            return False
+        if iso is not None and not self.holidays_match(iso):
+            return False
+        offsets = self.day_offsets(flow_dates)
+        return len(offsets) == 0 or (offsets.min() >= 0 and offsets.max() < self.days)
+
+    def expected_rows(self, start, end):
+        first, last = self.day_offsets([start, end])
+        return np.asarray(self.expected[first * HOURS_PER_DAY:(last + 1) * HOURS_PER_DAY], dtype='int64')
+
+    def block_mask(self, iso, block, flow_dates, he):
+        he = np.asarray(he)
+        on_grid = (he >= 1) & (he <= HOURS_PER_DAY)
+        rows = self.day_offsets(flow_dates) * HOURS_PER_DAY + np.where(on_grid, he - 1, 0)
+        return self.masks[iso.value][rows, self.blocks[block.value]] & on_grid
+
+    def day_hours(self, iso, block, start, end):
+        """Required hours per day from start to end, counting the repeated fall DST hour twice"""
+        first, last = self.day_offsets([start, end])
+        return np.asarray(self.hours[iso.value][first:last + 1, self.blocks[block.value]])
+
+
+def load_calendar_artifact(path, mmap_mode='r'):
+    """Memory-maps the artifact at path and makes elektra.hours use it for the dates, ISOs and blocks it covers"""
+    artifact = CalendarArtifact(path, mmap_mode=mmap_mode)
+    hours.use_calendar(artifact)
+    log.info('Calendar artifact loaded from {0}'.format(path))
+    return artifact
+
+
+def unload_calendar_artifact():
+    hours.use_calendar(None)
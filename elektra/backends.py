@@ -0,0 +1,231 @@
+"""
+Execution backends for create_prices.
+
+`pandas` is the original row-by-row create_prices path. The other backends run the same required-hours join and
+block average over the whole period at once:
+
+* vectorized: NumPy and grouped pandas, using elektra.hours (no optional dependencies)
+* polars: Polars expressions, multi-threaded (needs polars)
+* arrow: Arrow compute kernels, multi-threaded (needs pyarrow)
+
+All of them renumber DST hour endings the way create_prices does (see dst_shift), looking at the whole input rather
+than at each day, so they return the same price or raise the same error for any input.
+
+Pick one per call with create_prices(..., backend='polars'), or for every call with set_backend('polars') or the
+ELEKTRA_BACKEND environment variable. If a backend's optional dependency is not installed, create_prices logs a
+warning and uses the pandas path instead.
+"""
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+
+from elektra.exceptions import ElektraConfigError, InsufficientDataError, NoRelevantHoursTodayError
+
+log = logging.getLogger(__name__)
+
+BACKENDS = ['pandas', 'vectorized', 'polars', 'arrow']
+
+# Static holder for the default backend
+_settings = {'backend': os.environ.get('ELEKTRA_BACKEND', 'pandas').lower()}
+
+
+def set_backend(backend):
+    """Sets the backend create_prices uses when none is passed"""
+    backend = backend.lower()
+    if backend not in BACKENDS:
+        raise ElektraConfigError('Backend not supported: {0}. Choose from {1}'.format(backend, ', '.join(BACKENDS)))
+    _settings['backend'] = backend
+
+
+def get_backend():
+    return _settings['backend']
+
+
+def load_engine(backend=None):
+    """
+    Returns the price function for a backend (default: the one set with set_backend), or None for the pandas path,
+    which is also what a backend gets when its optional dependency is missing.
+    """
+    backend = (backend or get_backend()).lower()
+    if backend not in BACKENDS:
+        raise ElektraConfigError('Backend not supported: {0}. Choose from {1}'.format(backend, ', '.join(BACKENDS)))
+    if backend == 'pandas':
+        return None
+
+    try:
+        if backend == 'polars':
+            import polars  # noqa: F401
+        elif backend == 'arrow':
+            import pyarrow  # noqa: F401
+            import pyarrow.compute  # noqa: F401
+    except ImportError:
+        log.warning('The {0} backend is not installed; using the pandas backend'.format(backend))
+        return None
+
+    return ENGINES[backend]
+
+
+def required_grid(flow_date, iso, block, frequency):
+    """The grid rows (flow_date, HE, expected) that create_prices needs for a block and period"""
+    from elektra.hours import period_bounds, hour_grid, block_mask
+    start, end = period_bounds(flow_date, frequency)
+    grid = hour_grid(start, end)
+    return grid[block_mask(block, iso, grid)].reset_index(drop=True)
+
+
+def _no_relevant_hours(flow_date, ticker):
+    return NoRelevantHoursTodayError(
+        'No relevant hours on {0} for ticker {1}.'.format(flow_date.strftime('%Y-%m-%d'), ticker))
+
+
+def _check_input(input_prices):
+    if input_prices.empty:
+        raise InsufficientDataError(
+            'input_prices is empty. This method expects a DataFrame with 3 columns: flow_date (string in YYYY-MM-DD '
+            'format), hour_ending (number), and price (number)')
+
+
+def dst_shift(flow_date, input_prices):
+    """
+    The shift create_prices adds to every hour ending past HE 2: +1 when flow_date is the short DST day and the
+    whole input is 23 rows numbered up to 23, -1 when it is the long DST day and the whole input has 25 distinct hour
+    endings, and 0 otherwise. A month of prices is never renumbered, even when its DST day is sent as 1..23.
+    """
+    from elektra.core import is_dst_transition
+    hour_ending = input_prices['hour_ending']
+    _, short_day, long_day = is_dst_transition(flow_date)
+    if short_day and hour_ending.size == 23 and pd.to_numeric(hour_ending).max() == 23:
+        log.info('input prices need to be adjusted to skip hour 3')
+        return 1
+    if long_day and hour_ending.unique().size == 25:
+        log.info('input prices need to be adjusted to duplicate hour 2')
+        return -1
+    return 0
+
+
+def index_input(flow_date, input_prices):
+    """index_prices for a create_prices input, with its DST hour endings renumbered as create_prices does"""
+    from elektra.hours import index_prices
+    prices = index_prices(input_prices, normalize_dst=False)
+    shift = dst_shift(flow_date, input_prices)
+    if shift:
+        prices.loc[prices['HE'] > 2, 'HE'] += shift
+    return prices
+
+
+def _average(total, valued):
+    return np.float64(total) / valued if valued else np.float64(np.nan)
+
+
+def _raise_first_bad(ticker, node, iso, block, frequency, bad):
+    """Raises InsufficientDataError for the first row of a frame of bad hours (flow_date, HE, expected, found)"""
+    from elektra.hours import insufficient_data_error
+    bad = bad.assign(flow_date=pd.to_datetime(bad['flow_date'])).sort_values(['flow_date', 'HE'])
+    raise insufficient_data_error(ticker, node, iso, block, frequency, bad, np.ones(len(bad), dtype=bool))
+
+
+def create_prices_vectorized(flow_date, ticker, node, iso, block, frequency, input_prices):
+    from elektra.hours import hour_stats, attach_stats
+    _check_input(input_prices)
+    grid = required_grid(flow_date, iso, block, frequency)
+    if grid.empty:
+        raise _no_relevant_hours(flow_date, ticker)
+
+    prices = index_input(flow_date, input_prices).drop(columns='node', errors='ignore')
+    grid = attach_stats(grid, hour_stats(prices))
+    bad = grid[grid['found'] != grid['expected']]
+    if len(bad):
+        _raise_first_bad(ticker, node, iso, block, frequency, bad)
+    return _average(grid['total'].sum(), grid['valued'].sum())
+
+
+def create_prices_polars(flow_date, ticker, node, iso, block, frequency, input_prices):
+    import polars as pl
+    _check_input(input_prices)
+    grid = required_grid(flow_date, iso, block, frequency)
+    if grid.empty:
+        raise _no_relevant_hours(flow_date, ticker)
+
+    shift = dst_shift(flow_date, input_prices)
+    prices = pl.DataFrame({
+        'flow_date': input_prices['flow_date'].astype('str').to_numpy(),
+        'hour_ending': pd.to_numeric(input_prices['hour_ending']).to_numpy(dtype='float64'),
+        'price': input_prices['price'].to_numpy(),
+    }).lazy().with_columns(
+        flow_date=pl.col('flow_date').str.slice(0, 10).str.to_date('%Y-%m-%d'),
+        HE=pl.col('hour_ending').cast(pl.Int64),
+        price=pl.col('price').cast(pl.Float64),
+    )
+
+    # Renumber DST hours as create_prices does
+    if shift:
+        he = pl.col('HE')
+        prices = prices.with_columns(HE=pl.when(he > 2).then(he + shift).otherwise(he))
+
+    stats = prices.group_by(['flow_date', 'HE']).agg(
+        found=pl.len(), total=pl.col('price').sum(), valued=pl.col('price').count())
+    required = pl.DataFrame({
+        'flow_date': grid['flow_date'].to_numpy().astype('datetime64[D]'),
+        'HE': grid['HE'].to_numpy(),
+        'expected': grid['expected'].to_numpy(),
+    }).lazy()
+    joined = required.join(stats, on=['flow_date', 'HE'], how='left').with_columns(
+        found=pl.col('found').fill_null(0), total=pl.col('total').fill_null(0.0),
+        valued=pl.col('valued').fill_null(0)).collect()
+
+    bad = joined.filter(pl.col('found') != pl.col('expected'))
+    if bad.height:
+        _raise_first_bad(ticker, node, iso, block, frequency, pd.DataFrame(bad.to_dict(as_series=False)))
+    return _average(joined['total'].sum(), joined['valued'].sum())
+
+
+def create_prices_arrow(flow_date, ticker, node, iso, block, frequency, input_prices):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    _check_input(input_prices)
+    grid = required_grid(flow_date, iso, block, frequency)
+    if grid.empty:
+        raise _no_relevant_hours(flow_date, ticker)
+
+    shift = dst_shift(flow_date, input_prices)
+    flow_dates = pc.utf8_slice_codeunits(pa.array(input_prices['flow_date'].astype('str').to_numpy()), 0, 10)
+    prices = pa.table({
+        'flow_date': pc.strptime(flow_dates, format='%Y-%m-%d', unit='s').cast(pa.date32()),
+        'HE': pa.array(pd.to_numeric(input_prices['hour_ending']).to_numpy(dtype='float64')).cast(pa.int64()),
+        'price': pa.array(input_prices['price'].to_numpy()).cast(pa.float64()),
+    })
+
+    # Renumber DST hours as create_prices does
+    if shift:
+        he = prices['HE']
+        prices = prices.set_column(1, 'HE', pc.if_else(pc.greater(he, 2), pc.add(he, shift), he))
+
+    stats = prices.group_by(['flow_date', 'HE']).aggregate([
+        ('HE', 'count', pc.CountOptions(mode='all')), ('price', 'sum'), ('price', 'count')])
+    required = pa.table({
+        'flow_date': pa.array(grid['flow_date'].to_numpy().astype('datetime64[D]'), pa.date32()),
+        'HE': pa.array(grid['HE'].to_numpy()),
+        'expected': pa.array(grid['expected'].to_numpy()),
+    })
+    joined = required.join(stats, keys=['flow_date', 'HE'], join_type='left outer')
+    found = pc.fill_null(joined['HE_count'], 0)
+    total = pc.fill_null(joined['price_sum'], 0.0)
+    valued = pc.fill_null(joined['price_count'], 0)
+
+    bad = pc.not_equal(found, joined['expected'])
+    if pc.any(bad).as_py():
+        bad = pd.DataFrame({'flow_date': joined['flow_date'].filter(bad).to_pandas(),
+                            'HE': joined['HE'].filter(bad).to_pandas(),
+                            'expected': joined['expected'].filter(bad).to_pandas(),
+                            'found': found.filter(bad).to_pandas()})
+        _raise_first_bad(ticker, node, iso, block, frequency, bad)
+    return _average(pc.sum(total).as_py(), pc.sum(valued).as_py())
+
+
+ENGINES = {
+    'vectorized': create_prices_vectorized,
+    'polars': create_prices_polars,
+    'arrow': create_prices_arrow,
+}
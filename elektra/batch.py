@@ -0,0 +1,280 @@
+"""
+Batch block pricing from hourly price files.
+
+Reads hourly prices from CSV or Parquet files (or a directory of them), loading only the columns, nodes and dates a
+request spec needs. Files are read in chunks, and each node's requests are priced, month by month over one shared
+hour grid, as soon as its last price row has been read, so each node's rows must be contiguous (one file per node,
+or files sorted by node). Results are written out as they are produced.
+
+A spec has one row per price wanted: ticker, node, iso, block, frequency (daily or monthly) and flow_date. Price
+files have flow_date, hour_ending and price columns, plus a node column. If there is no node column, the file name
+without its extension is used as the node, e.g. INDIANA.HUB.csv.
+"""
+import os
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from elektra.core import fdom, ldom
+from elektra.exceptions import ElektraConfigError
+from elektra.hours import as_iso, as_block, as_frequency, hour_grid, block_masks, index_prices, hour_stats, \
+    attach_stats, masked_totals, insufficient_data_error
+from elektra.utils import Frequency
+
+log = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ['flow_date', 'hour_ending', 'price']
+PRICE_DTYPES = {'node': 'str', 'flow_date': 'str', 'hour_ending': 'float64', 'price': 'float64'}
+SPEC_COLUMNS = ['ticker', 'node', 'iso', 'block', 'frequency', 'flow_date']
+RESULT_COLUMNS = SPEC_COLUMNS + ['price', 'error']
+
+PRICE_FILE_TYPES = ('.csv', '.parquet')
+BATCH_FREQUENCIES = [Frequency.Daily.value, Frequency.Monthly.value]
+
+
+def price_files(path):
+    """The price files at path: the file itself, or every CSV and Parquet file in a directory, in name order"""
+    if os.path.isdir(path):
+        names = sorted(n for n in os.listdir(path) if n.lower().endswith(PRICE_FILE_TYPES))
+        return [os.path.join(path, n) for n in names]
+    if not os.path.exists(path):
+        raise ElektraConfigError('No price file at {0}'.format(path))
+    return [path]
+
+
+def _file_node(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _keep(frame, nodes, start, end):
+    keep = np.ones(len(frame), dtype=bool)
+    if nodes is not None:
+        keep &= frame['node'].isin(nodes).to_numpy()
+    if start is not None:
+        keep &= (frame['flow_date'] >= start).to_numpy() & (frame['flow_date'] <= end).to_numpy()
+    return frame[keep]
+
+
+def read_price_file(path, nodes=None, start=None, end=None, chunksize=1000000):
+    """
+    Yields the rows of one price file for the given nodes and flow dates (YYYY-MM-DD strings, inclusive), reading
+    only the price columns. CSV files are read in chunks of `chunksize` rows, so a file larger than memory can be
+    filtered down.
+    """
+    if path.lower().endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ElektraConfigError('Reading Parquet needs pyarrow installed')
+        names = pq.read_schema(path).names
+        columns = PRICE_COLUMNS + (['node'] if 'node' in names else [])
+        filters = [('node', 'in', list(nodes))] if (nodes is not None and 'node' in names) else None
+        chunks = [pq.read_table(path, columns=columns, filters=filters).to_pandas()]
+    else:
+        names = pd.read_csv(path, nrows=0).columns
+        columns = PRICE_COLUMNS + (['node'] if 'node' in names else [])
+        chunks = pd.read_csv(path, usecols=columns, dtype={c: PRICE_DTYPES[c] for c in columns},
+                             chunksize=chunksize)
+
+    for chunk in chunks:
+        if 'node' not in chunk.columns:
+            chunk = chunk.assign(node=_file_node(path))
+        chunk['flow_date'] = chunk['flow_date'].astype('str').str.slice(0, 10)
+        chunk = _keep(chunk, nodes, start, end)
+        if len(chunk):
+            yield chunk
+
+
+def read_prices(path, nodes=None, start=None, end=None):
+    """All the rows of the price files at path for the given nodes and flow dates, as one DataFrame"""
+    chunks = [c for f in price_files(path) for c in read_price_file(f, nodes, start, end)]
+    if not chunks:
+        return pd.DataFrame(columns=PRICE_COLUMNS + ['node'])
+    return pd.concat(chunks, ignore_index=True)
+
+
+def stream_node_prices(path, nodes=None, start=None, end=None, chunksize=1000000):
+    """
+    Yields (node, prices) for each node in the price files at path as soon as its last row has been read, holding
+    only one chunk and one node's rows at a time. Each node's rows must be contiguous: one file per node, or files
+    sorted by node.
+    """
+    done = set()
+    node, parts = None, []
+    for price_file in price_files(path):
+        for chunk in read_price_file(price_file, nodes, start, end, chunksize=chunksize):
+            names = chunk['node'].to_numpy()
+            starts = np.r_[0, np.flatnonzero(names[1:] != names[:-1]) + 1, len(names)]
+            for first, last in zip(starts[:-1], starts[1:]):
+                if names[first] != node:
+                    if parts:
+                        yield node, pd.concat(parts, ignore_index=True)
+                        done.add(node)
+                    node, parts = names[first], []
+                    if node in done:
+                        raise ElektraConfigError(
+                            'Prices for node {0} are not contiguous; sort the price files by node'.format(node))
+                parts.append(chunk.iloc[first:last])
+    if parts:
+        yield node, pd.concat(parts, ignore_index=True)
+
+
+def read_spec(path):
+    """Reads a request spec from a CSV or JSON (records) file"""
+    spec = pd.read_json(path, orient='records', dtype=False) if path.lower().endswith('.json') else \
+        pd.read_csv(path, dtype='str')
+    missing = [c for c in SPEC_COLUMNS if c not in spec.columns]
+    if missing:
+        raise ElektraConfigError('Request spec is missing columns: {0}'.format(', '.join(missing)))
+    return spec[SPEC_COLUMNS]
+
+
+def spec_date_range(spec):
+    """First and last flow dates (YYYY-MM-DD) whose hourly prices the spec needs"""
+    flow_dates = pd.to_datetime(spec['flow_date'])
+    return fdom(flow_dates.min()).strftime('%Y-%m-%d'), ldom(flow_dates.max()).strftime('%Y-%m-%d')
+
+
+def check_frequencies(requests):
+    """Raises ElektraConfigError unless every request is for a daily or monthly price"""
+    frequencies = pd.unique(requests['frequency'].astype('str').str.lower())
+    unsupported = [f for f in frequencies if f not in BATCH_FREQUENCIES]
+    if unsupported:
+        raise ElektraConfigError('Batch pricing supports {0} frequencies, not: {1}'.format(
+            ' and '.join(BATCH_FREQUENCIES), ', '.join(unsupported)))
+
+
+def price_node_requests(requests, node_prices):
+    """
+    Prices one node's requests. Requests for the same ISO and month share one hour grid and one set of block masks;
+    each requested day and the month itself are periods of a single masked reduction. Returns the requests with
+    price and error columns; error is None where the price was created. Frequencies other than daily and monthly
+    raise ElektraConfigError.
+    """
+    check_frequencies(requests)
+    results = requests.assign(price=np.nan, error=None)
+    flow_dates = pd.to_datetime(requests['flow_date']).dt.normalize()
+    if node_prices.empty:
+        results['error'] = 'No prices for node'
+        return results
+    stats = hour_stats(index_prices(node_prices.drop(columns='node', errors='ignore')))
+
+    for (iso, month), group in requests.groupby([requests['iso'].str.lower(), flow_dates.dt.to_period('M')]):
+        month_start = month.to_timestamp()
+        grid = attach_stats(hour_grid(month_start, ldom(month_start)), stats)
+        blocks = [as_block(b) for b in pd.unique(group['block'].str.lower())]
+        masks = block_masks(blocks, iso, grid)
+        days = pd.DatetimeIndex(flow_dates[group.index]).unique()
+        periods = pd.DataFrame({d: (grid['flow_date'] == d).to_numpy() for d in days}, index=grid.index)
+        periods['monthly'] = True
+        totals = masked_totals(grid, masks, periods)
+
+        for index, request in group.iterrows():
+            block = as_block(request['block'])
+            frequency = as_frequency(request['frequency'])
+            period = 'monthly' if frequency == Frequency.Monthly else flow_dates[index]
+            if totals['bad'].loc[block.value, period] > 0:
+                rows = masks[block.value].to_numpy() & periods[period].to_numpy()
+                results.at[index, 'error'] = str(insufficient_data_error(
+                    request['ticker'], request['node'], as_iso(iso), block, frequency, grid, rows))
+            elif totals['required'].loc[block.value, period] == 0:
+                results.at[index, 'error'] = 'No relevant hours'
+            else:
+                results.at[index, 'price'] = totals['total'].loc[block.value, period] / \
+                    totals['valued'].loc[block.value, period]
+
+    return results
+
+
+class ResultWriter:
+    """Appends result frames to a CSV or Parquet file as they are produced"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self.parquet = path.lower().endswith('.parquet')
+        self.writer = None
+        self.file = None
+
+    def write(self, results):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(results, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            if self.file is None:
+                self.file = open(self.path, 'w', newline='')
+                results.to_csv(self.file, index=False)
+            else:
+                results.to_csv(self.file, index=False, header=False)
+            self.file.flush()
+        self.rows += len(results)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        if self.file is not None:
+            self.file.close()
+
+
+def run_price_batch(prices_path, spec, out_path, chunksize=1000000):
+    """
+    Prices every request in spec from the price files at prices_path, writing results to out_path (.csv or
+    .parquet) one node at a time. Prices are streamed (see stream_node_prices): each node is priced and written as
+    soon as its rows have been read. Returns run statistics: rows read, prices written, errors and timings.
+    """
+    if out_path.lower().endswith('.parquet'):
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ElektraConfigError('Writing Parquet needs pyarrow installed')
+
+    check_frequencies(spec)
+    started = time.perf_counter()
+    nodes = pd.unique(spec['node'])
+    start, end = spec_date_range(spec)
+    requests_by_node = dict(tuple(spec.groupby('node', sort=False)))
+    empty_prices = pd.DataFrame(columns=PRICE_COLUMNS + ['node'])
+
+    writer = ResultWriter(out_path)
+    rows_read = errors = 0
+    read_seconds = 0.0
+    try:
+        prices = stream_node_prices(prices_path, nodes=nodes, start=start, end=end, chunksize=chunksize)
+        while True:
+            read_started = time.perf_counter()
+            node, node_prices = next(prices, (None, None))
+            read_seconds += time.perf_counter() - read_started
+            if node_prices is None:
+                break
+            rows_read += len(node_prices)
+            results = price_node_requests(requests_by_node.pop(node), node_prices)
+            errors += results['error'].notna().sum()
+            writer.write(results[RESULT_COLUMNS])
+
+        # Nodes in the spec without any prices still get a row each
+        for node, requests in requests_by_node.items():
+            results = price_node_requests(requests, empty_prices)
+            errors += results['error'].notna().sum()
+            writer.write(results[RESULT_COLUMNS])
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'rows_read': rows_read,
+        'nodes': len(nodes),
+        'prices_written': writer.rows,
+        'errors': int(errors),
+        'read_seconds': read_seconds,
+        'seconds': seconds,
+        'rows_per_second': rows_read / seconds if seconds else None,
+        'prices_per_second': writer.rows / seconds if seconds else None,
+    }
+    log.info('Batch: {0}'.format(stats))
+    return stats
@@ -0,0 +1,63 @@
+"""
+Command line entry point: `elektra <command>`, or `python -m elektra <command>`.
+"""
+import sys
+import argparse
+
+
+def _serve(args):
+    from elektra.server import serve
+    serve(host=args.host, port=args.port, unix_socket=args.socket, calendar=args.calendar,
+          shadow_fraction=args.shadow_fraction, shadow_backend=args.shadow_backend, shadow_log=args.shadow_log)
+
+
+def _price(args):
+    from elektra.batch import read_spec, run_price_batch
+    if args.workers:
+        from elektra.pipeline import run_pipeline
+        stats = run_pipeline(args.prices, read_spec(args.spec), args.out, readers=args.readers, workers=args.workers,
+                             executor=args.executor)
+    else:
+        stats = run_price_batch(args.prices, read_spec(args.spec), args.out)
+    print('Read {0} hourly rows for {1} nodes in {2:.2f}s; wrote {3} prices ({4} errors) in {5:.2f}s total: '
+          '{6:,.0f} rows/s, {7:,.0f} prices/s'.format(
+              stats['rows_read'], stats['nodes'], stats['read_seconds'], stats['prices_written'], stats['errors'],
+              stats['seconds'], stats['rows_per_second'] or 0, stats['prices_per_second'] or 0), file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='elektra', description='Power block price creation and conversion')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    serve = commands.add_parser('serve', help='Run a local pricing service with warm calendars')
+    serve.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default: 127.0.0.1)')
+    serve.add_argument('--port', type=int, default=8040, help='Port to listen on (default: 8040)')
+    serve.add_argument('--socket', help='Listen on this Unix socket path instead of a port')
+    serve.add_argument('--calendar', help='Calendar artifact directory to memory-map at startup')
+    serve.add_argument('--shadow-fraction', type=float,
+                       help='Also run this fraction of calls on the fast path and record mismatches (default: 0)')
+    serve.add_argument('--shadow-backend', choices=['vectorized', 'polars', 'arrow'],
+                       help='create_prices backend used as the fast path in shadow mode (default: vectorized)')
+    serve.add_argument('--shadow-log', help='Append shadow mode mismatches, with their inputs, to this JSON lines file')
+    serve.set_defaults(run=_serve)
+
+    price = commands.add_parser('price', help='Create block prices for a request spec from hourly price files')
+    price.add_argument('--prices', required=True,
+                       help='Hourly price file (CSV or Parquet), or a directory of them')
+    price.add_argument('--spec', required=True,
+                       help='Request spec (CSV or JSON) with ticker, node, iso, block, frequency, flow_date')
+    price.add_argument('--out', required=True, help='Output file for block prices (.csv or .parquet)')
+    price.add_argument('--workers', type=int,
+                       help='Price this many nodes at once while further files are read (default: one at a time)')
+    price.add_argument('--readers', type=int, default=4, help='Price files read at once with --workers (default: 4)')
+    price.add_argument('--executor', choices=['thread', 'process'], default='thread',
+                       help='Pool that prices nodes with --workers (default: thread)')
+    price.set_defaults(run=_price)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args)
@@ -0,0 +1,90 @@
+"""
+Whole-range data completeness checks.
+
+create_prices stops at the first required hour with the wrong number of LMP rows. These functions compare the input
+against the required-hours grid in one join and report every missing, duplicated or extra hour, along with the
+blocks each problem breaks.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from elektra.backends import index_input
+from elektra.hours import PRICED_BLOCKS, as_block, hour_grid, block_masks, index_prices, hour_stats, period_bounds
+
+log = logging.getLogger(__name__)
+
+REPORT_COLUMNS = ['node', 'flow_date', 'HE', 'expected', 'found', 'issue', 'blocks', 'month']
+
+
+def completeness_report(start, end, iso, input_prices, blocks=None):
+    """
+    Returns one row per (node, flow_date, HE) between start and end whose LMP row count is wrong.
+
+    input_prices has the create_prices columns (flow_date, hour_ending, price), plus an optional node column for
+    checking many nodes at once. `issue` is 'missing' (fewer rows than expected), 'duplicate' (more rows than
+    expected) or 'extra' (rows for an hour that does not exist, such as HE 3 on the spring DST day). `blocks` lists
+    the blocks, of those asked for (default: every priced block), whose prices the hour breaks; `month` is the first
+    day of the monthly period it breaks.
+    """
+    return _report(start, end, iso, index_prices(input_prices), blocks)
+
+
+def _report(start, end, iso, prices, blocks=None):
+    """completeness_report of prices already indexed by index_prices"""
+    blocks = [as_block(b) for b in (blocks or PRICED_BLOCKS)]
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+
+    has_node = 'node' in prices.columns
+    if not has_node:
+        prices.insert(0, 'node', '')
+    nodes = pd.unique(prices['node'])
+    prices = prices[prices['flow_date'].between(start, end)]
+    stats = hour_stats(prices)
+
+    grid = hour_grid(start, end)
+    grid = grid.merge(pd.DataFrame({'node': nodes}), how='cross')
+
+    # Outer join, so input hours that are not on the grid at all (e.g. HE 25) are reported as extra
+    report = grid.merge(stats[['node', 'flow_date', 'HE', 'found']], how='outer', on=['node', 'flow_date', 'HE'])
+    report['expected'] = report['expected'].fillna(0).astype('int64')
+    report['found'] = report['found'].fillna(0).astype('int64')
+    report = report[report['found'] != report['expected']].reset_index(drop=True)
+
+    report['issue'] = np.where(report['found'] < report['expected'], 'missing',
+                               np.where(report['expected'] == 0, 'extra', 'duplicate'))
+    masks = block_masks(blocks, iso, report)
+    report['blocks'] = masks.dot(masks.columns + ',').str.rstrip(',') if len(report) else ''
+    report['month'] = report['flow_date'].dt.to_period('M').dt.to_timestamp()
+
+    report = report.sort_values(['node', 'flow_date', 'HE'], kind='stable').reset_index(drop=True)
+    if not has_node:
+        report['node'] = None
+    log.info('Completeness: {0} problem hours across {1} nodes from {2:%Y-%m-%d} to {3:%Y-%m-%d}'.format(
+        len(report), len(nodes), start, end))
+    return report[REPORT_COLUMNS]
+
+
+def check_prices(flow_date, ticker, node, iso, block, frequency, input_prices):
+    """
+    Takes the same inputs as create_prices and returns a completeness_report of every hour that create_prices
+    would reject for that block and period, plus any extra hours in the period, instead of raising at the first one.
+    DST hour endings are renumbered from the whole input, as create_prices does, so an empty report means
+    create_prices has all the data it needs.
+    """
+    start, end = period_bounds(flow_date, frequency)
+    report = _report(start, end, iso, index_input(flow_date, input_prices), blocks=[block])
+    report = report[(report['blocks'] != '') | (report['issue'] == 'extra')].reset_index(drop=True)
+    report['node'] = node
+    log.info('Check Prices: {0}/{1} {2} {3} {4:%Y-%m-%d} >> {5} problem hours'.format(
+        ticker, node, block, frequency, flow_date, len(report)))
+    return report
+
+
+def broken_periods(report):
+    """Collapses a completeness_report to the distinct (node, block, flow_date, month) periods it breaks"""
+    broken = report.loc[report['blocks'] != '', ['node', 'blocks', 'flow_date', 'month']]
+    broken = broken.assign(block=broken['blocks'].str.split(',')).explode('block')
+    return broken[['node', 'block', 'flow_date', 'month']].drop_duplicates().reset_index(drop=True)
@@ -0,0 +1,271 @@
+"""
+Dependency-light calendar core.
+
+Scalar day and hour classification (peak days, NERC holidays, DST transitions, relevant block hours) using only the
+standard library, plus pytz for the DST table, imported on first use. `import elektra` loads just this module, so
+validation hooks that need is_peak_day or is_relevant_hour don't pay for importing pandas. elektra.elektra and the
+bulk modules use the same functions.
+"""
+import calendar
+import datetime as dt
+import logging
+
+from elektra.enums import Iso, Block
+from elektra.exceptions import ElektraConfigError
+
+log = logging.getLogger(__name__)
+
+# Static holder for holiday dates, by (rule set, year)
+_holidays = {}
+
+# Static holder for the America/Chicago DST transition dates
+_transitions = {}
+
+
+def _as_datetime(as_of):
+    """datetime (or pandas Timestamp) for as_of; strings and other date types are parsed as pandas would"""
+    if isinstance(as_of, dt.datetime):
+        return as_of
+    if isinstance(as_of, dt.date):
+        return dt.datetime(as_of.year, as_of.month, as_of.day)
+    if isinstance(as_of, str):
+        try:
+            return dt.datetime.fromisoformat(as_of)
+        except ValueError:
+            pass
+    import pandas as pd
+    return pd.to_datetime(as_of)
+
+
+def _sunday_to_monday(day):
+    return day + dt.timedelta(days=1) if day.weekday() == 6 else day
+
+
+def _nth_weekday(year, month, weekday, n):
+    first = dt.date(year, month, 1)
+    return first + dt.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year, month, weekday):
+    return _last_weekday_before(dt.date(year, month, calendar.monthrange(year, month)[1]) + dt.timedelta(days=1),
+                                weekday)
+
+
+def _last_weekday_before(day, weekday):
+    """The last given weekday strictly before day"""
+    before = day - dt.timedelta(days=1)
+    return before - dt.timedelta(days=(before.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """Easter Sunday (Gregorian), by the Meeus/Jones/Butcher algorithm"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (b - (b + 8) // 25 + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return dt.date(year, month, day + 1)
+
+
+# Holiday rule sets: each rule gives a year's holiday date. NERC is the rule set of NERCHolidayCalendar.
+HOLIDAY_RULES = {
+    'nerc': (
+        lambda year: _sunday_to_monday(dt.date(year, 1, 1)),  # New Year's Day
+        lambda year: _last_weekday(year, 5, calendar.MONDAY),  # Memorial Day
+        lambda year: _sunday_to_monday(dt.date(year, 7, 4)),  # Independence Day
+        lambda year: _nth_weekday(year, 9, calendar.MONDAY, 1),  # Labor Day
+        lambda year: _nth_weekday(year, 11, calendar.THURSDAY, 4),  # Thanksgiving
+        lambda year: _sunday_to_monday(dt.date(year, 12, 25)),  # Christmas
+    ),
+    # Alberta general holidays, for AESO
+    'alberta': (
+        lambda year: _sunday_to_monday(dt.date(year, 1, 1)),  # New Year's Day
+        lambda year: _nth_weekday(year, 2, calendar.MONDAY, 3),  # Family Day
+        lambda year: _easter(year) - dt.timedelta(days=2),  # Good Friday
+        lambda year: _last_weekday_before(dt.date(year, 5, 25), calendar.MONDAY),  # Victoria Day
+        lambda year: _sunday_to_monday(dt.date(year, 7, 1)),  # Canada Day
+        lambda year: _nth_weekday(year, 9, calendar.MONDAY, 1),  # Labour Day
+        lambda year: _nth_weekday(year, 10, calendar.MONDAY, 2),  # Thanksgiving
+        lambda year: dt.date(year, 11, 11),  # Remembrance Day
+        lambda year: _sunday_to_monday(dt.date(year, 12, 25)),  # Christmas
+    ),
+}
+
+# Holiday rule set of each ISO; ISOs not listed follow NERC
+ISO_HOLIDAYS = {Iso.AESO: 'alberta'}
+
+
+def register_holidays(name, rules, isos=()):
+    """
+    Adds or replaces a holiday rule set: rules is a sequence of functions that each return one holiday date for a
+    year. The ISOs given follow it from now on.
+    """
+    HOLIDAY_RULES[name] = tuple(rules)
+    for iso in isos:
+        ISO_HOLIDAYS[_as_iso(iso)] = name
+    for key in [k for k in _holidays if k[0] == name]:
+        del _holidays[key]
+
+
+def _as_iso(iso):
+    return iso if isinstance(iso, Iso) else Iso(iso.lower())
+
+
+def holiday_rule_set(iso=None):
+    """Name of the holiday rule set an ISO follows (NERC if none is given, or it is not a known ISO)"""
+    if iso is None:
+        return 'nerc'
+    try:
+        iso = _as_iso(iso)
+    except ValueError:
+        # convert and translateBlocks have always accepted any ISO name for daily and monthly volumes
+        return 'nerc'
+    return ISO_HOLIDAYS.get(iso, 'nerc')
+
+
+def holiday_dates(year, iso=None):
+    """The year's holidays for an ISO (default: NERC) as a frozenset of dates"""
+    name = holiday_rule_set(iso)
+    holidays = _holidays.get((name, year))
+    if holidays is None:
+        holidays = frozenset(rule(year) for rule in HOLIDAY_RULES[name])
+        _holidays[(name, year)] = holidays
+    return holidays
+
+
+def nerc_holiday_dates(year):
+    """The year's NERC holidays as a frozenset of dates, with the same rules as NERCHolidayCalendar"""
+    return holiday_dates(year)
+
+
+def is_weekend_day(as_of):
+    if as_of.weekday() < 5:
+        return False
+    else:
+        return True
+
+
+def is_sunday(as_of):
+    return True if as_of.weekday() == 6 else False
+
+
+def is_nerc_holiday(as_of):
+    return as_of.date() in nerc_holiday_dates(as_of.year)
+
+
+def is_holiday(as_of, iso=None):
+    """True on a holiday of the ISO's rule set (default: NERC)"""
+    return as_of.date() in holiday_dates(as_of.year, iso)
+
+
+def is_offpeak_day(as_of, iso=None):
+    as_of = _as_datetime(as_of)
+    return is_weekend_day(as_of) or is_holiday(as_of, iso)
+
+
+def is_peak_day(as_of, iso=None):
+    return not is_offpeak_day(as_of, iso)
+
+
+def dst_transition_dates():
+    """Dates of the America/Chicago DST transitions (in UTC), as a frozenset"""
+    if not _transitions:
+        from pytz import timezone
+        tz = timezone("America/Chicago")
+        _transitions['dates'] = frozenset(d.date() for d in tz._utc_transition_times)
+    return _transitions['dates']
+
+
+def is_dst_transition(as_of):
+    is_tx = as_of.date() in dst_transition_dates()
+
+    short_day = True if (as_of.month == 3 and is_tx) else False
+    long_day = True if (as_of.month == 11 and is_tx) else False
+
+    return is_tx, short_day, long_day
+
+
+def get_iso_details(iso):
+    if iso in [Iso.AESO, Iso.ISONE, Iso.NYISO, Iso.PJM, Iso.MISO]:
+        first_peak_he = 8
+        last_peak_he = 23
+    elif iso in [Iso.ERCOT, Iso.SPP, Iso.CAISO]:
+        first_peak_he = 7
+        last_peak_he = 22
+    else:
+        raise ElektraConfigError('Invalid ISO:' + iso)
+
+    return first_peak_he, last_peak_he
+
+
+def is_relevant_hour(block, iso, data_hour, flow_date):
+    first_peak, last_peak = get_iso_details(iso)
+    ret = False
+    special = None
+
+    if block in [Block._5x16, Block._7x16, Block._2x16, Block._6x16]:
+        if first_peak <= data_hour <= last_peak:
+            ret = True
+    elif block in [Block._7x24, Block._1x1]:
+        ret = True
+    elif block in [Block.Wrap]:
+        if iso == Iso.CAISO:
+            if (is_sunday(as_of=flow_date) or is_holiday(flow_date, iso)):
+                ret = True
+            elif (data_hour < first_peak) or (data_hour > last_peak):
+                ret = True
+        else:
+            if is_offpeak_day(flow_date, iso):
+                ret = True
+            elif (data_hour < first_peak) or (data_hour > last_peak):
+                ret = True
+    elif block in [Block._7x8]:
+        if (data_hour < first_peak) or (data_hour > last_peak):
+            ret = True
+
+    # Check DST Craziness, for hours that would otherwise be relevant
+    if ret:
+        is_tx, short_day, long_day = is_dst_transition(flow_date)  # Look for DST Weirdness
+        if is_tx and short_day and data_hour == 3:
+            log.info('Short Day: {0}, Short Hour: {1}'.format(flow_date.strftime('%Y-%m-%d'), data_hour))
+            ret = False
+        elif is_tx and long_day and data_hour == 2:
+            log.info('Long Day: {0}, Long Hour: {1}'.format(flow_date.strftime('%Y-%m-%d'), data_hour))
+            ret = True
+            special = 'long'
+
+    return ret, special
+
+
+def is_relevant_day(block, iso, flow_date):
+    if block in [Block._5x16] and is_peak_day(flow_date, iso):
+        return True
+    elif block in [Block._7x8, Block._7x16, Block._7x24, Block.Wrap]:
+        return True
+    elif block in [Block._2x16] and is_offpeak_day(flow_date, iso):
+        return True
+    elif block in [Block._6x16] and not (is_sunday(as_of=flow_date) or is_holiday(flow_date, iso)):
+        return True
+    else:
+        return False
+
+
+def ldom(flow_date):
+    day = calendar.monthrange(flow_date.year, flow_date.month)[1]
+    ldom = dt.datetime(year=flow_date.year, month=flow_date.month, day=day)
+    return ldom
+
+
+def fdom(flow_date):
+    return dt.datetime(year=flow_date.year, month=flow_date.month, day=1)
+
+
+def fhod(flow_date):
+    return dt.datetime(year=flow_date.year, month=flow_date.month, day=flow_date.day, hour=0)
+
+
+def lhod(flow_date):
+    return dt.datetime(year=flow_date.year, month=flow_date.month, day=flow_date.day, hour=23)
@@ -0,0 +1,72 @@
+"""
+Every block price for every period from one load of hourly prices.
+
+Publishing daily and monthly prices for each block with create_prices repeats the input scan and the calendar build
+once per (block, frequency). create_price_cube builds the month's hour grid and block masks once and reduces the
+masked hours for all blocks and periods together.
+"""
+import logging
+
+import pandas as pd
+
+from elektra.core import fdom, ldom
+from elektra.backends import index_input
+from elektra.hours import PRICED_BLOCKS, as_iso, as_block, hour_grid, block_masks, hour_stats, attach_stats, \
+    masked_totals, insufficient_data_error
+
+log = logging.getLogger(__name__)
+
+DAILY = 'daily'
+MONTHLY = 'monthly'
+BALANCE_OF_MONTH = 'balance_of_month'
+
+CUBE_PERIODS = [DAILY, MONTHLY, BALANCE_OF_MONTH]
+
+
+def period_masks(grid, flow_date, periods=None):
+    """Boolean DataFrame marking the grid rows in each period: the flow date, its month, or flow date to month end"""
+    day = pd.Timestamp(flow_date).normalize()
+    flow_dates = grid['flow_date']
+    masks = {
+        DAILY: (flow_dates == day).to_numpy(),
+        MONTHLY: ((flow_dates >= pd.Timestamp(fdom(day))) & (flow_dates <= pd.Timestamp(ldom(day)))).to_numpy(),
+        BALANCE_OF_MONTH: ((flow_dates >= day) & (flow_dates <= pd.Timestamp(ldom(day)))).to_numpy(),
+    }
+    return pd.DataFrame({p: masks[p] for p in (periods or CUBE_PERIODS)}, index=grid.index)
+
+
+def create_price_cube(flow_date, ticker, node, iso, input_prices, blocks=None, periods=None, errors='raise'):
+    """
+    Returns a DataFrame of block prices, one row per block (default: every priced block) and one column per period
+    (default: daily, monthly and balance_of_month, which runs from flow_date to the end of its month).
+
+    Each price equals what create_prices returns for that block and period. A block with no hours in a period (e.g.
+    5x16 on a Saturday) is NaN. Missing or duplicated hours raise InsufficientDataError, or give NaN for just the
+    affected prices when errors='coerce'.
+    """
+    iso = as_iso(iso)
+    blocks = [as_block(b) for b in (blocks or PRICED_BLOCKS)]
+    periods = periods or CUBE_PERIODS
+
+    # DST hour endings are renumbered from the whole input, as create_prices does
+    prices = index_input(flow_date, input_prices)
+    grid = hour_grid(fdom(flow_date), ldom(flow_date))
+    grid = attach_stats(grid, hour_stats(prices.drop(columns='node', errors='ignore')))
+
+    masks = block_masks(blocks, iso, grid)
+    in_period = period_masks(grid, flow_date, periods)
+    totals = masked_totals(grid, masks, in_period)
+
+    broken = totals['bad'] > 0
+    if errors == 'raise' and broken.to_numpy().any():
+        block, period = broken.stack()[lambda s: s].index[0]
+        raise insufficient_data_error(ticker, node, iso, as_block(block), period, grid,
+                                      masks[block].to_numpy() & in_period[period].to_numpy())
+
+    cube = totals['total'] / totals['valued'].where(totals['valued'] > 0)
+    cube = cube.mask(broken | (totals['required'] == 0))
+    cube.index.name = 'block'
+
+    log.info('Price Cube: {0:%Y-%m-%d} Ticker: {1}, Node: {2}, ISO: {3} >> {4} blocks x {5} periods'.format(
+        flow_date, ticker, node, iso.value, len(blocks), len(periods)))
+    return cube
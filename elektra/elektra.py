@@ -4,11 +4,12 @@ import calendar
 import logging
 
 import pandas as pd
-from pytz import timezone
 from dateutil import tz
 
 from elektra.exceptions import InsufficientDataError, ElektraConfigError, NoRelevantHoursTodayError
-from elektra.utils import Iso, Block, Frequency, NERCHolidayCalendar
+from elektra.utils import Iso, Block, Frequency
+from elektra.core import is_weekend_day, is_sunday, is_nerc_holiday, is_offpeak_day, is_peak_day, is_dst_transition, \
+    get_iso_details, is_relevant_hour, is_relevant_day, ldom, fdom, fhod, lhod, nerc_holiday_dates
 
 # create the logger config
 log = logging.getLogger(__name__)
@@ -28,62 +29,13 @@ def hello():
 def get_nerc_holidays(year):
     holidays = nhcal.get(year, None)
     if holidays is None:
-        inst = NERCHolidayCalendar()
-        holidays = inst.holidays(dt.datetime(year - 1, 12, 31), dt.datetime(year, 12, 31))
+        # Same dates as NERCHolidayCalendar, from the compiled rules in elektra.core
+        holidays = pd.DatetimeIndex(sorted(nerc_holiday_dates(year)))
         nhcal[year] = holidays
 
     return holidays
 
 
-def is_weekend_day(as_of):
-    if as_of.weekday() < 5:
-        return False
-    else:
-        return True
-
-
-def is_sunday(as_of):
-    return True if as_of.weekday() == 6 else False
-
-
-def is_nerc_holiday(as_of):
-    year_val = as_of.year
-    holidays = get_nerc_holidays(year_val)
-    return True if as_of.replace(hour=0, minute=0, second=0) in holidays else False
-
-
-def is_offpeak_day(as_of):
-    as_of = pd.to_datetime(as_of)
-    if is_weekend_day(as_of):
-        return True
-    else:
-        year_val = as_of.year
-        holidays = get_nerc_holidays(year_val)
-        if as_of.replace(hour=0, minute=0, second=0) in holidays:
-            return True
-        else:
-            return False
-
-
-def is_peak_day(as_of):
-    return not is_offpeak_day(as_of)
-
-
-def is_dst_transition(as_of):
-    tz = timezone("America/Chicago")
-    transition_dates = [d.date() for d in tz._utc_transition_times]
-
-    is_tx = False
-    if as_of.date() in transition_dates:
-        is_tx = True
-        # log.debug('DST!' + as_of.strftime("%m/%d/%Y"))
-
-    short_day = True if (as_of.month == 3 and is_tx) else False
-    long_day = True if (as_of.month == 11 and is_tx) else False
-
-    return is_tx, short_day, long_day
-
-
 def adjust_dst(as_of, mwh):
     # Is today a UTC transition date?
     is_tx, short_day, long_day = is_dst_transition(as_of)
@@ -96,9 +48,9 @@ def adjust_dst(as_of, mwh):
         return mwh
 
 
-def convert(flow_dt, input_block, output_block):
-    # Is today a weekend or NERC holiday?
-    is_peak = not is_offpeak_day(flow_dt)
+def convert(flow_dt, input_block, output_block, iso=None):
+    # Is today a weekend or holiday (NERC, or the ISO's own holidays if one is given)?
+    is_peak = not is_offpeak_day(flow_dt, iso)
 
     log.debug("Flow Date: {0}, Input Block: {1}, Output Block: {2}".format(flow_dt, input_block, output_block))
 
@@ -166,10 +118,19 @@ def convert(flow_dt, input_block, output_block):
 
 
 
-def translateBlocks(iso, mw, frequency, contract_start, in_block, out_blocks, out_uom):
+def translateBlocks(iso, mw, frequency, contract_start, in_block, out_blocks, out_uom, contract_end=None):
     # Blocks are: 7x24, 5x16, Wrap, 2x16, 7x8
-    # Frequency is a stub: monthly, daily, hourly
-    # ISO is a stub; CAISO includes Saturdays (or Sundays) in Peak, but others should be the same
+    # Frequency: monthly, daily, or hourly
+    # For monthly and daily, the ISO only picks the holiday calendar (NERC for any ISO without its own, or an unknown
+    # ISO name); peak days are weekdays that are not holidays for every ISO, CAISO included
+
+    # Hourly: MW in every hour from contract_start through contract_end (default: the one day), using the ISO's
+    # peak hours and the same peak days and supported conversions as convert, so each day's hours add up to the
+    # daily MWh; one row per hour, with 23 and 25 hour DST days
+    if frequency == "hourly":
+        from elektra.shapes import hourly_shape
+        shape = hourly_shape(iso, contract_start, contract_end or contract_start, out_blocks, mw=mw, in_block=in_block)
+        return shape.reset_index().rename(columns={'flow_date': 'date'})
 
     # Given frequency and contract_start, come up with a date range
     if frequency == "monthly":
@@ -189,7 +150,7 @@ def translateBlocks(iso, mw, frequency, contract_start, in_block, out_blocks, ou
     for index, row in df.iterrows():
         log.debug('MW: {0}'.format(mw))
         for out_block in out_blocks:
-            calc_value = convert(row['date'], in_block, out_block)
+            calc_value = convert(row['date'], in_block, out_block, iso)
             log.debug('Calc_value: {0}'.format(calc_value))
             calc_value = (calc_value / calc_value) if ((calc_value != 0) and (out_uom == 'MW')) else calc_value
             value = calc_value * mw
@@ -228,34 +189,14 @@ def merge_block_prices(df, iso='pjm', to_block='7x24' ):
                         )
     return df
   
-def get_blocks(as_of):
+def get_blocks(as_of, iso=Iso.PJM):
     """
-        returns a list of blocks that are relevant for a given date
-
-    holidays = ['01/01/2019','05/27/2019','07/04/2019','09/02/2019','11/28/2019','12/25/2019']
-    weekends = [5,6]
-    if (as_of.weekday() in weekends) or (as_of.strftime('%m/%d/%Y') in holidays):
+        returns the values of the blocks that have hours on a given date for an ISO, e.g. ['2x16', '7x8', '7x16',
+        '7x24', 'wrap'] on a weekend. For whole date ranges, use elektra.hours.block_membership.
     """
-    nerc = HolidayCalendar('nerc') #TODO: Unresolved reference
-    if not nerc.is_business_day(as_of):
-        # return ['off_peak_weekends', 'atc']
-        return ['off_peak_weekends', 'atc', 'off_peak_all', 'on_peak_all']
-    else:
-        # return ['on_peak_weekdays','off_peak_weekdays','atc']
-        return ['on_peak_weekdays', 'off_peak_weekdays', 'atc', 'off_peak_all', 'on_peak_all']
-
-
-def get_iso_details(iso):
-    if iso in [Iso.AESO, Iso.ISONE, Iso.NYISO, Iso.PJM, Iso.MISO]:
-        first_peak_he = 8
-        last_peak_he = 23
-    elif iso in [Iso.ERCOT, Iso.SPP, Iso.CAISO]:
-        first_peak_he = 7
-        last_peak_he = 22
-    else:
-        raise ElektraConfigError('Invalid ISO:' + iso)
-
-    return first_peak_he, last_peak_he
+    from elektra.hours import block_membership
+    membership = block_membership(as_of, as_of, iso, frequency=Frequency.Daily)
+    return [block for block in membership.columns if membership[block].iloc[0]]
 
 
 def get_required_hours(block, as_of):
@@ -287,78 +228,10 @@ def dst_hour(as_of):
         return 0
 
 
-def is_relevant_hour(block, iso, data_hour, flow_date):
-    first_peak, last_peak = get_iso_details(iso)
-    ret = False
-    special = None
-
-    if block in [Block._5x16, Block._7x16, Block._2x16, Block._6x16]:
-        if first_peak <= data_hour <= last_peak:
-            ret = True
-    elif block in [Block._7x24, Block._1x1]:
-        ret = True
-    elif block in [Block.Wrap]:
-        if iso == Iso.CAISO:
-            if (is_sunday(as_of=flow_date) or is_nerc_holiday(as_of=flow_date)):
-                ret = True
-            elif (data_hour < first_peak) or (data_hour > last_peak):
-                ret = True
-        else:
-            if is_offpeak_day(flow_date):
-                ret = True
-            elif (data_hour < first_peak) or (data_hour > last_peak):
-                ret = True
-    elif block in [Block._7x8]:
-        if (data_hour < first_peak) or (data_hour > last_peak):
-            ret = True
-
-    # Check DST Craziness, for hours that would otherwise be relevant
-    if ret:
-        is_tx, short_day, long_day = is_dst_transition(flow_date)  # Look for DST Weirdness
-        if is_tx and short_day and data_hour == 3:
-            log.info('Short Day: {0}, Short Hour: {1}'.format(flow_date.strftime('%Y-%m-%d'), data_hour))
-            ret = False
-        elif is_tx and long_day and data_hour == 2:
-            log.info('Long Day: {0}, Long Hour: {1}'.format(flow_date.strftime('%Y-%m-%d'), data_hour))
-            ret = True
-            special = 'long'
-
-    return ret, special
-
-
-def is_relevant_day(block, iso, flow_date):
-    if block in [Block._5x16] and is_peak_day(flow_date):
-        return True
-    elif block in [Block._7x8, Block._7x16, Block._7x24, Block.Wrap]:
-        return True
-    elif block in [Block._2x16] and is_offpeak_day(flow_date):
-        return True
-    elif block in [Block._6x16] and not (is_sunday(as_of=flow_date) or is_nerc_holiday(as_of=flow_date)):
-        return True
-    else:
-        return False
-
-
-def ldom(flow_date):
-    day = calendar.monthrange(flow_date.year, flow_date.month)[1]
-    ldom = dt.datetime(year=flow_date.year, month=flow_date.month, day=day)
-    return ldom
-
-
-def fdom(flow_date):
-    return dt.datetime(year=flow_date.year, month=flow_date.month, day=1)
-
-
-def fhod(flow_date):
-    return dt.datetime(year=flow_date.year, month=flow_date.month, day=flow_date.day, hour=0)
-
-
-def lhod(flow_date):
-    return dt.datetime(year=flow_date.year, month=flow_date.month, day=flow_date.day, hour=23)
-
-
-def create_prices(flow_date, ticker, node, iso, block, frequency, input_prices):
+def create_prices(flow_date, ticker, node, iso, block, frequency, input_prices, fill=None, backend=None):
     # Input_prices will need: flow_date, hour_beginning, and price
+    # fill: optional dict of elektra.fill.fill_prices options (policies, max_fills, ...) to patch missing hours first
+    # backend: pandas (this function), vectorized, polars or arrow; see elektra.backends
     log.info('--- I am Elektra. ---')
     log.debug(input_prices)
     if input_prices.empty:
@@ -382,6 +255,22 @@ def create_prices(flow_date, ticker, node, iso, block, frequency, input_prices):
     hours = pd.date_range(start=start_dt, end=end_dt, closed=None, normalize=False, freq='H')
     log.debug(hours.format(formatter=lambda x: x.strftime('%Y-%m-%d  %H:%M')))
 
+    # Fill missing hours before averaging, if asked to
+    if fill is not None:
+        from elektra.fill import fill_prices
+        input_prices, fills = fill_prices(start_dt, end_dt, iso, input_prices, blocks=[block], **fill)
+        log.info('Filled {0} hours for {1}/{2}'.format(fills['policy'].notna().sum(), ticker, node))
+
+    # Hand the required hours join and average to another backend, if one is chosen and installed
+    from elektra.backends import load_engine
+    engine = load_engine(backend)
+    if engine is not None:
+        price = engine(flow_date, ticker, node, iso, block, frequency, input_prices)
+        log.info('Flow Date: {0} Ticker: {1}, Block: {2}, Frequency: {3}, ISO: {4} >> {5}'.format(
+            flow_date, ticker, block.value, frequency.value, iso.value, price))
+        log.info('--- Elektra Processing Complete. ---')
+        return price
+
     # Mark Required Hours
     df = pd.DataFrame()
     for dh in hours:
@@ -0,0 +1,29 @@
+from enum import Enum
+
+
+class Iso(Enum):
+    MISO = 'miso'
+    ISONE = 'isone'
+    ERCOT = 'ercot'
+    PJM = 'pjm'
+    SPP = 'spp'
+    AESO = 'aeso'
+    NYISO = 'nyiso'
+    CAISO = 'caiso'
+
+
+class Block(Enum):
+    _7x8 = '7x8'
+    _5x16 = '5x16'
+    _2x16 = '2x16'
+    _7x24 = '7x24'
+    _7x16 = '7x16'
+    _1x1 = '1x1'
+    Wrap = 'wrap'
+    _6x16 = '6x16'
+
+
+class Frequency(Enum):
+    Daily = 'daily'
+    Monthly = 'monthly'
+    Hourly = 'hourly'
@@ -0,0 +1,135 @@
+"""
+Gap filling for missing hourly prices.
+
+fill_prices finds the required hours that have too few LMP rows and fills them in one pass over the required-hours
+grid, trying each policy in turn:
+
+* prior_day: the same hour ending on the previous day
+* interpolate: linear interpolation between the nearest priced hours of the same day
+* proxy: a proxy (hub) price for the same hour, plus the node's average basis to that proxy over the period
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from elektra.exceptions import ElektraConfigError
+from elektra.hours import HOURS_PER_DAY, as_block, hour_grid, block_masks, index_prices, hour_stats, attach_stats
+
+log = logging.getLogger(__name__)
+
+FILL_POLICIES = ['prior_day', 'interpolate', 'proxy']
+
+FILL_COLUMNS = ['node', 'flow_date', 'HE', 'missing', 'policy', 'price']
+
+
+def _hour_values(prices):
+    """Average price per (node, flow_date, HE), indexed by those keys"""
+    stats = hour_stats(prices)
+    stats['value'] = stats['total'] / stats['valued'].where(stats['valued'] > 0)
+    return stats.set_index(['node', 'flow_date', 'HE'])['value']
+
+
+def _prior_day(holes, values, proxy_prices, start, end):
+    keys = pd.MultiIndex.from_arrays([holes['node'], holes['flow_date'] - pd.Timedelta(days=1), holes['HE']])
+    return values.reindex(keys).to_numpy()
+
+
+def _interpolate(holes, values, proxy_prices, start, end):
+    wide = values.unstack('HE').reindex(columns=range(1, HOURS_PER_DAY + 1)).astype('float64')
+    wide = wide.interpolate(axis=1, limit_area='inside')
+    keys = pd.MultiIndex.from_arrays([holes['node'], holes['flow_date'], holes['HE']])
+    return wide.stack(dropna=False).reindex(keys).to_numpy()
+
+
+def _proxy(holes, values, proxy_prices, start, end):
+    if proxy_prices is None:
+        raise ElektraConfigError('The proxy fill policy needs proxy_prices')
+
+    proxy = index_prices(proxy_prices).drop(columns='node', errors='ignore')
+    proxy = proxy.assign(node='')
+    proxy = _hour_values(proxy).droplevel('node')
+
+    # Basis is the node's average spread to the proxy over the hours in the period where both are priced
+    observed = values.reset_index()
+    observed = observed[observed['flow_date'].between(start, end)]
+    observed['basis'] = observed['value'].to_numpy() - proxy.reindex(
+        pd.MultiIndex.from_arrays([observed['flow_date'], observed['HE']])).to_numpy()
+    basis = observed.groupby('node', dropna=False)['basis'].mean()
+
+    keys = pd.MultiIndex.from_arrays([holes['flow_date'], holes['HE']])
+    return proxy.reindex(keys).to_numpy() + basis.reindex(holes['node']).to_numpy()
+
+
+_fillers = {'prior_day': _prior_day, 'interpolate': _interpolate, 'proxy': _proxy}
+
+
+def fill_prices(start, end, iso, input_prices, policies=('prior_day', 'interpolate'), blocks=None, max_fills=None,
+                period='monthly', proxy_prices=None):
+    """
+    Fills required hours between start and end that have too few LMP rows.
+
+    input_prices has the create_prices columns plus an optional node column; proxy_prices has the same columns for
+    a single proxy node. Only hours required by `blocks` are filled (default: every hour). Policies are tried in the
+    order given, and the first one that produces a price wins. If `max_fills` is set, a node's period (`daily` or
+    `monthly`) that needs more fills than that is left unfilled.
+
+    Returns the filled prices, in the create_prices input format, and a DataFrame with one row per hole: node,
+    flow_date, HE, the number of rows `missing`, the `policy` used (None if unfilled) and the fill `price`.
+    """
+    for policy in policies:
+        if policy not in _fillers:
+            raise ElektraConfigError('Fill policy not supported: {0}'.format(policy))
+
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+
+    prices = index_prices(input_prices)
+    has_node = 'node' in prices.columns
+    if not has_node:
+        prices.insert(0, 'node', '')
+    values = _hour_values(prices)
+
+    grid = hour_grid(start, end).merge(pd.DataFrame({'node': pd.unique(prices['node'])}), how='cross')
+    if blocks is not None:
+        grid = grid[block_masks([as_block(b) for b in blocks], iso, grid).any(axis=1).to_numpy()]
+    grid = attach_stats(grid[grid['expected'] > 0], hour_stats(prices))
+
+    holes = grid[grid['found'] < grid['expected']].reset_index(drop=True)
+    holes = holes.assign(missing=holes['expected'] - holes['found'], policy=None, price=np.nan)
+
+    for policy in policies:
+        todo = holes['price'].isna().to_numpy()
+        if not todo.any():
+            break
+        filled = np.full(len(holes), np.nan)
+        filled[todo] = _fillers[policy](holes[todo], values, proxy_prices, start, end)
+        now = todo & ~np.isnan(filled)
+        holes.loc[now, 'price'] = filled[now]
+        holes.loc[now, 'policy'] = policy
+
+    if max_fills is not None and len(holes):
+        key = holes['flow_date'] if period == 'daily' else holes['flow_date'].dt.to_period('M')
+        needed = holes['missing'].groupby([holes['node'], key]).transform('sum')
+        over = (needed > max_fills).to_numpy() & holes['price'].notna().to_numpy()
+        if over.any():
+            log.warning('Not filling {0} hours in periods needing more than {1} fills'.format(over.sum(), max_fills))
+            holes.loc[over, 'price'] = np.nan
+            holes.loc[over, 'policy'] = None
+
+    done = holes[holes['price'].notna()]
+    added = done.loc[done.index.repeat(done['missing']), ['node', 'flow_date', 'HE', 'price']]
+    filled = pd.concat([prices, added], ignore_index=True)
+    filled_prices = pd.DataFrame({
+        'flow_date': filled['flow_date'].dt.strftime('%Y-%m-%d'),
+        'hour_ending': filled['HE'],
+        'price': filled['price'],
+    })
+    if has_node:
+        filled_prices.insert(0, 'node', filled['node'])
+    else:
+        holes['node'] = None
+
+    log.info('Fill: {0} of {1} holes filled from {2:%Y-%m-%d} to {3:%Y-%m-%d}'.format(
+        len(done), len(holes), start, end))
+    return filled_prices, holes[FILL_COLUMNS]
@@ -0,0 +1,297 @@
+"""
+Lazy computation graph for publishing many derived prices from one load of hourly prices.
+
+A daily publish of hourly prices, block prices, merged 7x24 prices, spreads and monthly rollups makes one elektra
+call per output, and each call rebuilds the same intermediates: the indexed input, the hour grid, the block masks and
+the per (node, day, block) sums. PriceGraph declares the outputs first, as lazy nodes, and shares every intermediate
+between them; compute then runs each node once, with independent branches in parallel on a thread pool:
+
+    graph = PriceGraph('pjm', prices)
+    outputs = graph.compute({
+        'hourly': graph.hourly_prices(),
+        'daily': graph.block_prices('daily'),
+        'monthly': graph.block_prices('monthly'),
+        '7x24': graph.merged_prices('monthly'),
+        'basis': graph.spreads([('NODE1', 'HUB')], 'daily'),
+    }, workers=4)
+
+The graph covers whole months, from the month of start to the month of end (default: the months of the prices).
+Computed values are kept, so later compute calls on the same graph only run the new nodes.
+"""
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+
+from elektra.core import fdom, ldom
+from elektra.exceptions import ElektraConfigError
+from elektra.history import day_block_sums, block_average, long_frame
+from elektra.hours import HOURS_PER_DAY, PRICED_BLOCKS, as_iso, as_block, as_frequency, hour_grid, block_masks, \
+    index_prices, hour_stats
+from elektra.spreads import SPREAD_BLOCKS, node_hours
+from elektra.utils import Frequency
+
+log = logging.getLogger(__name__)
+
+# Blocks merged into a 7x24 price by default: together they cover every hour once
+MERGED_BLOCKS = ['5x16', '2x16', '7x8']
+
+HOURLY_COLUMNS = ['node', 'flow_date', 'HE', 'price', 'complete']
+GRAPH_SPREAD_COLUMNS = ['node', 'reference', 'block', 'flow_date', 'node_price', 'reference_price', 'spread']
+
+
+class Node:
+    """A value in a PriceGraph: computed by function from the values of its dependencies, when first needed"""
+
+    def __init__(self, key, function, dependencies):
+        self.key = key
+        self.function = function
+        self.dependencies = dependencies
+
+    def __repr__(self):
+        return 'Node{0}'.format(self.key)
+
+
+def _graph_prices(input_prices):
+    prices = index_prices(input_prices)
+    if 'node' not in prices.columns:
+        prices.insert(0, 'node', '')
+    return prices
+
+
+def _period_sums(dates, day_sums, frequency):
+    """The (node x period x block) sums and period start dates for daily or monthly periods"""
+    if frequency == Frequency.Daily:
+        return dates, day_sums
+    month_starts = np.flatnonzero(pd.DatetimeIndex(dates).day == 1)
+    return dates[month_starts], {k: np.add.reduceat(v, month_starts, axis=1) for k, v in day_sums.items()}
+
+
+class PriceGraph:
+    """
+    Derived prices for one ISO from one frame of hourly prices (flow_date, hour_ending, price and an optional node
+    column). The output methods return lazy Nodes; pass them to compute to get DataFrames.
+    """
+
+    def __init__(self, iso, input_prices, start=None, end=None, blocks=None):
+        self.iso = as_iso(iso)
+        self.blocks = [as_block(b) for b in (blocks or PRICED_BLOCKS)]
+        self.input_prices = input_prices
+        self.start = start
+        self.end = end
+        self.nodes = {}
+        self.values = {}
+        # Seconds each computed node took, by key
+        self.timings = {}
+
+    def node(self, key, function, *dependencies):
+        """The graph's node for key, created from function and dependencies the first time the key is asked for"""
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = Node(key, function, dependencies)
+        return node
+
+    # Shared intermediates
+
+    def prices(self):
+        return self.node(('prices',), _graph_prices, self.input_prices)
+
+    def stats(self):
+        return self.node(('stats',), hour_stats, self.prices())
+
+    def price_nodes(self):
+        return self.node(('price_nodes',), lambda prices: list(pd.unique(prices['node'])), self.prices())
+
+    def grid(self):
+        def build(prices):
+            start = pd.Timestamp(self.start) if self.start is not None else prices['flow_date'].min()
+            end = pd.Timestamp(self.end) if self.end is not None else prices['flow_date'].max()
+            return hour_grid(fdom(start), ldom(end))
+        return self.node(('grid',), build, self.prices())
+
+    def dates(self):
+        return self.node(('dates',), lambda grid: grid['flow_date'].to_numpy()[::HOURS_PER_DAY], self.grid())
+
+    def masks(self):
+        return self.node(('masks',), lambda grid: block_masks(self.blocks, self.iso, grid), self.grid())
+
+    def node_hours(self):
+        return self.node(('node_hours',), node_hours, self.grid(), self.stats(), self.price_nodes())
+
+    def day_sums(self):
+        return self.node(('day_sums',), day_block_sums, self.grid(), self.masks(), self.stats(), self.price_nodes())
+
+    def period_sums(self, frequency):
+        frequency = as_frequency(frequency)
+        if frequency not in [Frequency.Daily, Frequency.Monthly]:
+            raise ElektraConfigError('Frequency not supported for graph prices: {0}'.format(frequency.value))
+        return self.node(('period_sums', frequency.value), lambda dates, sums: _period_sums(dates, sums, frequency),
+                         self.dates(), self.day_sums())
+
+    def _block_positions(self, blocks):
+        blocks = [as_block(b) for b in blocks]
+        missing = [b.value for b in blocks if b not in self.blocks]
+        if missing:
+            raise ElektraConfigError('Blocks {0} are not in this graph ({1})'.format(
+                ', '.join(missing), ', '.join(b.value for b in self.blocks)))
+        return blocks, [self.blocks.index(b) for b in blocks]
+
+    # Outputs
+
+    def hourly_prices(self):
+        """
+        Each node's price in every hour of the graph's months: node, flow_date, HE, price and complete, which is
+        False unless the hour has the expected number of rows. The repeated fall DST hour is the average of its two
+        rows; the skipped spring hour is not listed.
+        """
+        def build(grid, hours, nodes):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                hourly = hours['total'] / hours['valued']
+            keep = grid['expected'].to_numpy() > 0
+            kept = grid[keep]
+            frame = pd.DataFrame({
+                'node': np.repeat(np.array(nodes, dtype=object), len(kept)),
+                'flow_date': np.tile(kept['flow_date'].to_numpy(), len(nodes)),
+                'HE': np.tile(kept['HE'].to_numpy(), len(nodes)),
+                'price': hourly[:, keep].ravel(),
+                'complete': ~hours['bad'][:, keep].ravel(),
+            })
+            if (frame['node'] == '').all():
+                frame['node'] = None
+            return frame[HOURLY_COLUMNS]
+        return self.node(('hourly_prices',), build, self.grid(), self.node_hours(), self.price_nodes())
+
+    def block_prices(self, frequency='daily', blocks=None):
+        """
+        Block prices per node for each day or month, as create_prices gives them: one row per (node, block,
+        flow_date) with `price`, NaN where the block has no hours or any of its hours are missing or duplicated.
+        """
+        blocks, positions = self._block_positions(blocks or self.blocks)
+
+        def build(period_sums, nodes):
+            dates, sums = period_sums
+            price = block_average(*(sums[k][:, :, positions] for k in ('total', 'valued', 'bad')))
+            return long_frame(nodes, blocks, dates, {'price': price})
+        key = ('block_prices', as_frequency(frequency).value, tuple(b.value for b in blocks))
+        return self.node(key, build, self.period_sums(frequency), self.price_nodes())
+
+    def merged_prices(self, frequency='daily', from_blocks=None, to_block='7x24'):
+        """
+        Prices of from_blocks (default: 5x16, 2x16 and 7x8) merged into to_block, weighting each block by its hours
+        as merge_block_prices does: one row per (node, flow_date) with block = to_block and `price`, NaN if any of
+        the blocks has a missing or duplicated hour. The blocks must cover each hour exactly once, as for
+        shape_forward_curve.
+        """
+        blocks, positions = self._block_positions(from_blocks or MERGED_BLOCKS)
+
+        def build(period_sums, nodes, grid, masks):
+            hours = masks.to_numpy()[grid['expected'].to_numpy() > 0][:, positions]
+            if (hours.sum(axis=1) != 1).any():
+                raise ElektraConfigError('Blocks {0} do not cover every {1} hour exactly once'.format(
+                    ', '.join(b.value for b in blocks), self.iso.value))
+            dates, sums = period_sums
+            price = block_average(*(sums[k][:, :, positions].sum(axis=2, keepdims=True)
+                                    for k in ('total', 'valued', 'bad')))
+            return long_frame(nodes, [as_block(to_block)], dates, {'price': price})
+        key = ('merged_prices', as_frequency(frequency).value, tuple(b.value for b in blocks), to_block)
+        return self.node(key, build, self.period_sums(frequency), self.price_nodes(), self.grid(), self.masks())
+
+    def spreads(self, pairs, frequency='daily', blocks=None):
+        """
+        Block spreads of (node, reference) pairs for each day or month: node_price, reference_price and spread =
+        node_price - reference_price per (pair, block, flow_date). Where either leg's block price is NaN, all three
+        are, as with create_spreads(errors='coerce'). Blocks default to 5x16, 2x16 and 7x8.
+        """
+        pairs = pairs if isinstance(pairs, pd.DataFrame) else pd.DataFrame(list(pairs), columns=['node', 'reference'])
+        if len(pairs) == 0:
+            raise ElektraConfigError('No (node, reference) pairs given')
+        pairs = pairs[['node', 'reference']].reset_index(drop=True)
+        blocks, positions = self._block_positions(blocks or SPREAD_BLOCKS)
+
+        def build(period_sums, nodes):
+            dates, sums = period_sums
+            prices = block_average(*(sums[k][:, :, positions] for k in ('total', 'valued', 'bad')))
+            index = pd.Index(nodes)
+            node_rows, reference_rows = index.get_indexer(pairs['node']), index.get_indexer(pairs['reference'])
+            unknown = pd.concat([pairs['node'][node_rows < 0], pairs['reference'][reference_rows < 0]])
+            if len(unknown):
+                raise ElektraConfigError('No prices for nodes: {0}'.format(', '.join(pd.unique(unknown))))
+
+            node_price = prices[node_rows].transpose(0, 2, 1)
+            reference_price = prices[reference_rows].transpose(0, 2, 1)
+            # As with create_spreads(errors='coerce'), a broken leg leaves both legs NaN
+            broken = np.isnan(node_price) | np.isnan(reference_price)
+            node_price = np.where(broken, np.nan, node_price)
+            reference_price = np.where(broken, np.nan, reference_price)
+            per_pair = len(blocks) * len(dates)
+            frame = pd.DataFrame({
+                'node': np.repeat(pairs['node'].to_numpy(), per_pair),
+                'reference': np.repeat(pairs['reference'].to_numpy(), per_pair),
+                'block': np.tile(np.repeat([b.value for b in blocks], len(dates)), len(pairs)),
+                'flow_date': np.tile(dates, len(pairs) * len(blocks)),
+                'node_price': node_price.ravel(),
+                'reference_price': reference_price.ravel(),
+            })
+            frame['spread'] = frame['node_price'] - frame['reference_price']
+            return frame[GRAPH_SPREAD_COLUMNS]
+        key = ('spreads', as_frequency(frequency).value, tuple(b.value for b in blocks),
+               tuple(map(tuple, pairs.to_numpy().tolist())))
+        return self.node(key, build, self.period_sums(frequency), self.price_nodes())
+
+    # Execution
+
+    def _needed(self, outputs):
+        """Nodes the outputs depend on (and the outputs), dependencies first"""
+        order, seen = [], set()
+
+        def visit(node):
+            if node.key in seen:
+                return
+            seen.add(node.key)
+            for dependency in node.dependencies:
+                if isinstance(dependency, Node):
+                    visit(dependency)
+            order.append(node)
+
+        for node in outputs:
+            visit(node)
+        return order
+
+    def _value(self, dependency):
+        return self.values[dependency.key] if isinstance(dependency, Node) else dependency
+
+    def _run(self, node):
+        started = time.perf_counter()
+        value = node.function(*(self._value(d) for d in node.dependencies))
+        self.timings[node.key] = time.perf_counter() - started
+        return value
+
+    def compute(self, outputs, workers=4):
+        """
+        Computes the output nodes (a dict of name -> node, or a list of nodes) and everything they need, each node
+        once, running nodes whose dependencies are ready on a pool of `workers` threads. Returns the values in the
+        same shape as outputs.
+        """
+        named = outputs if isinstance(outputs, dict) else dict(enumerate(outputs))
+        waiting = [n for n in self._needed(named.values()) if n.key not in self.values]
+        computed = len(waiting)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while waiting or running:
+                ready = [n for n in waiting if all(d.key in self.values for d in n.dependencies
+                                                   if isinstance(d, Node))]
+                for node in ready:
+                    waiting.remove(node)
+                    running[pool.submit(self._run, node)] = node
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.values[running.pop(future).key] = future.result()
+
+        log.info('Price graph: {0} outputs, {1} nodes computed in {2:.3f}s on {3} workers'.format(
+            len(named), computed, time.perf_counter() - started, workers))
+        values = {name: self.values[node.key] for name, node in named.items()}
+        return values if isinstance(outputs, dict) else list(values.values())
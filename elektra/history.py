@@ -0,0 +1,144 @@
+"""
+Daily, rolling and monthly block price history.
+
+Building a history with create_prices takes one call per node per day. block_history reduces a long hourly history
+to per (node, day, block) sums of prices, priced hours and bad hours in one grouped pass over the shared calendar.
+Rolling averages then come from cumulative sums of those daily sums, so each window is a difference of two running
+totals rather than a fresh average, and memory grows with the output (nodes x days x blocks), not with the window.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from elektra.core import fdom, ldom
+from elektra.hours import HOURS_PER_DAY, PRICED_BLOCKS, as_iso, as_block, hour_grid, block_masks, index_prices, \
+    hour_stats
+
+log = logging.getLogger(__name__)
+
+ROLLING_WINDOWS = (7, 30, 90)
+
+
+def _history_prices(input_prices):
+    prices = index_prices(input_prices)
+    if 'node' not in prices.columns:
+        prices.insert(0, 'node', '')
+    return prices
+
+
+def day_block_sums(grid, masks, stats, nodes):
+    """
+    Reduces hour_stats rows to (node x day x block) arrays over a grid: `total` and `valued` (for averaging as
+    total / valued) and `bad`, the number of block hours whose row count is not the expected one, counting hours
+    with no rows at all.
+    """
+    days = len(grid) // HOURS_PER_DAY
+    expected = grid['expected'].to_numpy()
+    masks = masks.to_numpy()
+    shape = (len(nodes), days, masks.shape[1])
+
+    offsets = ((stats['flow_date'] - grid['flow_date'].iloc[0]) // pd.Timedelta(days=1)).to_numpy()
+    he = stats['HE'].to_numpy()
+    on_grid = (offsets >= 0) & (offsets < days) & (he >= 1) & (he <= HOURS_PER_DAY)
+    stats = stats[on_grid]
+    rows = offsets[on_grid] * HOURS_PER_DAY + he[on_grid] - 1
+    cells = pd.Index(nodes).get_indexer(stats['node']) * days + offsets[on_grid]
+
+    found = stats['found'].to_numpy()
+    matched = (found == expected[rows]) & (expected[rows] > 0)
+    extra = (found != expected[rows]) & (expected[rows] == 0)
+
+    def reduce(weights):
+        sums = np.empty((len(nodes) * days, masks.shape[1]), dtype='float64')
+        for b in range(masks.shape[1]):
+            sums[:, b] = np.bincount(cells, weights=masks[rows, b] * weights, minlength=len(nodes) * days)
+        return sums.reshape(shape)
+
+    required = (masks & (expected > 0)[:, None]).reshape(days, HOURS_PER_DAY, -1).sum(axis=1)
+    return {
+        'total': reduce(stats['total'].to_numpy(dtype='float64')),
+        'valued': reduce(stats['valued'].to_numpy(dtype='float64')),
+        'bad': required[None, :, :] - reduce(matched) + reduce(extra),
+    }
+
+
+def block_average(total, valued, bad):
+    """total / valued, or NaN where there are bad hours or no priced hours"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where((bad == 0) & (valued > 0), total / valued, np.nan)
+
+
+def _window_sums(values, window):
+    """Trailing sums over `window` days along axis 1, from one cumulative sum; NaN until a full window exists"""
+    running = np.cumsum(values, axis=1)
+    sums = np.full(values.shape, np.nan)
+    sums[:, window - 1] = running[:, window - 1]
+    sums[:, window:] = running[:, window:] - running[:, :-window]
+    return sums
+
+
+def long_frame(nodes, blocks, dates, columns):
+    """Flattens (node x date x block) arrays into rows of node, block, flow_date and the given columns"""
+    frame = pd.DataFrame({
+        'node': np.repeat(np.array(nodes, dtype=object), len(dates) * len(blocks)),
+        'flow_date': np.tile(np.repeat(dates, len(blocks)), len(nodes)),
+        'block': np.tile([b.value for b in blocks], len(nodes) * len(dates)),
+    })
+    for name, values in columns.items():
+        frame[name] = values.ravel()
+    if (frame['node'] == '').all():
+        frame['node'] = None
+    return frame.sort_values(['node', 'block', 'flow_date'], kind='stable').reset_index(drop=True)
+
+
+def _history_sums(iso, input_prices, blocks, start, end, whole_months=False):
+    iso = as_iso(iso)
+    blocks = [as_block(b) for b in (blocks or PRICED_BLOCKS)]
+    prices = _history_prices(input_prices)
+    start = pd.Timestamp(start) if start is not None else prices['flow_date'].min()
+    end = pd.Timestamp(end) if end is not None else prices['flow_date'].max()
+    if whole_months:
+        start, end = pd.Timestamp(fdom(start)), pd.Timestamp(ldom(end))
+
+    grid = hour_grid(start, end)
+    nodes = list(pd.unique(prices['node']))
+    sums = day_block_sums(grid, block_masks(blocks, iso, grid), hour_stats(prices), nodes)
+    return nodes, blocks, grid['flow_date'].to_numpy()[::HOURS_PER_DAY], sums
+
+
+def block_history(iso, input_prices, blocks=None, start=None, end=None, windows=ROLLING_WINDOWS):
+    """
+    Daily block prices per node from a long hourly history (flow_date, hour_ending, price and an optional node
+    column), from start to end (default: the first and last flow dates in the prices).
+
+    Returns one row per (node, block, flow_date) with `price`, the day's block average as create_prices gives it,
+    and `rolling_<n>` for each window of n days: the average of the block's hours over the n days ending on
+    flow_date. A price is NaN where the block has no hours or any of its hours are missing or duplicated, and a
+    rolling average is NaN until the history covers a full window or while the window holds a bad hour.
+    """
+    nodes, blocks, dates, sums = _history_sums(iso, input_prices, blocks, start, end)
+    columns = {'price': block_average(sums['total'], sums['valued'], sums['bad'])}
+    for window in windows:
+        if window > len(dates):
+            columns['rolling_{0}'.format(window)] = np.full(sums['total'].shape, np.nan)
+            continue
+        columns['rolling_{0}'.format(window)] = block_average(*(_window_sums(sums[k], window)
+                                                           for k in ('total', 'valued', 'bad')))
+
+    log.info('Block history: {0} nodes x {1} days x {2} blocks, windows {3}'.format(
+        len(nodes), len(dates), len(blocks), list(windows)))
+    return long_frame(nodes, blocks, dates, columns)
+
+
+def monthly_history(iso, input_prices, blocks=None, start=None, end=None):
+    """
+    Monthly block prices per node over every whole month from start to end (default: the months of the prices).
+    Returns one row per (node, block, month) with flow_date as the first of the month and `price` as create_prices
+    gives it for a monthly frequency; NaN where any of the month's block hours are missing or duplicated.
+    """
+    nodes, blocks, dates, sums = _history_sums(iso, input_prices, blocks, start, end, whole_months=True)
+    month_starts = np.flatnonzero(pd.DatetimeIndex(dates).day == 1)
+    months = {k: np.add.reduceat(v, month_starts, axis=1) for k, v in sums.items()}
+    columns = {'price': block_average(months['total'], months['valued'], months['bad'])}
+    return long_frame(nodes, blocks, dates[month_starts], columns)
@@ -0,0 +1,327 @@
+"""
+Vectorized hour calendar shared by the bulk pricing functions.
+
+The scalar helpers in elektra.core (is_relevant_day, is_relevant_hour, is_dst_transition) classify one hour at a
+time. The functions here build the same classification for a whole date range at once, so required hours can be
+checked and averaged with joins and grouped reductions instead of row loops.
+
+A grid has one row per (flow_date, HE) with HE 1..24, plus an `expected` column holding the number of LMP rows each
+hour should have: 0 for the skipped hour of the spring DST day, 2 for the repeated hour of the fall DST day, else 1.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+from pytz import timezone
+
+from elektra.core import HOLIDAY_RULES, holiday_rule_set, holiday_dates, get_iso_details, fdom, ldom
+from elektra.exceptions import ElektraConfigError, InsufficientDataError
+from elektra.utils import Iso, Block, Frequency
+
+log = logging.getLogger(__name__)
+
+HOURS_PER_DAY = 24
+SHORT_HOUR = 3  # hour ending skipped on the spring DST day
+LONG_HOUR = 2  # hour ending repeated on the fall DST day
+
+# Blocks with a price of their own (1x1 is an hourly price, not a block average)
+PRICED_BLOCKS = [Block._5x16, Block._2x16, Block._7x8, Block._7x16, Block._7x24, Block.Wrap, Block._6x16]
+
+# Static holder for DST transition days
+_dst_days = {}
+
+# Years holiday rule sets are compiled for up front; other years are added when first needed
+HOLIDAY_YEARS = (1990, 2060)
+
+# Static holder for compiled holidays: rule set name -> (rules, first year, last year, sorted datetime64[ns] array)
+_holiday_arrays = {}
+
+# Static holder for a precomputed calendar (see elektra.artifacts)
+_calendar = {}
+
+
+def as_iso(iso):
+    return iso if isinstance(iso, Iso) else Iso(iso.lower())
+
+
+def as_block(block):
+    return block if isinstance(block, Block) else Block(block.lower())
+
+
+def as_frequency(frequency):
+    return frequency if isinstance(frequency, Frequency) else Frequency(frequency.lower())
+
+
+def use_calendar(artifact):
+    """Makes hour_grid and block_mask read from a precomputed calendar artifact, or stop doing so if None"""
+    if artifact is None:
+        _calendar.clear()
+    else:
+        _calendar['artifact'] = artifact
+
+
+def dst_transition_days():
+    """
+    Returns (short_days, long_days) as sorted datetime64[ns] arrays, using the same America/Chicago transition
+    table as is_dst_transition.
+    """
+    if not _dst_days:
+        tz = timezone("America/Chicago")
+        days = pd.DatetimeIndex(tz._utc_transition_times[1:]).normalize()
+        _dst_days['short'] = days[days.month == 3].values
+        _dst_days['long'] = days[days.month == 11].values
+    return _dst_days['short'], _dst_days['long']
+
+
+def compile_holidays(first_year=None, last_year=None, iso=None):
+    """
+    Evaluates an ISO's holiday rule set (default: NERC) for a range of years (default: HOLIDAY_YEARS) into a sorted
+    datetime64 array, kept for later calls. Returns the array.
+    """
+    name = holiday_rule_set(iso)
+    rules = HOLIDAY_RULES[name]
+    first_year = first_year or HOLIDAY_YEARS[0]
+    last_year = last_year or HOLIDAY_YEARS[1]
+
+    compiled = _holiday_arrays.get(name)
+    if compiled is not None and compiled[0] is rules:
+        first_year, last_year = min(first_year, compiled[1]), max(last_year, compiled[2])
+    days = sorted(day for year in range(first_year, last_year + 1) for day in holiday_dates(year, iso))
+    array = np.array(days, dtype='datetime64[D]').astype('datetime64[ns]')
+    _holiday_arrays[name] = (rules, first_year, last_year, array)
+    log.debug('Compiled {0} holidays for {1}-{2}'.format(name, first_year, last_year))
+    return array
+
+
+def _compiled_holidays(first_year, last_year, iso=None):
+    name = holiday_rule_set(iso)
+    compiled = _holiday_arrays.get(name)
+    if compiled is None or compiled[0] is not HOLIDAY_RULES[name] or first_year < compiled[1] \
+            or last_year > compiled[2]:
+        compile_holidays(min(first_year, HOLIDAY_YEARS[0]), max(last_year, HOLIDAY_YEARS[1]), iso)
+        compiled = _holiday_arrays[name]
+    return compiled[3]
+
+
+def holiday_days(first_year, last_year, iso=None):
+    """Holidays of an ISO's rule set (default: NERC) for a range of years, as a sorted datetime64[ns] array"""
+    days = _compiled_holidays(first_year, last_year, iso)
+    bounds = np.array(['{0}-01-01'.format(first_year), '{0}-01-01'.format(last_year + 1)], dtype='datetime64[ns]')
+    first, last = np.searchsorted(days, bounds)
+    return days[first:last]
+
+
+def is_holiday(flow_dates, iso=None):
+    """Boolean array: which of the (midnight) datetime64 flow dates are holidays for the ISO (default: NERC)"""
+    flow_dates = np.asarray(flow_dates, dtype='datetime64[ns]')
+    if len(flow_dates) == 0:
+        return np.zeros(0, dtype=bool)
+    years = np.array([flow_dates.min(), flow_dates.max()]).astype('datetime64[Y]').astype('int64') + 1970
+    days = _compiled_holidays(int(years.min()), int(years.max()), iso)
+    positions = np.minimum(np.searchsorted(days, flow_dates), len(days) - 1)
+    return days[positions] == flow_dates
+
+
+def period_bounds(flow_date, frequency):
+    """First and last flow date covered by a daily or monthly price, as in create_prices"""
+    frequency = as_frequency(frequency)
+    if frequency == Frequency.Monthly:
+        return pd.Timestamp(fdom(flow_date)), pd.Timestamp(ldom(flow_date))
+    day = pd.Timestamp(flow_date).normalize()
+    return day, day
+
+
+def hour_grid(start, end):
+    """Every (flow_date, HE) from start to end inclusive, with the number of LMP rows expected for each hour"""
+    days = pd.date_range(start=pd.Timestamp(start).normalize(), end=pd.Timestamp(end).normalize(), freq='D')
+    flow_date = np.repeat(days.values, HOURS_PER_DAY)
+    he = np.tile(np.arange(1, HOURS_PER_DAY + 1, dtype='int64'), len(days))
+
+    artifact = _calendar.get('artifact')
+    if artifact is not None and len(days) and artifact.covers(days[[0, -1]]):
+        expected = artifact.expected_rows(days[0], days[-1])
+        return pd.DataFrame({'flow_date': flow_date, 'HE': he, 'expected': expected})
+
+    short_days, long_days = dst_transition_days()
+    expected = np.ones(len(he), dtype='int64')
+    expected[np.isin(flow_date, short_days) & (he == SHORT_HOUR)] = 0
+    expected[np.isin(flow_date, long_days) & (he == LONG_HOUR)] = 2
+
+    return pd.DataFrame({'flow_date': flow_date, 'HE': he, 'expected': expected})
+
+
+def block_mask(block, iso, grid):
+    """
+    Boolean array marking the grid rows that a block requires, i.e. is_relevant_day and is_relevant_hour for every
+    row at once. 1x1 covers every hour, as in scrub_hourly_prices.
+    """
+    block = as_block(block)
+    iso = as_iso(iso)
+    first_peak, last_peak = get_iso_details(iso)
+
+    days = pd.DatetimeIndex(grid['flow_date'])
+    he = grid['HE'].to_numpy()
+    valid = grid['expected'].to_numpy() > 0
+    if len(days) == 0:
+        return valid
+
+    artifact = _calendar.get('artifact')
+    if artifact is not None and artifact.covers(days, iso, block):
+        return artifact.block_mask(iso, block, days, he) & valid
+
+    holiday = is_holiday(days.normalize().values, iso)
+    weekday = days.weekday.to_numpy()
+    peak_day = (weekday < 5) & ~holiday
+    sunday_or_holiday = (weekday == 6) | holiday
+    peak_hour = (he >= first_peak) & (he <= last_peak)
+
+    if block == Block._5x16:
+        mask = peak_day & peak_hour
+    elif block == Block._2x16:
+        mask = ~peak_day & peak_hour
+    elif block == Block._6x16:
+        mask = ~sunday_or_holiday & peak_hour
+    elif block == Block._7x16:
+        mask = peak_hour
+    elif block in [Block._7x24, Block._1x1]:
+        mask = np.ones(len(he), dtype=bool)
+    elif block == Block.Wrap:
+        if iso == Iso.CAISO:
+            mask = sunday_or_holiday | ~peak_hour
+        else:
+            mask = ~peak_day | ~peak_hour
+    elif block == Block._7x8:
+        mask = ~peak_hour
+    else:
+        raise ValueError('Block not handled: {0}'.format(block))
+
+    return mask & valid
+
+
+def block_masks(blocks, iso, grid):
+    """DataFrame of boolean block_mask columns, one per block (named by block value), aligned with the grid"""
+    return pd.DataFrame({as_block(b).value: block_mask(b, iso, grid) for b in blocks}, index=grid.index)
+
+
+def block_membership(start, end, iso, blocks=None, frequency=Frequency.Hourly):
+    """
+    Which blocks (default: every priced block) each hour from start to end belongs to for an ISO, as a boolean
+    DataFrame with one column per block value. Hourly rows follow hour_grid, indexed by (flow_date, HE); the spring
+    DST day's skipped hour belongs to no block. With a daily frequency, rows are flow dates and a block is True on
+    any day it has hours. The values can be used directly as masks, e.g. prices[membership['5x16'].to_numpy()].
+    """
+    iso = as_iso(iso)
+    frequency = as_frequency(frequency)
+    grid = hour_grid(start, end)
+    masks = block_masks(blocks or PRICED_BLOCKS, iso, grid)
+
+    if frequency == Frequency.Hourly:
+        masks.index = pd.MultiIndex.from_frame(grid[['flow_date', 'HE']])
+        return masks
+    if frequency == Frequency.Daily:
+        days = masks.to_numpy().reshape(len(grid) // HOURS_PER_DAY, HOURS_PER_DAY, -1).any(axis=1)
+        index = pd.DatetimeIndex(grid['flow_date'].to_numpy()[::HOURS_PER_DAY], name='flow_date')
+        return pd.DataFrame(days, index=index, columns=masks.columns)
+    raise ElektraConfigError('Frequency not supported for block membership: {0}'.format(frequency.value))
+
+
+def normalize_dst_hours(prices):
+    """
+    Renumbers hour endings on DST days the same way create_prices does, but for each (node, flow_date) at once:
+    a short day sent as 23 rows numbered 1..23 becomes 1, 2, 4..24, and a long day sent with 25 distinct hour
+    endings becomes 1, 2, 2, 3..24.
+    """
+    short_days, long_days = dst_transition_days()
+    keys = ['node', 'flow_date'] if 'node' in prices.columns else ['flow_date']
+
+    on_short = prices['flow_date'].isin(short_days)
+    if on_short.any():
+        day = prices.loc[on_short].groupby(keys)['HE']
+        shift = (day.transform('size') == 23) & (day.transform('max') == 23) & (prices.loc[on_short, 'HE'] > 2)
+        log.debug('Shifting {0} short day hours past HE 2'.format(shift.sum()))
+        prices.loc[shift[shift].index, 'HE'] += 1
+
+    on_long = prices['flow_date'].isin(long_days)
+    if on_long.any():
+        day = prices.loc[on_long].groupby(keys)['HE']
+        shift = (day.transform('nunique') == 25) & (prices.loc[on_long, 'HE'] > 2)
+        log.debug('Shifting {0} long day hours past HE 2'.format(shift.sum()))
+        prices.loc[shift[shift].index, 'HE'] -= 1
+
+    return prices
+
+
+def index_prices(input_prices, normalize_dst=True):
+    """
+    Converts raw LMP input (flow_date, hour_ending, price and an optional node column) into typed columns
+    flow_date (datetime64), HE (int64), price (float64) and node, with DST hour endings normalized unless
+    normalize_dst is False.
+    """
+    if input_prices.empty:
+        raise InsufficientDataError(
+            'input_prices is empty. This method expects a DataFrame with 3 columns: flow_date (string in YYYY-MM-DD '
+            'format), hour_ending (number), and price (number)')
+
+    prices = pd.DataFrame({
+        'flow_date': pd.to_datetime(input_prices['flow_date']).dt.normalize().to_numpy(),
+        'HE': pd.to_numeric(input_prices['hour_ending']).astype('int64').to_numpy(),
+        'price': pd.to_numeric(input_prices['price']).astype('float64').to_numpy(),
+    })
+    if 'node' in input_prices.columns:
+        prices.insert(0, 'node', input_prices['node'].to_numpy())
+
+    return normalize_dst_hours(prices) if normalize_dst else prices
+
+
+def hour_stats(prices):
+    """
+    Per (node, flow_date, HE) totals of indexed prices: `found` rows, `total` of the prices and `valued` non-null
+    prices, so block averages can be taken as total / valued over any set of hours.
+    """
+    keys = ['node', 'flow_date', 'HE'] if 'node' in prices.columns else ['flow_date', 'HE']
+    stats = prices.groupby(keys, sort=False, dropna=False)['price'].agg(['size', 'sum', 'count'])
+    stats.columns = ['found', 'total', 'valued']
+    return stats.reset_index()
+
+
+def attach_stats(grid, stats):
+    """Left-joins hour_stats onto a grid; hours without data get found = 0"""
+    keys = ['node', 'flow_date', 'HE'] if 'node' in grid.columns else ['flow_date', 'HE']
+    merged = grid.merge(stats, how='left', on=keys)
+    merged['found'] = merged['found'].fillna(0).astype('int64')
+    merged['total'] = merged['total'].fillna(0.0)
+    merged['valued'] = merged['valued'].fillna(0).astype('int64')
+    return merged
+
+
+def masked_totals(grid, masks, periods):
+    """
+    Reduces an attach_stats grid over every (block, period) pair at once. masks and periods are boolean DataFrames
+    aligned with the grid, one column per block and per period. Returns a dict of (block x period) DataFrames:
+    `total` and `valued` (for averaging as total / valued), `required` hours and `bad` hours, whose row count is
+    not the expected one.
+    """
+    block_weights = masks.to_numpy(dtype='float64')
+    period_weights = periods.to_numpy(dtype='float64')
+    bad = (grid['found'].to_numpy() != grid['expected'].to_numpy()).astype('float64')
+
+    def reduce(values):
+        sums = np.einsum('nb,np,n->bp', block_weights, period_weights, values)
+        return pd.DataFrame(sums, index=masks.columns, columns=periods.columns)
+
+    return {
+        'total': reduce(grid['total'].to_numpy(dtype='float64')),
+        'valued': reduce(grid['valued'].to_numpy(dtype='float64')),
+        'required': reduce(np.ones(len(grid))),
+        'bad': reduce(bad),
+    }
+
+
+def insufficient_data_error(ticker, node, iso, block, frequency, grid, rows):
+    """InsufficientDataError for the first of the grid rows with the wrong LMP row count, worded as create_prices"""
+    rows = grid[rows & (grid['found'] != grid['expected']).to_numpy()]
+    row = rows.iloc[0]
+    return InsufficientDataError(
+        'Incorrect number of prices for {3}/{7}: {4} {5} {6} {0} HE {1}. Expected: {8}; Got: {2}. Stopping.'.format(
+            row['flow_date'].strftime('%Y-%m-%d'), str(row['HE']), row['found'], ticker, iso, block, frequency, node,
+            row['expected']))
@@ -0,0 +1,184 @@
+"""
+Concurrent batch pricing: price files are read while earlier nodes are being priced.
+
+run_pipeline has the same inputs and output as elektra.batch.run_price_batch, but runs as three asyncio stages:
+
+* read: up to `readers` price files are read and parsed at once on an I/O thread pool, and each file's rows are
+  split into per-node batches
+* price: each node's batch is priced by elektra.batch.price_node_requests on a thread or process pool of `workers`
+* write: results are appended to the output file as nodes finish
+
+Batches wait in a bounded queue between reading and pricing, and at most two batches per worker are priced at once,
+so readers stall (back-pressure) instead of loading every file when pricing is the slower stage. Each of a node's
+rows must be in one file, as with one file per node; a node found in two files raises ElektraConfigError.
+"""
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import pandas as pd
+
+from elektra.batch import RESULT_COLUMNS, check_frequencies, price_files, read_price_file, spec_date_range, \
+    price_node_requests, ResultWriter
+from elektra.exceptions import ElektraConfigError
+
+log = logging.getLogger(__name__)
+
+EXECUTORS = ['thread', 'process']
+
+# End of input marker on the batch queue
+_DONE = None
+
+
+class StageStats:
+    """Items, rows and busy seconds of one pipeline stage"""
+
+    def __init__(self):
+        self.items = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def record(self, items, rows, seconds):
+        self.items += items
+        self.rows += rows
+        self.seconds += seconds
+
+    def report(self, wall_seconds):
+        return {
+            'items': self.items,
+            'rows': self.rows,
+            'busy_seconds': self.seconds,
+            'rows_per_second': self.rows / wall_seconds if wall_seconds else None,
+        }
+
+
+def _read_file(path, nodes, start, end):
+    started = time.perf_counter()
+    chunks = list(read_price_file(path, nodes, start, end))
+    prices = pd.concat(chunks, ignore_index=True) if chunks else None
+    return prices, time.perf_counter() - started
+
+
+def _price_node(requests, node_prices):
+    started = time.perf_counter()
+    results = price_node_requests(requests, node_prices)
+    return results, time.perf_counter() - started
+
+
+async def _read_stage(paths, nodes, start, end, queue, io_pool, readers, stats):
+    """Reads files `readers` at a time and queues one (node, prices) batch per node found"""
+    loop = asyncio.get_running_loop()
+    pending = iter(paths)
+    seen = set()
+
+    async def reader():
+        for path in pending:
+            prices, seconds = await loop.run_in_executor(io_pool, _read_file, path, nodes, start, end)
+            stats.record(1, 0 if prices is None else len(prices), seconds)
+            if prices is None:
+                continue
+            for node, node_prices in prices.groupby('node', sort=False):
+                if node in seen:
+                    raise ElektraConfigError('Prices for node {0} are in more than one file'.format(node))
+                seen.add(node)
+                await queue.put((node, node_prices))
+
+    try:
+        await asyncio.gather(*(reader() for _ in range(readers)))
+    finally:
+        await queue.put(_DONE)
+
+
+async def _price_stage(spec, queue, pool, workers, writer, stats, empty_prices):
+    """Prices queued node batches on the pool, writing results as they finish"""
+    loop = asyncio.get_running_loop()
+    requests_by_node = dict(tuple(spec.groupby('node', sort=False)))
+    slots = asyncio.Semaphore(2 * workers)
+    # Every task is kept, finished or not, so a node that fails is raised by the final gather
+    tasks = []
+    errors = 0
+
+    async def price(requests, node_prices):
+        nonlocal errors
+        try:
+            results, seconds = await loop.run_in_executor(pool, _price_node, requests, node_prices)
+            stats.record(1, len(node_prices), seconds)
+            errors += int(results['error'].notna().sum())
+            writer.write(results[RESULT_COLUMNS])
+        finally:
+            slots.release()
+
+    def submit(requests, node_prices):
+        tasks.append(asyncio.ensure_future(price(requests, node_prices)))
+
+    while True:
+        batch = await queue.get()
+        if batch is _DONE:
+            break
+        node, node_prices = batch
+        await slots.acquire()
+        submit(requests_by_node.pop(node), node_prices)
+
+    # Nodes in the spec without any prices still get a row each
+    for node, requests in requests_by_node.items():
+        await slots.acquire()
+        submit(requests, empty_prices)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    return errors
+
+
+async def price_pipeline(prices_path, spec, out_path, readers=4, workers=4, queue_size=8, executor='thread'):
+    """Coroutine behind run_pipeline"""
+    if executor not in EXECUTORS:
+        raise ElektraConfigError('Executor not supported: {0}. Choose from {1}'.format(executor, ', '.join(EXECUTORS)))
+    check_frequencies(spec)
+
+    started = time.perf_counter()
+    paths = price_files(prices_path)
+    nodes = pd.unique(spec['node'])
+    start, end = spec_date_range(spec)
+    empty_prices = pd.DataFrame(columns=['flow_date', 'hour_ending', 'price', 'node'])
+
+    queue = asyncio.Queue(maxsize=queue_size)
+    read_stats, price_stats = StageStats(), StageStats()
+    writer = ResultWriter(out_path)
+    pool_type = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=readers) as io_pool, pool_type(max_workers=workers) as pool:
+        try:
+            read = asyncio.ensure_future(_read_stage(paths, nodes, start, end, queue, io_pool, readers, read_stats))
+            errors = await _price_stage(spec, queue, pool, workers, writer, price_stats, empty_prices)
+            await read
+        finally:
+            writer.close()
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'files': len(paths),
+        'rows_read': read_stats.rows,
+        'nodes': len(nodes),
+        'prices_written': writer.rows,
+        'errors': errors,
+        'read_seconds': read_stats.seconds,
+        'seconds': seconds,
+        'rows_per_second': read_stats.rows / seconds if seconds else None,
+        'prices_per_second': writer.rows / seconds if seconds else None,
+        'stages': {'read': read_stats.report(seconds), 'price': price_stats.report(seconds)},
+        # Above 1 when reading and pricing overlapped
+        'overlap': (read_stats.seconds + price_stats.seconds) / seconds if seconds else None,
+    }
+    log.info('Pipeline: {0}'.format(stats))
+    return stats
+
+
+def run_pipeline(prices_path, spec, out_path, readers=4, workers=4, queue_size=8, executor='thread'):
+    """
+    Prices every request in spec from the price files at prices_path, like run_price_batch, but reading `readers`
+    files at once and pricing up to `workers` nodes at once on a thread or process pool (executor='process').
+    At most queue_size read batches wait for pricing. Returns run_price_batch's statistics plus per-stage items,
+    rows, busy seconds and throughput, and `overlap`, the stages' busy time over the wall time.
+    """
+    return asyncio.run(price_pipeline(prices_path, spec, out_path, readers=readers, workers=workers,
+                                      queue_size=queue_size, executor=executor))
@@ -0,0 +1,209 @@
+"""
+Compact, array-backed results for bulk runs.
+
+scrub_hourly_prices returns a DataFrame of object columns per call, and translateBlocks a float DataFrame per call;
+kept by the thousand, their per-frame and per-value overhead dominates memory. The types here hold the same data in
+typed NumPy arrays and build the DataFrame only when asked:
+
+* HourlyPrices: one structured array row per hour: node code (int32), DHB (datetime64[s]), HE (int8), Required
+  (bool), Value (float64) and a Special code (int8; see SPECIALS), 23 bytes per hour
+* BlockVolumes: dates, optional hour endings and one float64 matrix of hours x out blocks
+
+scrub_hourly_array and block_volumes are the array-backed counterparts of scrub_hourly_prices and translateBlocks;
+scrub_hourly_nodes scrubs every node and day of a long frame into a single HourlyPrices. `to_frame()` gives the
+original DataFrame layout.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from elektra.exceptions import ElektraConfigError
+from elektra.hours import HOURS_PER_DAY, as_iso, hour_grid, index_prices, insufficient_data_error
+from elektra.shapes import REPEATED_HOUR, translate_volumes
+from elektra.utils import Block, Frequency
+
+log = logging.getLogger(__name__)
+
+# Values of the Special column, by code
+SPECIALS = (None, 'long')
+LONG = SPECIALS.index('long')
+
+HOURLY_DTYPE = np.dtype([('node', 'i4'), ('DHB', 'M8[s]'), ('HE', 'i1'), ('Required', '?'), ('Value', 'f8'),
+                         ('Special', 'i1')])
+
+
+class HourlyPrices:
+    """Scrubbed hourly prices as one structured array (HOURLY_DTYPE), with the node names its node codes point to"""
+
+    __slots__ = ('rows', 'nodes')
+
+    def __init__(self, rows, nodes=None):
+        self.rows = rows
+        # None for a single scrub_hourly_prices call, whose frame has no node column
+        self.nodes = nodes
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, column):
+        return self.rows[column]
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes
+
+    def node(self, name):
+        """The rows of one node"""
+        if self.nodes is None:
+            raise ElektraConfigError('Results without node names cannot be selected by node')
+        rows = self.rows[self.rows['node'] == list(self.nodes).index(name)]
+        rows['node'] = 0
+        return HourlyPrices(rows, [name])
+
+    def to_frame(self):
+        """The scrub_hourly_prices layout: DHB, HE, Required, Value and Special, after a node column if there is one"""
+        frame = pd.DataFrame({
+            'DHB': self.rows['DHB'].astype('datetime64[ns]'),
+            'HE': self.rows['HE'].astype('int64'),
+            'Required': self.rows['Required'],
+            'Value': self.rows['Value'],
+            'Special': np.array(SPECIALS, dtype=object)[self.rows['Special']],
+        })
+        if self.nodes is not None:
+            frame.insert(0, 'node', np.asarray(self.nodes, dtype=object)[self.rows['node']])
+        return frame
+
+    @classmethod
+    def concat(cls, results):
+        """One HourlyPrices of several, renumbering node codes; single-call results need their node given as nodes"""
+        nodes, parts = [], []
+        for result in results:
+            if result.nodes is None:
+                raise ElektraConfigError('Results without node names cannot be combined')
+            codes = pd.Index(nodes + [n for n in result.nodes if n not in nodes])
+            nodes = list(codes)
+            part = result.rows.copy()
+            part['node'] = codes.get_indexer(list(result.nodes))[part['node']]
+            parts.append(part)
+        return cls(np.concatenate(parts) if parts else np.empty(0, dtype=HOURLY_DTYPE), nodes)
+
+
+class BlockVolumes:
+    """translateBlocks output as arrays: dates, hour endings (hourly only) and a rows x blocks matrix of values"""
+
+    __slots__ = ('dates', 'he', 'values', 'blocks')
+
+    def __init__(self, dates, he, values, blocks):
+        self.dates = dates
+        self.he = he
+        self.values = values
+        self.blocks = list(blocks)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, block):
+        return self.values[:, self.blocks.index(block)]
+
+    @property
+    def nbytes(self):
+        return self.dates.nbytes + self.values.nbytes + (self.he.nbytes if self.he is not None else 0)
+
+    def to_frame(self):
+        """The translateBlocks layout: date (and HE, if hourly), then one column per block"""
+        frame = pd.DataFrame(self.values, columns=self.blocks)
+        if self.he is not None:
+            frame.insert(0, 'HE', self.he.astype('int64'))
+        frame.insert(0, 'date', self.dates.astype('datetime64[ns]'))
+        return frame
+
+
+def block_volumes(iso, mw, frequency, contract_start, in_block, out_blocks, out_uom, contract_end=None):
+    """translateBlocks as BlockVolumes, computed from the block masks (see elektra.shapes.translate_volumes)"""
+    dates, he, values = translate_volumes(iso, mw, frequency, contract_start, in_block, out_blocks, out_uom,
+                                          contract_end)
+    return BlockVolumes(dates.astype('datetime64[s]'), he, values, out_blocks)
+
+
+def _scrub(grid, prices, nodes, ticker, iso, errors):
+    """
+    HourlyPrices rows for every node over the grid: first the required hours in grid order, each with its first
+    price, and after each long day's HE 24, the repeated hour's second price as HE 25, like scrub_hourly_prices.
+    """
+    days = len(grid) // HOURS_PER_DAY
+    expected = grid['expected'].to_numpy()
+    offsets = ((prices['flow_date'] - grid['flow_date'].iloc[0]) // pd.Timedelta(days=1)).to_numpy()
+    he = prices['HE'].to_numpy()
+    codes = pd.Index(nodes).get_indexer(prices['node']) if 'node' in prices.columns else np.zeros(len(prices), int)
+    on_grid = (offsets >= 0) & (offsets < days) & (he >= 1) & (he <= HOURS_PER_DAY) & (codes >= 0)
+
+    # One cell per node and grid hour; rank each price within its cell, in input order
+    cells = codes[on_grid] * len(grid) + offsets[on_grid] * HOURS_PER_DAY + he[on_grid] - 1
+    values = prices['price'].to_numpy()[on_grid]
+    order = np.argsort(cells, kind='stable')
+    cells, values = cells[order], values[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(cells)) + 1] if len(cells) else np.array([], dtype='int64')
+    rank = np.arange(len(cells)) - np.repeat(starts, np.diff(np.r_[starts, len(cells)]))
+
+    found = np.bincount(cells, minlength=len(nodes) * len(grid)).reshape(len(nodes), len(grid))
+    first = np.full(len(nodes) * len(grid), np.nan)
+    second = np.full(len(nodes) * len(grid), np.nan)
+    first[cells[rank == 0]] = values[rank == 0]
+    second[cells[rank == 1]] = values[rank == 1]
+    first, second = first.reshape(len(nodes), len(grid)), second.reshape(len(nodes), len(grid))
+
+    required = expected > 0
+    bad = (found != expected[None, :]) & required[None, :]
+    if bad.any():
+        if errors == 'raise':
+            row = np.flatnonzero(bad.any(axis=1))[0]
+            raise insufficient_data_error(ticker, nodes[row], iso, Block._1x1, Frequency.Hourly,
+                                          grid.assign(found=found[row]), required)
+        first[bad] = np.nan
+        second[bad] = np.nan
+
+    # Required hours, plus a HE 25 row after HE 24 for each long day
+    hours = np.flatnonzero(required)
+    long_hours = np.flatnonzero(expected == 2)
+    positions = np.r_[hours * 2, (long_hours // HOURS_PER_DAY * HOURS_PER_DAY + HOURS_PER_DAY - 1) * 2 + 1]
+    layout = np.argsort(positions, kind='stable')
+    grid_rows = np.r_[hours, long_hours][layout]
+    repeated = np.r_[np.zeros(len(hours), bool), np.ones(len(long_hours), bool)][layout]
+
+    day_starts = grid['flow_date'].to_numpy().astype('datetime64[s]')
+    rows = np.empty(len(nodes) * len(grid_rows), dtype=HOURLY_DTYPE)
+    rows['node'] = np.repeat(np.arange(len(nodes)), len(grid_rows))
+    rows['DHB'] = np.tile(day_starts[grid_rows] + (grid['HE'].to_numpy()[grid_rows] - 1).astype('timedelta64[h]'),
+                          len(nodes))
+    rows['HE'] = np.tile(np.where(repeated, REPEATED_HOUR, grid['HE'].to_numpy()[grid_rows]), len(nodes))
+    rows['Required'] = True
+    rows['Value'] = np.where(repeated[None, :], second[:, grid_rows], first[:, grid_rows]).ravel()
+    rows['Special'] = np.tile(np.where(expected[grid_rows] == 2, LONG, 0), len(nodes))
+    return rows
+
+
+def scrub_hourly_array(flow_date, ticker, node, iso, input_prices):
+    """scrub_hourly_prices for one day, as HourlyPrices; missing or duplicated hours raise InsufficientDataError"""
+    iso = as_iso(iso)
+    prices = index_prices(input_prices).drop(columns='node', errors='ignore')
+    grid = hour_grid(flow_date, flow_date)
+    result = HourlyPrices(_scrub(grid, prices, [node], ticker, iso, 'raise'))
+    log.info('Flow Date: {0} Ticker: {1}, ISO: {2} >> {3} hourly prices'.format(flow_date, ticker, iso.value,
+                                                                                 len(result)))
+    return result
+
+
+def scrub_hourly_nodes(start, end, iso, input_prices, ticker='', errors='raise'):
+    """
+    scrub_hourly_prices for every node (the input's node column) and day from start to end, as one HourlyPrices.
+    A missing or duplicated hour raises InsufficientDataError, or with errors='coerce' leaves that hour's Value NaN.
+    """
+    iso = as_iso(iso)
+    prices = index_prices(input_prices)
+    nodes = list(pd.unique(prices['node'])) if 'node' in prices.columns else ['']
+    grid = hour_grid(start, end)
+    result = HourlyPrices(_scrub(grid, prices, nodes, ticker, iso, errors), nodes)
+    log.info('Scrubbed {0} nodes x {1} days >> {2} hourly prices ({3} bytes)'.format(
+        len(nodes), len(grid) // HOURS_PER_DAY, len(result), result.nbytes))
+    return result
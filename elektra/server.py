@@ -0,0 +1,283 @@
+"""
+Long-running local pricing service.
+
+Keeps one interpreter, with pandas imported and the holiday, DST and block calendars warm, and serves batches of
+create_prices, scrub_hourly_prices, translateBlocks and merge_block_prices calls over HTTP, on a localhost port or
+a Unix socket. Start it with `python -m elektra serve`.
+
+Every endpoint takes a POST with a JSON body, or an Arrow IPC stream if pyarrow is installed (see read_payload), and
+returns JSON:
+
+    POST /create_prices        {"prices": [...], "requests": [{"flow_date", "ticker", "node", "iso", "block",
+                                                                "frequency"}, ...]}
+    POST /scrub_hourly_prices  {"prices": [...], "requests": [{"flow_date", "ticker", "node", "iso"}, ...]}
+    POST /translate_blocks     {"requests": [{"iso", "mw", "frequency", "contract_start", "in_block", "out_blocks",
+                                              "out_uom"}, ...]}
+    POST /merge_block_prices   {"requests": [{"prices": [{"month", <block>, <block>}, ...], "iso", "to_block"}, ...]}
+    GET  /stats                request counts, errors, latency percentiles and throughput per endpoint, and
+                               shadow mode counts and timings when it is on (see elektra.shadow)
+    GET  /health
+
+Prices are records with flow_date, hour_ending and price, and an optional node column used to pick each request's
+node. A request may carry its own `prices` instead. Results come back in request order, one per request, either
+{"result": ...} or {"error": message, "type": exception name}.
+
+create_prices and translate_blocks requests go through elektra.shadow, so a sample of them can also be run on a fast
+path and compared.
+"""
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+
+import numpy as np
+import pandas as pd
+
+from elektra.elektra import scrub_hourly_prices, merge_block_prices
+from elektra.exceptions import ElektraConfigError
+from elektra.hours import dst_transition_days, compile_holidays
+from elektra import shadow
+from elektra.shadow import shadow_create_prices, shadow_translate_blocks
+from elektra.utils import Iso
+
+log = logging.getLogger(__name__)
+
+ARROW_CONTENT_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Schema metadata key holding the JSON request parameters of an Arrow payload
+ARROW_PARAMS_KEY = b'elektra'
+
+# Latencies kept per endpoint for percentiles
+LATENCY_WINDOW = 10000
+
+
+def _as_date(value):
+    return pd.to_datetime(value).to_pydatetime()
+
+
+def _records(df):
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def _scalar(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _node_prices(payload, request):
+    prices = request.get('prices', payload.get('prices'))
+    if prices is None:
+        raise ElektraConfigError('No prices for request')
+    prices = prices if isinstance(prices, pd.DataFrame) else pd.DataFrame(prices)
+    if 'node' in prices.columns and 'node' in request:
+        prices = prices[prices['node'] == request['node']]
+    # create_prices renumbers DST hours in place, so each request gets its own copy
+    return prices.reset_index(drop=True).copy()
+
+
+def _create_prices(payload, request):
+    return _scalar(shadow_create_prices(_as_date(request['flow_date']), request.get('ticker', ''),
+                                        request.get('node', ''), request['iso'], request['block'],
+                                        request['frequency'], _node_prices(payload, request)))
+
+
+def _scrub_hourly_prices(payload, request):
+    result = scrub_hourly_prices(_as_date(request['flow_date']), request.get('ticker', ''), request.get('node', ''),
+                                 request['iso'], _node_prices(payload, request))
+    return _records(result)
+
+
+def _translate_blocks(payload, request):
+    result = shadow_translate_blocks(request['iso'], request['mw'], request['frequency'],
+                                     _as_date(request['contract_start']), request['in_block'], request['out_blocks'],
+                                     request.get('out_uom', 'mwh'))
+    return _records(result)
+
+
+def _merge_block_prices(payload, request):
+    prices = pd.DataFrame(request['prices'])
+    prices = prices.set_index(pd.to_datetime(prices.pop('month')))
+    result = merge_block_prices(prices, iso=request.get('iso', 'pjm'), to_block=request.get('to_block', '7x24'))
+    return _records(result.reset_index().rename(columns={'index': 'month'}))
+
+
+ENDPOINTS = {
+    '/create_prices': _create_prices,
+    '/scrub_hourly_prices': _scrub_hourly_prices,
+    '/translate_blocks': _translate_blocks,
+    '/merge_block_prices': _merge_block_prices,
+}
+
+
+def run_batch(endpoint, payload):
+    """Runs every request of a batch payload, returning one result or error per request"""
+    handler = ENDPOINTS[endpoint]
+    results = []
+    for request in payload.get('requests', []):
+        try:
+            results.append({'result': handler(payload, request)})
+        except Exception as e:
+            log.info('{0} failed: {1}'.format(endpoint, e))
+            results.append({'error': str(e), 'type': type(e).__name__})
+    return {'results': results}
+
+
+def read_payload(body, content_type):
+    """
+    Decodes a request body. JSON bodies are used as is. An Arrow IPC stream body is a table of prices, with the rest
+    of the payload (e.g. "requests") as JSON under the b'elektra' schema metadata key.
+    """
+    if content_type == ARROW_CONTENT_TYPE:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ElektraConfigError('Arrow payloads need pyarrow installed')
+        table = pa.ipc.open_stream(body).read_all()
+        payload = json.loads((table.schema.metadata or {}).get(ARROW_PARAMS_KEY, b'{}'))
+        payload['prices'] = table.to_pandas()
+        return payload
+    return json.loads(body or b'{}')
+
+
+class ServiceStats:
+    """Thread-safe request counts, errors and latencies per endpoint"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint, seconds, items, errors):
+        with self.lock:
+            stats = self.endpoints.setdefault(endpoint, {'requests': 0, 'items': 0, 'errors': 0, 'seconds': 0.0,
+                                                         'latencies': []})
+            stats['requests'] += 1
+            stats['items'] += items
+            stats['errors'] += errors
+            stats['seconds'] += seconds
+            stats['latencies'].append(seconds)
+            del stats['latencies'][:-LATENCY_WINDOW]
+
+    def report(self):
+        with self.lock:
+            uptime = time.time() - self.started
+            report = {'uptime_seconds': uptime, 'endpoints': {}}
+            for endpoint, stats in self.endpoints.items():
+                latencies = np.array(stats['latencies'])
+                report['endpoints'][endpoint] = {
+                    'requests': stats['requests'],
+                    'items': stats['items'],
+                    'errors': stats['errors'],
+                    'mean_ms': 1000 * stats['seconds'] / stats['requests'],
+                    'p50_ms': 1000 * float(np.percentile(latencies, 50)),
+                    'p95_ms': 1000 * float(np.percentile(latencies, 95)),
+                    'max_ms': 1000 * float(latencies.max()),
+                    'items_per_second': stats['items'] / stats['seconds'] if stats['seconds'] else None,
+                    'requests_per_uptime_second': stats['requests'] / uptime,
+                }
+        if shadow.get_shadow()['fraction']:
+            report['shadow'] = shadow.stats.report()
+        return report
+
+
+class PricingRequestHandler(BaseHTTPRequestHandler):
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        log.debug(format % args)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send(200, self.server.stats.report())
+        elif self.path == '/health':
+            self._send(200, {'status': 'ok'})
+        else:
+            self._send(404, {'error': 'Not found: {0}'.format(self.path)})
+
+    def do_POST(self):
+        if self.path not in ENDPOINTS:
+            self._send(404, {'error': 'Not found: {0}'.format(self.path)})
+            return
+
+        started = time.perf_counter()
+        try:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            payload = read_payload(body, self.headers.get('Content-Type'))
+        except Exception as e:
+            self._send(400, {'error': str(e), 'type': type(e).__name__})
+            return
+
+        response = run_batch(self.path, payload)
+        errors = sum(1 for r in response['results'] if 'error' in r)
+        self.server.stats.record(self.path, time.perf_counter() - started, len(response['results']), errors)
+        self._send(200, response)
+
+
+class PricingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler=PricingRequestHandler):
+        super().__init__(address, handler)
+        self.stats = ServiceStats()
+
+
+class UnixPricingServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, handler=PricingRequestHandler):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, handler)
+        self.stats = ServiceStats()
+
+
+def warm_caches(first_year=None, last_year=None, calendar=None):
+    """
+    Compiles every ISO's holidays (for HOLIDAY_YEARS by default) and loads the DST calendar (or a calendar artifact)
+    up front, so the first request is not slow
+    """
+    if calendar is not None:
+        from elektra.artifacts import load_calendar_artifact
+        load_calendar_artifact(calendar)
+    for iso in Iso:
+        compile_holidays(first_year, last_year, iso)
+    dst_transition_days()
+
+
+def make_server(host='127.0.0.1', port=8040, unix_socket=None):
+    """Builds a PricingServer on host:port, or a UnixPricingServer if unix_socket is given"""
+    if unix_socket is not None:
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ElektraConfigError('Unix sockets are not supported on this platform')
+        return UnixPricingServer(unix_socket)
+    return PricingServer((host, port))
+
+
+def serve(host='127.0.0.1', port=8040, unix_socket=None, calendar=None, shadow_fraction=None, shadow_backend=None,
+          shadow_log=None):
+    if shadow_fraction is not None:
+        shadow.set_shadow(shadow_fraction, backend=shadow_backend, log_path=shadow_log)
+    warm_caches(calendar=calendar)
+    server = make_server(host, port, unix_socket)
+    log.info('Elektra serving on {0}'.format(unix_socket or '{0}:{1}'.format(*server.server_address[:2])))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,310 @@
+"""
+Shadow mode: runs a fast pricing path next to the legacy one on live calls and records where they disagree.
+
+For a sample of calls, shadow_create_prices and shadow_translate_blocks run both the legacy code (create_prices'
+row-by-row pandas path, translateBlocks' per-day convert loop) and a fast path (a create_prices backend from
+elektra.backends, elektra.shapes.translate_blocks_vectorized). They compare the results within a tolerance and time
+each path. The legacy result is always the one returned, and legacy errors are raised as before, so shadow mode
+never changes an answer. Each mismatch is kept with the call's full inputs, and appended as a JSON line to the
+mismatch log if one is set, so it can be rerun with replay:
+
+    set_shadow(0.05, backend='polars', log_path='/var/log/elektra/shadow.jsonl')
+    price = shadow_create_prices(flow_date, ticker, node, iso, block, frequency, input_prices)
+    ...
+    for record in read_mismatches('/var/log/elektra/shadow.jsonl'):
+        replay(record)
+
+Unsampled calls only pay for the legacy path. The pricing service uses these wrappers, so shadow mode can be turned
+on there with `elektra serve --shadow-fraction 0.05`, or the ELEKTRA_SHADOW_FRACTION, ELEKTRA_SHADOW_BACKEND and
+ELEKTRA_SHADOW_LOG environment variables.
+"""
+import os
+import json
+import time
+import random
+import logging
+import datetime as dt
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from elektra.backends import BACKENDS, load_engine
+from elektra.elektra import create_prices, translateBlocks
+from elektra.exceptions import ElektraConfigError
+from elektra.shapes import translate_blocks_vectorized
+
+log = logging.getLogger(__name__)
+
+# Recent sampled call timings and mismatches kept in memory, per function
+TIMING_WINDOW = 10000
+MISMATCH_WINDOW = 1000
+
+# Static holder for the shadow settings
+_settings = {
+    'fraction': float(os.environ.get('ELEKTRA_SHADOW_FRACTION', 0)),
+    'backend': os.environ.get('ELEKTRA_SHADOW_BACKEND', 'vectorized').lower(),
+    'rtol': 1e-9,
+    'atol': 1e-9,
+    'log_path': os.environ.get('ELEKTRA_SHADOW_LOG'),
+}
+_sampler = random.Random()
+_log_lock = threading.Lock()
+
+
+class ShadowStats:
+    """Thread-safe counts, per-call timings and mismatch records of shadowed calls, per function"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.functions = {}
+
+    def _function(self, function):
+        return self.functions.setdefault(function, {
+            'calls': 0, 'sampled': 0, 'mismatches': 0, 'fast_errors': 0,
+            'timings': deque(maxlen=TIMING_WINDOW), 'records': deque(maxlen=MISMATCH_WINDOW)})
+
+    def record_call(self, function):
+        with self.lock:
+            self._function(function)['calls'] += 1
+
+    def record_sample(self, function, legacy_seconds, fast_seconds, fast_error, mismatch=None):
+        with self.lock:
+            stats = self._function(function)
+            stats['sampled'] += 1
+            stats['fast_errors'] += int(fast_error)
+            stats['timings'].append((legacy_seconds, fast_seconds))
+            if mismatch is not None:
+                stats['mismatches'] += 1
+                stats['records'].append(mismatch)
+
+    def timings(self, function):
+        """(legacy seconds, fast seconds) of each recent sampled call"""
+        with self.lock:
+            return list(self._function(function)['timings'])
+
+    def mismatches(self, function=None):
+        with self.lock:
+            functions = [function] if function else sorted(self.functions)
+            return [r for f in functions for r in self._function(f)['records']]
+
+    def report(self):
+        with self.lock:
+            report = {}
+            for function, stats in self.functions.items():
+                timings = np.array(stats['timings']).reshape(-1, 2)
+                legacy, fast = timings.sum(axis=0) if len(timings) else (0.0, 0.0)
+                report[function] = {
+                    'calls': stats['calls'],
+                    'sampled': stats['sampled'],
+                    'mismatches': stats['mismatches'],
+                    'fast_errors': stats['fast_errors'],
+                    'legacy_mean_ms': 1000 * legacy / len(timings) if len(timings) else None,
+                    'fast_mean_ms': 1000 * fast / len(timings) if len(timings) else None,
+                    'speedup': legacy / fast if fast else None,
+                }
+            return report
+
+
+stats = ShadowStats()
+
+
+def set_shadow(fraction, backend=None, rtol=None, atol=None, log_path=None, seed=None):
+    """
+    Shadows this fraction (0 to 1) of calls, with a create_prices backend as the fast path (default: vectorized).
+    Results match when they agree within rtol and atol (default 1e-9). Mismatches are also appended to log_path.
+    Arguments left as None keep their current setting. seed makes the sample repeatable.
+    """
+    if not 0 <= fraction <= 1:
+        raise ElektraConfigError('Shadow fraction must be between 0 and 1: {0}'.format(fraction))
+    if backend is not None:
+        backend = backend.lower()
+        if backend not in BACKENDS or backend == 'pandas':
+            raise ElektraConfigError('Shadow backend not supported: {0}. Choose from {1}'.format(
+                backend, ', '.join(b for b in BACKENDS if b != 'pandas')))
+        _settings['backend'] = backend
+    _settings['fraction'] = fraction
+    _settings['rtol'] = _settings['rtol'] if rtol is None else rtol
+    _settings['atol'] = _settings['atol'] if atol is None else atol
+    _settings['log_path'] = _settings['log_path'] if log_path is None else log_path
+    if seed is not None:
+        _sampler.seed(seed)
+
+
+def get_shadow():
+    return dict(_settings)
+
+
+def _sampled():
+    fraction = _settings['fraction']
+    return fraction > 0 and (fraction >= 1 or _sampler.random() < fraction)
+
+
+def _run(function, *args, **kwargs):
+    """(result, error, seconds) of one call"""
+    started = time.perf_counter()
+    try:
+        result, error = function(*args, **kwargs), None
+    except Exception as e:
+        result, error = None, e
+    return result, error, time.perf_counter() - started
+
+
+def _outcome(result, error):
+    """JSON form of a result or error, as the pricing service returns them"""
+    if error is not None:
+        return {'error': str(error), 'type': type(error).__name__}
+    if isinstance(result, pd.DataFrame):
+        return {'result': json.loads(result.to_json(orient='records', date_format='iso'))}
+    value = float(result)
+    return {'result': None if np.isnan(value) else value}
+
+
+def _matches(legacy, legacy_error, fast, fast_error):
+    if legacy_error is not None or fast_error is not None:
+        return type(legacy_error) is type(fast_error)
+    rtol, atol = _settings['rtol'], _settings['atol']
+    if isinstance(legacy, pd.DataFrame):
+        if list(legacy.columns) != list(fast.columns) or len(legacy) != len(fast):
+            return False
+        for column in legacy.columns:
+            left, right = legacy[column].to_numpy(), fast[column].to_numpy()
+            if left.dtype.kind in 'fiu' and right.dtype.kind in 'fiu':
+                if not np.allclose(left, right, rtol=rtol, atol=atol, equal_nan=True):
+                    return False
+            elif not (left == right).all():
+                return False
+        return True
+    return bool(np.isclose(legacy, fast, rtol=rtol, atol=atol, equal_nan=True))
+
+
+def _write_mismatch(record):
+    path = _settings['log_path']
+    if not path:
+        return
+    line = json.dumps(record, default=str)
+    with _log_lock:
+        with open(path, 'a') as f:
+            f.write(line + '\n')
+
+
+def _compare(function, inputs, backend, legacy_call, fast_call):
+    """
+    Runs both paths, records the timings (and the mismatch, if any), and returns or raises the legacy outcome.
+    inputs is called for the record's inputs only on a mismatch.
+    """
+    legacy, legacy_error, legacy_seconds = _run(*legacy_call)
+    fast, fast_error, fast_seconds = _run(*fast_call)
+
+    mismatch = None
+    if not _matches(legacy, legacy_error, fast, fast_error):
+        mismatch = {
+            'function': function,
+            'time': dt.datetime.utcnow().isoformat(),
+            'backend': backend,
+            'inputs': inputs(),
+            'legacy': _outcome(legacy, legacy_error),
+            'fast': _outcome(fast, fast_error),
+            'legacy_seconds': legacy_seconds,
+            'fast_seconds': fast_seconds,
+        }
+        log.warning('Shadow mismatch in {0}: legacy {1}, {2} {3}'.format(
+            function, mismatch['legacy'], backend, mismatch['fast']))
+        _write_mismatch(mismatch)
+    stats.record_sample(function, legacy_seconds, fast_seconds, fast_error is not None and legacy_error is None,
+                        mismatch)
+
+    if legacy_error is not None:
+        raise legacy_error
+    return legacy
+
+
+def _price_inputs(flow_date, ticker, node, iso, block, frequency, input_prices):
+    return {
+        'flow_date': pd.Timestamp(flow_date).isoformat(),
+        'ticker': ticker,
+        'node': node,
+        'iso': iso,
+        'block': block,
+        'frequency': frequency,
+        'input_prices': json.loads(input_prices.to_json(orient='records', date_format='iso')),
+    }
+
+
+def shadow_create_prices(flow_date, ticker, node, iso, block, frequency, input_prices, backend=None):
+    """
+    create_prices. When the call is sampled, it is priced on the legacy pandas path, and the fast backend (default:
+    the shadow backend) prices a copy of the inputs for comparison; the pandas result is returned.
+    """
+    stats.record_call('create_prices')
+    backend = backend or _settings['backend']
+    if not _sampled() or load_engine(backend) is None:
+        return create_prices(flow_date, ticker, node, iso, block, frequency, input_prices)
+
+    # create_prices renumbers DST hours in place, so each path gets its own copy of the prices. The backends leave
+    # theirs untouched, so a mismatch record can be built from it afterwards.
+    fast_prices = input_prices.copy()
+
+    def inputs():
+        return _price_inputs(flow_date, ticker, node, iso, block, frequency, fast_prices)
+    return _compare('create_prices', inputs, backend,
+                    (create_prices, flow_date, ticker, node, iso, block, frequency, input_prices, None, 'pandas'),
+                    (create_prices, flow_date, ticker, node, iso, block, frequency, fast_prices, None, backend))
+
+
+def shadow_translate_blocks(iso, mw, frequency, contract_start, in_block, out_blocks, out_uom, contract_end=None):
+    """translateBlocks, compared against translate_blocks_vectorized when the call is sampled"""
+    stats.record_call('translateBlocks')
+    if not _sampled():
+        return translateBlocks(iso, mw, frequency, contract_start, in_block, out_blocks, out_uom, contract_end)
+
+    def inputs():
+        return {
+            'iso': iso,
+            'mw': mw,
+            'frequency': frequency,
+            'contract_start': pd.Timestamp(contract_start).isoformat(),
+            'in_block': in_block,
+            'out_blocks': list(out_blocks),
+            'out_uom': out_uom,
+            'contract_end': None if contract_end is None else pd.Timestamp(contract_end).isoformat(),
+        }
+    args = (iso, mw, frequency, contract_start, in_block, out_blocks, out_uom, contract_end)
+    return _compare('translateBlocks', inputs, 'vectorized', (translateBlocks,) + args,
+                    (translate_blocks_vectorized,) + args)
+
+
+def read_mismatches(path):
+    """Mismatch records from a shadow log, in the order they were written"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay(record, backend=None):
+    """
+    Reruns a mismatch record's call on both paths (the fast one with the record's backend, unless another is given)
+    and returns {'match', 'legacy', 'fast'}, with each outcome in the record's format.
+    """
+    inputs = record['inputs']
+    if record['function'] == 'create_prices':
+        backend = backend or record['backend']
+        flow_date = pd.Timestamp(inputs['flow_date']).to_pydatetime()
+        args = (flow_date, inputs['ticker'], inputs['node'], inputs['iso'], inputs['block'], inputs['frequency'])
+        prices = pd.DataFrame(inputs['input_prices'])
+        legacy = _run(create_prices, *args, prices.copy(), None, 'pandas')
+        fast = _run(create_prices, *args, prices.copy(), None, backend)
+    elif record['function'] == 'translateBlocks':
+        contract_end = inputs['contract_end'] and pd.Timestamp(inputs['contract_end']).to_pydatetime()
+        args = (inputs['iso'], inputs['mw'], inputs['frequency'], pd.Timestamp(inputs['contract_start']).to_pydatetime(),
+                inputs['in_block'], inputs['out_blocks'], inputs['out_uom'], contract_end)
+        legacy = _run(translateBlocks, *args)
+        fast = _run(translate_blocks_vectorized, *args)
+    else:
+        raise ElektraConfigError('Cannot replay shadow record for {0}'.format(record['function']))
+
+    return {
+        'match': _matches(legacy[0], legacy[1], fast[0], fast[1]),
+        'legacy': _outcome(legacy[0], legacy[1]),
+        'fast': _outcome(fast[0], fast[1]),
+    }
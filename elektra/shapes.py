@@ -0,0 +1,270 @@
+"""
+Hourly block shapes and shaped forward curves.
+
+Builds hour-level MW profiles for blocks straight from the vectorized calendar in elektra.hours: one float64
+matrix of hours x blocks, with 23-hour spring and 25-hour fall DST days, ready to multiply against hourly prices.
+shape_forward_curve goes the other way from merge_block_prices, spreading monthly block strips over the same hours.
+translate_hours marks the hours translateBlocks counts, with convert's day classification, for hourly translateBlocks
+and for translate_blocks_vectorized, its fast path, which sums them by day.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from elektra.core import get_iso_details
+from elektra.exceptions import ElektraConfigError
+from elektra.enums import Iso
+from elektra.hours import HOURS_PER_DAY, as_iso, as_block, hour_grid, block_mask, block_masks, is_holiday
+
+log = logging.getLogger(__name__)
+
+# Hour ending given to the second occurrence of the repeated fall DST hour, as in scrub_hourly_prices
+REPEATED_HOUR = 25
+
+# Out blocks convert supports for each in block, spelled as convert spells them; any other pair is not supported
+CONVERSIONS = {
+    '5x16': ('5x16', '7x24', '2x16', '7x8', 'Wrap'),
+    'Wrap': ('Wrap', '7x24', '5x16', '7x8', '2x16'),
+    '7x24': ('7x24', '5x16', '2x16', '7x8', 'Wrap'),
+    '2x16': ('5x16', '7x8', 'Wrap', '2x16', '7x24'),
+    '7x8': ('5x16', '2x16', '7x8', 'Wrap'),
+    '1x1': ('7x24', '5x16', '2x16', 'Wrap', '7x8'),
+    '7x16': ('5x16', '2x16', 'Wrap', '7x24', '7x8'),
+}
+
+
+def shape_hours(start, end):
+    """
+    The hours that exist from start to end, in order: one row per (flow_date, HE), without the skipped spring hour
+    and with the repeated fall hour twice, the second time as HE 25. Returns the grid rows and the (flow_date, HE)
+    index.
+    """
+    grid = hour_grid(start, end)
+    hours = grid.loc[grid.index.repeat(grid['expected'])]
+    he = hours['HE'].to_numpy().copy()
+    repeated = hours.index.duplicated(keep='first')
+    he[repeated] = REPEATED_HOUR
+    index = pd.MultiIndex.from_arrays([hours['flow_date'].to_numpy(), he], names=['flow_date', 'HE'])
+    return hours.reset_index(drop=True), index
+
+
+def hourly_shape(iso, start, end, out_blocks, mw=1.0, in_block=None):
+    """
+    MW held in each hour from start to end (inclusive dates). Without an in_block, each column is simply the out
+    block's own hours (block_mask). With one, it is a position of `mw` in in_block translated to each of out_blocks
+    as translateBlocks counts it (see translate_hours): mw in the hours that both blocks cover, 0 elsewhere.
+
+    Returns a DataFrame indexed by (flow_date, HE) with one float64 column per out block, backed by a single
+    hours x blocks array. Its values can be multiplied directly against an hourly price curve in the same hour order.
+    """
+    hours, index = shape_hours(start, end)
+    if in_block is not None:
+        matrix = translate_hours(iso, in_block, out_blocks, hours['flow_date'], hours['HE']) * float(mw)
+    else:
+        matrix = np.zeros((len(hours), len(out_blocks)), dtype='float64')
+        for i, out_block in enumerate(out_blocks):
+            matrix[:, i] = block_mask(as_block(out_block), iso, hours) * mw
+
+    log.debug('Hourly shape: {0} hours x {1} blocks'.format(len(hours), len(out_blocks)))
+    return pd.DataFrame(matrix, index=index, columns=list(out_blocks))
+
+
+def check_conversion(in_block, out_blocks):
+    """Raises ElektraConfigError, as convert does, unless in_block converts to every one of out_blocks"""
+    for out_block in out_blocks:
+        if out_block not in CONVERSIONS.get(in_block, ()):
+            log.info('Input Block: {0}, Output Block: {1}'.format(in_block, out_block))
+            raise ElektraConfigError('Conversion Not Supported!')
+
+
+def _peak_hours(iso):
+    """First and last peak HE; an ISO name convert accepts but Iso does not gets the NERC ISOs' HE 8-23"""
+    try:
+        iso = as_iso(iso)
+    except ValueError:
+        iso = Iso.PJM
+    return get_iso_details(iso)
+
+
+def _convert_hours(block, peak_day, peak_hour):
+    """The hours convert counts for an hour block, given which rows are on peak days and in peak hours"""
+    if block == '5x16':
+        return peak_day & peak_hour
+    if block == '2x16':
+        return ~peak_day & peak_hour
+    if block == '7x16':
+        return peak_hour.copy()
+    if block == '7x8':
+        return ~peak_hour
+    if block == 'Wrap':
+        return ~peak_day | ~peak_hour
+    return np.ones(len(peak_hour), dtype=bool)
+
+
+def _convert_one_hour(block, peak_day, hour):
+    """convert's 1x1 rules, by hour beginning: peak hours are 7 to 22, and 7x8 only counts off-peak days"""
+    day_hour = (hour >= 7) & (hour <= 22)
+    if block == '7x8':
+        return ~peak_day & ~day_hour
+    return _convert_hours(block, peak_day, day_hour)
+
+
+def translate_hours(iso, in_block, out_blocks, flow_dates, he):
+    """
+    Boolean rows x out blocks matrix: whether translateBlocks counts hour ending `he` of each flow date for a
+    position in in_block, for each of out_blocks. Days are classified as convert classifies them for every ISO,
+    CAISO included: peak days are weekdays that are not holidays of the ISO (NERC for ISOs without their own), and
+    unsupported block pairs raise ElektraConfigError. Hour blocks use the ISO's peak hours; a 1x1 position follows
+    convert's hour-of-day rules instead.
+    """
+    check_conversion(in_block, out_blocks)
+    flow_dates = pd.DatetimeIndex(flow_dates).normalize()
+    he = np.asarray(he)
+    peak_day = (flow_dates.weekday.to_numpy() < 5) & ~is_holiday(flow_dates.values, iso)
+
+    matrix = np.zeros((len(he), len(out_blocks)), dtype=bool)
+    if in_block == '1x1':
+        for i, out_block in enumerate(out_blocks):
+            matrix[:, i] = _convert_one_hour(out_block, peak_day, he - 1)
+        return matrix
+
+    first_peak, last_peak = _peak_hours(iso)
+    peak_hour = (he >= first_peak) & (he <= last_peak)
+    held = _convert_hours(in_block, peak_day, peak_hour)
+    for i, out_block in enumerate(out_blocks):
+        matrix[:, i] = _convert_hours(out_block, peak_day, peak_hour) & held
+    return matrix
+
+
+def translate_volumes(iso, mw, frequency, contract_start, in_block, out_blocks, out_uom, contract_end=None):
+    """
+    The arrays behind translate_blocks_vectorized: dates (datetime64, one per output row), hour endings (int8, or
+    None unless hourly) and a float64 rows x out blocks matrix of values.
+    """
+    if frequency == 'hourly':
+        shape = hourly_shape(iso, contract_start, contract_end or contract_start, out_blocks, mw=mw, in_block=in_block)
+        return (shape.index.get_level_values('flow_date').to_numpy(),
+                shape.index.get_level_values('HE').to_numpy().astype('int8'), shape.to_numpy())
+
+    contract_start = pd.Timestamp(contract_start)
+    if frequency == 'monthly':
+        contract_end = (contract_start + pd.offsets.MonthEnd(0)).normalize()
+    else:
+        contract_end = contract_start
+    dates = pd.date_range(start=contract_start, end=contract_end)
+
+    if in_block == '1x1':
+        # convert counts the one hour each date's time falls in
+        day_hours = translate_hours(iso, in_block, out_blocks, dates, dates.hour + 1).astype('float64')
+    elif len(dates):
+        grid = hour_grid(dates[0], dates[-1])
+        counted = translate_hours(iso, in_block, out_blocks, grid['flow_date'], grid['HE'].to_numpy())
+        weighted = counted * grid['expected'].to_numpy()[:, None]
+        day_hours = weighted.reshape(len(dates), HOURS_PER_DAY, len(out_blocks)).sum(axis=1).astype('float64')
+    else:
+        check_conversion(in_block, out_blocks)
+        day_hours = np.zeros((0, len(out_blocks)), dtype='float64')
+
+    if out_uom == 'MW':
+        day_hours = (day_hours != 0).astype('float64')
+    return dates.to_numpy(), None, day_hours * mw
+
+
+def translate_blocks_vectorized(iso, mw, frequency, contract_start, in_block, out_blocks, out_uom, contract_end=None):
+    """
+    translateBlocks from translate_hours instead of a per-day loop of convert calls: the same date and out block
+    columns, with each day's MWh (hours held in both blocks x mw), or mw on days with any such hours when out_uom is
+    'MW'. Hourly frequency returns hourly_shape, as translateBlocks does.
+    """
+    dates, he, values = translate_volumes(iso, mw, frequency, contract_start, in_block, out_blocks, out_uom,
+                                          contract_end)
+    result = pd.DataFrame(values, columns=list(out_blocks))
+    if he is not None:
+        result.insert(0, 'HE', he.astype('int64'))
+    result.insert(0, 'date', dates)
+    return result
+
+
+def _strip_prices(strips):
+    """(node x month x block) array of strip prices, with the nodes, months (as Periods) and blocks"""
+    blocks = [c for c in strips.columns if c != 'node']
+    months = pd.PeriodIndex(pd.to_datetime(strips.index), freq='M')
+    nodes = pd.unique(strips['node']) if 'node' in strips.columns else np.array(['price'], dtype=object)
+    node_codes = pd.Index(nodes).get_indexer(strips['node']) if 'node' in strips.columns else \
+        np.zeros(len(strips), dtype='int64')
+
+    all_months = pd.period_range(months.min(), months.max(), freq='M')
+    month_codes = all_months.get_indexer(months)
+    if pd.Series(node_codes * len(all_months) + month_codes).duplicated().any():
+        raise ElektraConfigError('Strips have more than one row for a node and month')
+
+    prices = np.full((len(nodes), len(all_months), len(blocks)), np.nan)
+    prices[node_codes, month_codes] = strips[blocks].to_numpy(dtype='float64')
+    return prices, list(nodes), all_months, [as_block(b) for b in blocks]
+
+
+def _shape_factors(shape, hours):
+    """Hourly shape factor for each hour: shape is 24 values by HE, or 12 x 24 by month of year and HE"""
+    he = hours['HE'].to_numpy()
+    if shape is None:
+        return np.ones(len(he))
+    factors = np.asarray(shape, dtype='float64')
+    if factors.shape == (HOURS_PER_DAY,):
+        factors = np.tile(factors, (12, 1))
+    if factors.shape != (12, HOURS_PER_DAY) or (factors <= 0).any():
+        raise ElektraConfigError('Shape factors must be 24 positive values by HE, or 12 x 24 by month and HE')
+    return factors[hours['flow_date'].dt.month.to_numpy() - 1, he - 1]
+
+
+def shape_forward_curve(strips, iso, frequency='hourly', shape=None, dtype='float64'):
+    """
+    Expands monthly block strips into a shaped hourly or daily curve. strips is indexed by month, like the input to
+    merge_block_prices, with one price column per block (e.g. 5x16, 2x16 and 7x8, or 5x16 and Wrap), and an
+    optional node column for a curve per node. The blocks must cover each hour of the ISO's calendar exactly once.
+
+    Each hour gets its block's strip price for the month. With shape, hourly factors (24 values by HE, or 12 x 24 by
+    month of year and HE) are scaled within each block and month, so the block's hours still average to the strip.
+    DST days have 23 and 25 hours, and holidays fall in the off-peak blocks, as for create_prices.
+
+    Returns a DataFrame with one column per node (or a single price column), indexed by (flow_date, HE) like
+    hourly_shape, with the repeated fall DST hour as HE 25, or with frequency='daily', by flow_date, holding the
+    day's average price over all of its hours. Months missing from the strips are NaN.
+    """
+    iso = as_iso(iso)
+    prices, nodes, months, blocks = _strip_prices(strips)
+    hours, index = shape_hours(months[0].start_time, months[-1].end_time)
+
+    masks = block_masks(blocks, iso, hours).to_numpy()
+    if (masks.sum(axis=1) != 1).any():
+        raise ElektraConfigError('Blocks {0} do not cover every {1} hour exactly once'.format(
+            ', '.join(b.value for b in blocks), iso.value))
+    block_ids = masks.argmax(axis=1)
+    month_ids = months.get_indexer(pd.PeriodIndex(hours['flow_date'], freq='M'))
+
+    factors = _shape_factors(shape, hours)
+    if shape is not None:
+        # Scale the factors to average 1 over each (month, block)
+        keys = month_ids * len(blocks) + block_ids
+        sums = np.bincount(keys, weights=factors, minlength=len(months) * len(blocks))
+        counts = np.bincount(keys, minlength=len(months) * len(blocks))
+        factors = factors * (counts / sums)[keys]
+
+    # One gather and broadcast: node x hour
+    curve = (prices[:, month_ids, block_ids] * factors[None, :]).astype(dtype).T
+
+    if frequency == 'hourly':
+        result = pd.DataFrame(curve, index=index, columns=nodes)
+    elif frequency == 'daily':
+        days = hours['flow_date'].to_numpy()
+        day_starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        totals = np.add.reduceat(curve.astype('float64'), day_starts, axis=0)
+        counts = np.diff(np.r_[day_starts, len(days)])
+        result = pd.DataFrame((totals / counts[:, None]).astype(dtype), columns=nodes,
+                              index=pd.DatetimeIndex(days[day_starts], name='flow_date'))
+    else:
+        raise ElektraConfigError('Frequency not supported for curve shaping: {0}'.format(frequency))
+
+    log.info('Shaped curve: {0} nodes x {1} months of {2} to {3} {4} rows'.format(
+        len(nodes), len(months), ', '.join(b.value for b in blocks), len(result), frequency))
+    return result
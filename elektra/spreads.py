@@ -0,0 +1,168 @@
+"""
+Basis and spread prices for pairs of nodes.
+
+A spread is the node's price minus its reference's (e.g. a hub's). Pricing it with two create_prices calls repeats
+the calendar and the hour lookup for each leg, and recomputes a shared reference for every node paired with it.
+Here each node and reference is laid out on the period's hour grid once, as rows of a nodes x hours matrix, and
+every pair is a join of two rows of that matrix. An hour counts only when both legs have the expected rows.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from elektra.exceptions import ElektraConfigError
+from elektra.hours import HOURS_PER_DAY, as_iso, as_block, as_frequency, period_bounds, hour_grid, block_masks, \
+    index_prices, hour_stats, insufficient_data_error
+
+log = logging.getLogger(__name__)
+
+# Basis blocks published by default
+SPREAD_BLOCKS = ['5x16', '2x16', '7x8']
+
+SPREAD_COLUMNS = ['node', 'reference', 'block', 'node_price', 'reference_price', 'spread', 'error']
+HOURLY_SPREAD_COLUMNS = ['node', 'reference', 'flow_date', 'HE', 'node_price', 'reference_price', 'spread',
+                         'complete']
+
+
+def _pair_frame(pairs):
+    pairs = pairs if isinstance(pairs, pd.DataFrame) else pd.DataFrame(list(pairs), columns=['node', 'reference'])
+    if len(pairs) == 0:
+        raise ElektraConfigError('No (node, reference) pairs given')
+    return pairs[['node', 'reference']].reset_index(drop=True)
+
+
+def leg_hours(grid, input_prices, nodes):
+    """
+    Lays the prices of each node out on the grid: a dict of (node x hour) arrays `found`, `total` and `valued`
+    (as in hour_stats) whose rows follow `nodes` and whose columns follow the grid rows. Each node is built once,
+    however many pairs it is part of.
+    """
+    prices = index_prices(input_prices)
+    if 'node' not in prices.columns:
+        raise ElektraConfigError('Spread prices need a node column')
+    return node_hours(grid, hour_stats(prices[prices['node'].isin(nodes)]), nodes)
+
+
+def node_hours(grid, stats, nodes):
+    """leg_hours from hour_stats rows that have a node column, for callers that already have them"""
+    first_day = grid['flow_date'].iloc[0]
+    offsets = ((stats['flow_date'] - first_day) // pd.Timedelta(days=1)).to_numpy()
+    he = stats['HE'].to_numpy()
+    on_grid = (offsets >= 0) & (offsets < len(grid) // HOURS_PER_DAY) & (he >= 1) & (he <= HOURS_PER_DAY)
+    rows = pd.Index(nodes).get_indexer(stats['node'])
+    on_grid &= rows >= 0
+    stats = stats[on_grid]
+    rows = rows[on_grid]
+    hours = offsets[on_grid] * HOURS_PER_DAY + he[on_grid] - 1
+
+    legs = {}
+    for column in ['found', 'total', 'valued']:
+        values = np.zeros((len(nodes), len(grid)), dtype='float64')
+        np.add.at(values, (rows, hours), stats[column].to_numpy(dtype='float64'))
+        legs[column] = values
+    legs['bad'] = legs['found'] != grid['expected'].to_numpy()[None, :]
+    return legs
+
+
+def _pair_legs(pairs):
+    nodes = list(pd.unique(pd.concat([pairs['node'], pairs['reference']])))
+    index = pd.Index(nodes)
+    return nodes, index.get_indexer(pairs['node']), index.get_indexer(pairs['reference'])
+
+
+def hourly_spreads(start, end, pairs, input_prices):
+    """
+    Hourly prices of each (node, reference) pair from start to end (inclusive dates): one row per pair per grid
+    hour with node_price, reference_price, spread (node minus reference) and complete, which is False unless both
+    legs have the expected number of rows for the hour. The repeated fall DST hour is the average of its two rows;
+    the skipped spring hour is not listed.
+    """
+    pairs = _pair_frame(pairs)
+    grid = hour_grid(start, end)
+    nodes, node_rows, reference_rows = _pair_legs(pairs)
+    legs = leg_hours(grid, input_prices, nodes)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hourly = legs['total'] / legs['valued']
+    keep = grid['expected'].to_numpy() > 0
+    node_price = hourly[node_rows][:, keep]
+    reference_price = hourly[reference_rows][:, keep]
+    complete = ~(legs['bad'][node_rows] | legs['bad'][reference_rows])[:, keep]
+
+    hours = grid[keep]
+    spreads = pd.DataFrame({
+        'node': np.repeat(pairs['node'].to_numpy(), len(hours)),
+        'reference': np.repeat(pairs['reference'].to_numpy(), len(hours)),
+        'flow_date': np.tile(hours['flow_date'].to_numpy(), len(pairs)),
+        'HE': np.tile(hours['HE'].to_numpy(), len(pairs)),
+        'node_price': node_price.ravel(),
+        'reference_price': reference_price.ravel(),
+        'spread': (node_price - reference_price).ravel(),
+        'complete': complete.ravel(),
+    })
+    return spreads[HOURLY_SPREAD_COLUMNS]
+
+
+def create_spreads(flow_date, pairs, iso, frequency, input_prices, blocks=None, errors='raise'):
+    """
+    Block spread prices for many (node, reference) pairs: for each pair and block (default: 5x16, 2x16 and 7x8),
+    the node's and the reference's block averages for the daily or monthly period of flow_date, as create_prices
+    gives them, and spread = node_price - reference_price.
+
+    pairs is a list of (node, reference) tuples or a DataFrame with node and reference columns; input_prices has a
+    node column covering both legs. Completeness is checked for both legs together: if either leg has a missing or
+    duplicated hour in a block, InsufficientDataError is raised for it, or with errors='coerce' the pair's prices
+    for that block are NaN and the error message is kept in the error column. Blocks with no hours in the period
+    (e.g. 5x16 on a Saturday) are NaN with the error 'No relevant hours'.
+    """
+    iso = as_iso(iso)
+    frequency = as_frequency(frequency)
+    blocks = [as_block(b) for b in (blocks or SPREAD_BLOCKS)]
+    pairs = _pair_frame(pairs)
+
+    start, end = period_bounds(flow_date, frequency)
+    grid = hour_grid(start, end)
+    masks = block_masks(blocks, iso, grid).to_numpy(dtype='float64')
+    nodes, node_rows, reference_rows = _pair_legs(pairs)
+    legs = leg_hours(grid, input_prices, nodes)
+
+    # node x block reductions, computed once per node and gathered for each pair
+    total = legs['total'] @ masks
+    valued = legs['valued'] @ masks
+    required = masks.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        averages = total / np.where(valued > 0, valued, np.nan)
+    bad = (legs['bad'].astype('float64') @ masks) > 0
+    pair_bad = bad[node_rows] | bad[reference_rows]
+
+    spreads = pd.DataFrame({
+        'node': np.repeat(pairs['node'].to_numpy(), len(blocks)),
+        'reference': np.repeat(pairs['reference'].to_numpy(), len(blocks)),
+        'block': np.tile([b.value for b in blocks], len(pairs)),
+        'node_price': averages[node_rows].ravel(),
+        'reference_price': averages[reference_rows].ravel(),
+        'error': None,
+    })
+    broken = pair_bad.ravel()
+    no_hours = np.tile(required == 0, len(pairs)) & ~broken
+
+    for position in np.flatnonzero(broken):
+        pair, b = divmod(position, len(blocks))
+        for leg_row in (node_rows[pair], reference_rows[pair]):
+            if bad[leg_row, b]:
+                leg_grid = grid.assign(found=legs['found'][leg_row].astype('int64'))
+                error = insufficient_data_error('', nodes[leg_row], iso, blocks[b], frequency, leg_grid,
+                                                masks[:, b].astype(bool))
+                if errors == 'raise':
+                    raise error
+                spreads.at[position, 'error'] = str(error)
+                break
+
+    spreads.loc[no_hours, 'error'] = 'No relevant hours'
+    spreads.loc[broken | no_hours, ['node_price', 'reference_price']] = np.nan
+    spreads['spread'] = spreads['node_price'] - spreads['reference_price']
+
+    log.info('Spreads: {0:%Y-%m-%d} ISO: {1}, {2} >> {3} pairs x {4} blocks from {5} nodes'.format(
+        flow_date, iso.value, frequency.value, len(pairs), len(blocks), len(nodes)))
+    return spreads[SPREAD_COLUMNS]
@@ -0,0 +1,188 @@
+"""
+Local store of hourly prices, partitioned by ISO, node and month.
+
+Each partition is a directory <iso>/<node>/<YYYY-MM> holding two .npy files: rows.npy, the month's prices as
+(hour, price) records where hour is the grid hour of the month ((day - 1) * 24 + HE - 1), and found.npy, the number of
+rows stored for each grid hour. Reads memory-map only the months they need and return prices in the create_prices
+input format. found.npy doubles as an index of which hours are present, so completeness checks never load prices.
+
+    store = PriceStore('/var/lib/elektra/prices')
+    store.write_prices('pjm', lmps)                    # lmps has node, flow_date, hour_ending and price columns
+    store.write_prices('pjm', restated, mode='upsert')
+    prices = store.read_prices('pjm', 'WESTERN HUB', '2020-10-01', '2020-10-31')
+
+Hour endings are stored as create_prices normalizes them: the spring DST day has no HE 3 and the fall DST day has two
+rows for HE 2. The store expects a single writer at a time.
+"""
+import os
+import logging
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+from elektra.core import fdom, ldom
+from elektra.exceptions import ElektraConfigError
+from elektra.hours import HOURS_PER_DAY, as_iso, as_block, hour_grid, block_mask, index_prices
+
+log = logging.getLogger(__name__)
+
+ROW_DTYPE = np.dtype([('hour', 'int16'), ('price', 'float64')])
+WRITE_MODES = ['append', 'upsert']
+
+
+def _month_hours(month):
+    return month.days_in_month * HOURS_PER_DAY
+
+
+def _node_dir(node):
+    """
+    Directory name of a node: percent-encoded, since node names may hold characters that are not safe in file names
+    (e.g. '/'), with a leading '.' encoded too, so '.' and '..' stay inside the ISO's directory
+    """
+    name = quote(str(node), safe='')
+    if not name:
+        raise ElektraConfigError('Node names cannot be empty')
+    return '%2E' + name[1:] if name.startswith('.') else name
+
+
+class PriceStore:
+    """Hourly prices on disk under path, one partition per (ISO, node, month)"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def partition_path(self, iso, node, month):
+        return os.path.join(self.path, as_iso(iso).value, _node_dir(node), str(month))
+
+    def nodes(self, iso):
+        iso_path = os.path.join(self.path, as_iso(iso).value)
+        return sorted(unquote(n) for n in os.listdir(iso_path)) if os.path.isdir(iso_path) else []
+
+    def months(self, iso, node):
+        node_path = os.path.join(self.path, as_iso(iso).value, _node_dir(node))
+        if not os.path.isdir(node_path):
+            return []
+        return sorted(pd.Period(m, 'M') for m in os.listdir(node_path)
+                      if os.path.exists(os.path.join(node_path, m, 'found.npy')))
+
+    def _load(self, iso, node, month, name):
+        path = os.path.join(self.partition_path(iso, node, month), name)
+        return np.load(path, mmap_mode='r') if os.path.exists(path) else None
+
+    def _save(self, iso, node, month, rows, found):
+        path = self.partition_path(iso, node, month)
+        os.makedirs(path, exist_ok=True)
+        # Write both files aside, then swap them in, the index last
+        for name, values in (('rows.npy', rows), ('found.npy', found)):
+            with open(os.path.join(path, name + '.tmp'), 'wb') as f:
+                np.save(f, values)
+        for name in ('rows.npy', 'found.npy'):
+            os.replace(os.path.join(path, name + '.tmp'), os.path.join(path, name))
+
+    def write_prices(self, iso, input_prices, node=None, mode='append'):
+        """
+        Stores hourly prices (flow_date, hour_ending, price, and a node column unless node is given). With
+        mode='append', writing an hour that is already stored raises ElektraConfigError; with mode='upsert', the
+        stored rows of every hour in input_prices are replaced, so a restated day or hour can be rewritten alone.
+        Returns the number of partitions written.
+        """
+        if mode not in WRITE_MODES:
+            raise ElektraConfigError('Write mode not supported: {0}. Choose from {1}'.format(
+                mode, ', '.join(WRITE_MODES)))
+        prices = index_prices(input_prices if node is None else input_prices.assign(node=node))
+        if 'node' not in prices.columns:
+            raise ElektraConfigError('Prices need a node column, or a node to store them under')
+        bad_he = (prices['HE'] < 1) | (prices['HE'] > HOURS_PER_DAY)
+        if bad_he.any():
+            raise ElektraConfigError('Hour endings must be 1 to 24; got {0}'.format(prices.loc[bad_he, 'HE'].iloc[0]))
+
+        prices['month'] = prices['flow_date'].dt.to_period('M')
+        prices['hour'] = (prices['flow_date'].dt.day - 1) * HOURS_PER_DAY + prices['HE'] - 1
+
+        written = 0
+        for (node_name, month), group in prices.groupby(['node', 'month'], sort=False):
+            new_rows = np.empty(len(group), dtype=ROW_DTYPE)
+            new_rows['hour'] = group['hour'].to_numpy()
+            new_rows['price'] = group['price'].to_numpy()
+            new_hours = np.unique(new_rows['hour'])
+
+            rows = self._load(iso, node_name, month, 'rows.npy')
+            found = self._load(iso, node_name, month, 'found.npy')
+            if rows is None:
+                rows = np.empty(0, dtype=ROW_DTYPE)
+                found = np.zeros(_month_hours(month), dtype='uint8')
+            elif mode == 'append' and found[new_hours].any():
+                hour = new_hours[np.flatnonzero(found[new_hours])[0]]
+                raise ElektraConfigError(
+                    'Prices for {0} {1:%Y-%m-%d} HE {2} are already stored; use mode="upsert" to restate them'.format(
+                        node_name, month.to_timestamp() + pd.Timedelta(days=int(hour) // HOURS_PER_DAY),
+                        int(hour) % HOURS_PER_DAY + 1))
+
+            kept = np.asarray(rows)[~np.isin(rows['hour'], new_hours)]
+            rows = np.concatenate([kept, new_rows])
+            rows = rows[np.argsort(rows['hour'], kind='stable')]
+            found = np.bincount(rows['hour'], minlength=_month_hours(month)).astype('uint8')
+            self._save(iso, node_name, month, rows, found)
+            written += 1
+
+        log.info('Price store: {0} rows written to {1} partitions ({2})'.format(len(prices), written, mode))
+        return written
+
+    def _months_between(self, start, end):
+        return pd.period_range(pd.Timestamp(start), pd.Timestamp(end), freq='M')
+
+    def read_prices(self, iso, node, start, end):
+        """
+        Prices for one node from start to end (inclusive dates), read from only the months they fall in, as a
+        DataFrame of flow_date (YYYY-MM-DD), hour_ending and price ready for create_prices.
+        """
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        frames = []
+        for month in self._months_between(start, end):
+            rows = self._load(iso, node, month, 'rows.npy')
+            if rows is None:
+                continue
+            days = month.to_timestamp().to_datetime64().astype('datetime64[D]') + \
+                (rows['hour'] // HOURS_PER_DAY).astype('timedelta64[D]')
+            keep = (days >= start.to_datetime64()) & (days <= end.to_datetime64())
+            frames.append(pd.DataFrame({
+                'flow_date': np.datetime_as_string(days[keep], unit='D'),
+                'hour_ending': (rows['hour'][keep] % HOURS_PER_DAY + 1).astype('float64'),
+                'price': rows['price'][keep],
+            }))
+        if not frames:
+            return pd.DataFrame({'flow_date': pd.Series(dtype='str'), 'hour_ending': pd.Series(dtype='float64'),
+                                 'price': pd.Series(dtype='float64')})
+        return pd.concat(frames, ignore_index=True)
+
+    def hour_index(self, iso, node, start, end):
+        """
+        The hour grid from start to end (flow_date, HE, expected) with `found`, the number of stored rows for each
+        hour, read from the partition indexes alone.
+        """
+        grid = hour_grid(start, end)
+        found = np.zeros(len(grid), dtype='int64')
+        first_day = grid['flow_date'].iloc[0]
+        for month in self._months_between(fdom(grid['flow_date'].iloc[0]), ldom(grid['flow_date'].iloc[-1])):
+            month_found = self._load(iso, node, month, 'found.npy')
+            if month_found is None:
+                continue
+            month_start = month.to_timestamp()
+            offset = (month_start - first_day).days * HOURS_PER_DAY
+            first, last = max(offset, 0), min(offset + len(month_found), len(grid))
+            found[first:last] = month_found[first - offset:last - offset]
+        grid['found'] = found
+        return grid
+
+    def missing_hours(self, iso, node, start, end, block=None):
+        """
+        Hours from start to end (in block, if given) whose stored row count is not the expected one, as rows of
+        flow_date, HE, expected and found. Empty when the node's prices are complete.
+        """
+        grid = self.hour_index(iso, node, start, end)
+        bad = grid['found'].to_numpy() != grid['expected'].to_numpy()
+        if block is not None:
+            bad &= block_mask(as_block(block), as_iso(iso), grid)
+        return grid[bad].reset_index(drop=True)
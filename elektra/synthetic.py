@@ -0,0 +1,103 @@
+"""
+Synthetic hourly LMPs for load tests and benchmarks.
+
+synthetic_prices builds multi-year, multi-node price frames in the format create_prices and the bulk functions take,
+straight from the vectorized calendar: 23 rows on the spring DST day (HE 1, 2, 4..24), 25 on the fall DST day (HE 1,
+2, 2, 3..24), and lower prices on weekends and NERC holidays. Missing and duplicated hours can be injected at given
+rates. The same seed always gives the same frame.
+
+    prices = synthetic_prices('2023-01-01', '2023-12-31', nodes=5000, seed=7)
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from elektra.hours import hour_grid, holiday_days
+
+log = logging.getLogger(__name__)
+
+ISSUE_COLUMNS = ['node', 'flow_date', 'HE', 'issue']
+
+
+def _node_names(nodes):
+    if isinstance(nodes, (int, np.integer)):
+        return np.array(['NODE{0:0{1}d}'.format(i, len(str(nodes - 1))) for i in range(nodes)], dtype=object)
+    return np.asarray(list(nodes), dtype=object)
+
+
+def _hour_shape(he, off_peak):
+    """Daily load shape: overnight trough, afternoon peak, flattened on weekends and holidays"""
+    shape = np.cos((he - 17) * np.pi / 12)
+    return np.where(off_peak, 0.5 * shape - 0.3, shape)
+
+
+def _day_labels(days):
+    """YYYY-MM-DD labels of the distinct days, and each row's position among them"""
+    unique_days, codes = np.unique(days, return_inverse=True)
+    return np.datetime_as_string(unique_days, unit='D').astype(object), codes
+
+
+def synthetic_prices(start, end, nodes=1, seed=None, base=35.0, spread=10.0, noise=3.0, gaps=0.0, duplicates=0.0,
+                     categorical=False, return_issues=False):
+    """
+    Hourly prices for every node from start to end (inclusive dates), with node, flow_date (YYYY-MM-DD),
+    hour_ending and price columns, ordered by node, flow_date and hour ending. nodes is a count (named NODE0,
+    NODE1, ..., zero-padded to the same width) or a list of names.
+
+    Each node gets its own level around `base` and a daily shape `spread` $/MWh deep, plus normal noise with
+    standard deviation `noise`. gaps and duplicates are the fractions of hourly rows dropped and sent twice.
+    categorical=True stores node and flow_date as categoricals, which keeps frames of tens of millions of rows
+    small. With return_issues=True, also returns the injected rows as (node, flow_date, HE, issue) with issue
+    'missing' or 'duplicate'.
+    """
+    rng = np.random.default_rng(seed)
+    names = _node_names(nodes)
+    grid = hour_grid(start, end)
+    hours = grid.loc[grid.index.repeat(grid['expected'])].reset_index(drop=True)
+
+    days = hours['flow_date'].to_numpy()
+    he = hours['HE'].to_numpy()
+    first_year, last_year = pd.Timestamp(days[0]).year, pd.Timestamp(days[-1]).year
+    off_peak = (hours['flow_date'].dt.dayofweek.to_numpy() >= 5) | np.isin(days, holiday_days(first_year, last_year))
+    shape = _hour_shape(he, off_peak)
+
+    # node x hour prices, built as one matrix
+    levels = base * rng.lognormal(0.0, 0.25, size=len(names))
+    depths = spread * rng.uniform(0.5, 1.5, size=len(names))
+    prices = levels[:, None] + depths[:, None] * shape[None, :] + rng.normal(0.0, noise, size=(len(names), len(he)))
+
+    rows = np.arange(prices.size)
+    missing = rng.random(prices.size) < gaps if gaps else np.zeros(prices.size, dtype=bool)
+    repeated = (rng.random(prices.size) < duplicates) & ~missing if duplicates else np.zeros(prices.size, dtype=bool)
+    rows = np.sort(np.concatenate([rows[~missing], rows[repeated]]), kind='stable')
+
+    node_of_row = rows // len(he)
+    hour_of_row = rows % len(he)
+    day_labels, day_codes = _day_labels(days)
+    if categorical:
+        node_column = pd.Categorical.from_codes(node_of_row, categories=pd.unique(names))
+        date_column = pd.Categorical.from_codes(day_codes[hour_of_row], categories=day_labels)
+    else:
+        node_column = names[node_of_row]
+        date_column = day_labels[day_codes[hour_of_row]]
+    frame = pd.DataFrame({
+        'node': node_column,
+        'flow_date': date_column,
+        'hour_ending': he[hour_of_row].astype('float64'),
+        'price': prices.ravel()[rows].round(2),
+    })
+    log.info('Synthetic prices: {0} nodes x {1} hours = {2} rows ({3} missing, {4} duplicated)'.format(
+        len(names), len(he), len(frame), missing.sum(), repeated.sum()))
+
+    if not return_issues:
+        return frame
+    issue_rows = np.concatenate([np.flatnonzero(missing), np.flatnonzero(repeated)])
+    issues = pd.DataFrame({
+        'node': names[issue_rows // len(he)],
+        'flow_date': days[issue_rows % len(he)],
+        'HE': he[issue_rows % len(he)],
+        'issue': np.repeat(['missing', 'duplicate'], [missing.sum(), repeated.sum()]),
+    })
+    return frame, issues[ISSUE_COLUMNS].sort_values(['node', 'flow_date', 'HE'], kind='stable').reset_index(drop=True)
+
@@ -0,0 +1,155 @@
+"""
+Mark-to-market valuation of block positions.
+
+value_deals values a table of deals against hourly LMPs or block prices over the shared calendar in elektra.hours.
+Block hours and hourly price sums are reduced once per (ISO, node, block, day), and deals are joined to them as
+day rows, so thousands of deals over multi-year tenors need no per-deal or per-day loops.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from elektra.exceptions import ElektraConfigError
+from elektra.hours import HOURS_PER_DAY, as_iso, as_block, hour_grid, block_masks, index_prices, hour_stats
+
+log = logging.getLogger(__name__)
+
+DEAL_COLUMNS = ['mw', 'block', 'iso', 'node', 'start', 'end', 'fixed_price']
+VALUE_COLUMNS = ['deal', 'node', 'iso', 'block', 'flow_date', 'mwh', 'market_price', 'fixed_price', 'value',
+                 'complete']
+
+
+def block_day_hours(iso, blocks, grid):
+    """Hours of each block on each grid day, counting the repeated fall DST hour twice, as a day x block DataFrame"""
+    masks = block_masks(blocks, iso, grid)
+    weighted = masks.to_numpy() * grid['expected'].to_numpy()[:, None]
+    days = len(grid) // HOURS_PER_DAY
+    hours = weighted.reshape(days, HOURS_PER_DAY, len(blocks)).sum(axis=1)
+    return pd.DataFrame(hours, index=grid['flow_date'].to_numpy()[::HOURS_PER_DAY], columns=masks.columns), masks
+
+
+def _deal_days(deals):
+    """One row per deal per flow date from start to end"""
+    starts = pd.to_datetime(deals['start']).dt.normalize().to_numpy()
+    ends = pd.to_datetime(deals['end']).dt.normalize().to_numpy()
+    days = ((ends - starts) // np.timedelta64(1, 'D')).astype('int64') + 1
+    if (days < 1).any():
+        raise ElektraConfigError('Deals must end on or after their start')
+
+    rows = deals.loc[deals.index.repeat(days)].reset_index(drop=True)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(days) - days, days)
+    rows['flow_date'] = np.repeat(starts, days) + offsets.astype('timedelta64[D]')
+    return rows
+
+
+def _hourly_sums(grid, masks, prices):
+    """Sum of hourly prices and number of priced rows per (node, flow_date, block), in long format"""
+    stats = hour_stats(prices)
+    first_day = grid['flow_date'].iloc[0]
+    offsets = ((stats['flow_date'] - first_day) // pd.Timedelta(days=1)).to_numpy()
+    he = stats['HE'].to_numpy()
+    on_grid = (offsets >= 0) & (offsets < len(grid) // HOURS_PER_DAY) & (he >= 1) & (he <= HOURS_PER_DAY)
+    stats = stats[on_grid]
+    if stats.empty:
+        return pd.DataFrame(columns=['node', 'flow_date', 'block', 'price_total', 'found', 'valued'])
+    rows = offsets[on_grid] * HOURS_PER_DAY + he[on_grid] - 1
+
+    hour_masks = masks.to_numpy()[rows]
+    sums = pd.DataFrame(hour_masks * stats['total'].to_numpy()[:, None], columns=masks.columns)
+    found = pd.DataFrame(hour_masks * stats['found'].to_numpy()[:, None], columns=masks.columns)
+    valued = pd.DataFrame(hour_masks * stats['valued'].to_numpy()[:, None], columns=masks.columns)
+    keys = [stats['node'].to_numpy(), stats['flow_date'].to_numpy()]
+
+    sums = sums.groupby(keys).sum().stack().rename('price_total')
+    found = found.groupby(keys).sum().stack().rename('found')
+    valued = valued.groupby(keys).sum().stack().rename('valued')
+    long = pd.concat([sums, found, valued], axis=1)
+    long.index.names = ['node', 'flow_date', 'block']
+    return long.reset_index()
+
+
+def value_deals(deals, hourly_prices=None, block_prices=None, grain='daily'):
+    """
+    Values block positions: value = mwh x (market price - fixed price) at daily or monthly grain.
+
+    deals has mw, block, iso, node, start, end (inclusive flow dates) and fixed_price columns, and an optional deal
+    column to identify them (default: the row index). Prices come from one of:
+
+    * hourly_prices: LMPs with node, flow_date, hour_ending and price columns, as for create_prices. The market
+      value is the sum of the block's hourly prices, so it is exact on DST days.
+    * block_prices: node, block, flow_date and price columns, with one price per day, or a month column instead of
+      flow_date for monthly block prices, which apply to every day of their month.
+
+    Returns one row per deal per day (or month): deal, node, iso, block, flow_date (the first of the month at monthly
+    grain), mwh, market_price (the volume-weighted average), fixed_price, value, and complete. complete is False
+    where hourly prices are missing; market_price and value are NaN there.
+    """
+    if (hourly_prices is None) == (block_prices is None):
+        raise ElektraConfigError('value_deals needs exactly one of hourly_prices or block_prices')
+    missing = [c for c in DEAL_COLUMNS if c not in deals.columns]
+    if missing:
+        raise ElektraConfigError('Deals are missing columns: {0}'.format(', '.join(missing)))
+
+    deals = deals.assign(
+        deal=deals['deal'] if 'deal' in deals.columns else deals.index,
+        iso=[as_iso(i).value for i in deals['iso']],
+        block=[as_block(b).value for b in deals['block']],
+    )
+    days = _deal_days(deals)
+    grid = hour_grid(days['flow_date'].min(), days['flow_date'].max())
+
+    if hourly_prices is not None:
+        prices = index_prices(hourly_prices)
+        if 'node' not in prices.columns:
+            raise ElektraConfigError('hourly_prices needs a node column')
+        prices = prices[prices['node'].isin(pd.unique(deals['node']))]
+
+    parts = []
+    for iso, iso_days in days.groupby('iso', sort=False):
+        blocks = list(pd.unique(iso_days['block']))
+        day_hours, masks = block_day_hours(iso, blocks, grid)
+        day_hours = day_hours.stack().rename('hours').rename_axis(['flow_date', 'block']).reset_index()
+        iso_days = iso_days.merge(day_hours, how='left', on=['flow_date', 'block'])
+
+        if hourly_prices is not None:
+            sums = _hourly_sums(grid, masks, prices)
+            iso_days = iso_days.merge(sums, how='left', on=['node', 'flow_date', 'block'])
+            iso_days['found'] = iso_days['found'].fillna(0)
+            iso_days['complete'] = iso_days['found'].to_numpy() == iso_days['hours'].to_numpy()
+            iso_days['market_price'] = iso_days['price_total'] / iso_days['valued']
+        parts.append(iso_days)
+    days = pd.concat(parts, ignore_index=True)
+
+    if block_prices is not None:
+        quotes = block_prices.assign(block=[as_block(b).value for b in block_prices['block']])
+        if 'month' in quotes.columns:
+            quotes['month'] = pd.to_datetime(quotes['month']).dt.to_period('M')
+            keys = ['node', 'block', 'month']
+            days['month'] = days['flow_date'].dt.to_period('M')
+        else:
+            quotes['flow_date'] = pd.to_datetime(quotes['flow_date']).dt.normalize()
+            keys = ['node', 'block', 'flow_date']
+        days = days.merge(quotes[keys + ['price']].rename(columns={'price': 'market_price'}), how='left', on=keys)
+        days['complete'] = days['market_price'].notna()
+
+    days['mwh'] = days['mw'] * days['hours']
+    days['market_price'] = days['market_price'].where(days['complete'] & (days['hours'] > 0))
+    days['value'] = days['mwh'] * (days['market_price'] - days['fixed_price'])
+    days.loc[days['hours'] == 0, 'value'] = 0.0
+    days['complete'] = days['complete'] | (days['hours'] == 0)
+
+    if grain == 'monthly':
+        days['flow_date'] = days['flow_date'].dt.to_period('M').dt.to_timestamp()
+        days['market_mwh'] = days['mwh'] * days['market_price']
+        months = days.groupby(['deal', 'node', 'iso', 'block', 'flow_date', 'fixed_price'], sort=False).agg(
+            mwh=('mwh', 'sum'), market_mwh=('market_mwh', 'sum'), value=('value', 'sum'),
+            complete=('complete', 'all')).reset_index()
+        months['market_price'] = months['market_mwh'] / months['mwh'].where(months['mwh'] > 0)
+        months.loc[~months['complete'], ['market_price', 'value']] = np.nan
+        days = months
+    elif grain != 'daily':
+        raise ElektraConfigError('Grain not supported: {0}'.format(grain))
+
+    log.info('Valued {0} deals over {1} {2} rows'.format(len(deals), len(days), grain))
+    return days[VALUE_COLUMNS].sort_values(['deal', 'flow_date'], kind='stable').reset_index(drop=True)
@@ -23,5 +23,14 @@ setuptools.setup(
     install_requires=[
      "pandas",
      "numpy"
-    ]
+    ],
+    extras_require={
+        "polars": ["polars"],
+        "arrow": ["pyarrow"],
+    },
+    entry_points={
+        "console_scripts": [
+            "elektra=elektra.cli:main",
+        ],
+    }
 )
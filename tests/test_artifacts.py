@@ -0,0 +1,83 @@
+import os
+import json
+import tempfile
+import unittest
+import datetime as dt
+import numpy as np
+import elektra
+from elektra import core, hours
+from elektra.artifacts import build_calendar_artifact, load_calendar_artifact, unload_calendar_artifact, \
+    CalendarArtifact
+
+
+class CalendarArtifactTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = build_calendar_artifact(os.path.join(self.tmp.name, 'calendar'), 2024, 2024,
+                                            isos=['pjm', 'caiso'])
+
+    def tearDown(self):
+        unload_calendar_artifact()
+        self.tmp.cleanup()
+
+    def test_masks_match_calendar(self):
+        grid = hours.hour_grid('2024-03-01', '2024-11-30')
+        built = hours.block_masks(hours.PRICED_BLOCKS, 'caiso', grid)
+
+        artifact = load_calendar_artifact(self.path)
+        self.assertIsInstance(artifact.masks['caiso'], np.memmap)
+        loaded_grid = hours.hour_grid('2024-03-01', '2024-11-30')
+        loaded = hours.block_masks(hours.PRICED_BLOCKS, 'caiso', loaded_grid)
+
+        self.assertTrue((loaded_grid == grid).all().all())
+        self.assertTrue((loaded == built).all().all())
+
+    def test_day_hours(self):
+        artifact = load_calendar_artifact(self.path)
+        day_hours = artifact.day_hours(elektra.utils.Iso.PJM, elektra.utils.Block._7x24, '2024-11-02', '2024-11-04')
+        self.assertEqual(day_hours.tolist(), [24, 25, 24])
+
+    def test_outside_range_falls_back(self):
+        load_calendar_artifact(self.path)
+        grid = hours.hour_grid('2023-12-31', '2024-01-01')
+        self.assertEqual(hours.block_mask('7x24', 'miso', grid).sum(), 48)
+
+    def test_version_mismatch(self):
+        manifest_path = os.path.join(self.path, 'manifest.json')
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        manifest['version'] = -1
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+
+        with self.assertRaises(elektra.exceptions.ElektraConfigError):
+            CalendarArtifact(self.path)
+
+    def test_holiday_rules_mismatch(self):
+        rules, isos = dict(core.HOLIDAY_RULES), dict(core.ISO_HOLIDAYS)
+        grid = hours.hour_grid('2024-03-04', '2024-03-04')
+        try:
+            artifact = load_calendar_artifact(self.path)
+            self.assertTrue(hours.block_mask('5x16', 'pjm', grid).any())
+
+            # Rules registered after loading: the artifact's PJM masks are no longer used
+            core.register_holidays('pjm', core.HOLIDAY_RULES['nerc'] + (lambda year: dt.date(year, 3, 4),),
+                                   isos=['pjm'])
+            self.assertFalse(artifact.covers(grid['flow_date'], elektra.Iso.PJM))
+            self.assertFalse(hours.block_mask('5x16', 'pjm', grid).any())
+            self.assertTrue(artifact.covers(grid['flow_date'], elektra.Iso.CAISO))
+
+            # Rules registered before loading: the artifact is refused
+            unload_calendar_artifact()
+            with self.assertRaises(elektra.exceptions.ElektraConfigError):
+                load_calendar_artifact(self.path)
+        finally:
+            core.HOLIDAY_RULES.clear()
+            core.HOLIDAY_RULES.update(rules)
+            core.ISO_HOLIDAYS.clear()
+            core.ISO_HOLIDAYS.update(isos)
+        self.assertTrue(load_calendar_artifact(self.path).covers(grid['flow_date'], elektra.Iso.PJM))
+
+
+if __name__ == '__main__':
+    unittest.main()
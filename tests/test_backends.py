@@ -0,0 +1,97 @@
+import sys
+import json
+import unittest
+import importlib.util
+import datetime as dt
+from unittest import mock
+import pandas as pd
+import elektra
+from elektra import backends
+from tests.test_cube import month_of_prices
+
+
+class BackendTests(unittest.TestCase):
+    def setUp(self):
+        self.month = month_of_prices('2024-11-01', '2024-11-30')
+        with open('tests/consecutive_dst_begin_data.json') as f:
+            self.short_day = pd.DataFrame(json.loads(f.read())['data'])
+
+    def test_backends_match_pandas(self):
+        cases = [
+            (dt.datetime(2024, 11, 3), 'spp', 'wrap', 'daily', self.month),
+            (dt.datetime(2024, 11, 12), 'pjm', '5x16', 'monthly', self.month),
+            (dt.datetime(2024, 11, 12), 'caiso', '6x16', 'daily', self.month),
+            (dt.datetime(2024, 3, 10), 'isone', '7x24', 'daily', self.short_day),
+            (dt.datetime(2020, 10, 17), 'miso', '2x16', 'daily', pd.read_csv('tests/created_prices.csv')),
+        ]
+        for flow_date, iso, block, frequency, prices in cases:
+            expected = elektra.create_prices(flow_date, 'T', 'N', iso, block, frequency, prices.copy())
+            for backend in ['vectorized', 'polars', 'arrow']:
+                if backend != 'vectorized' and backends.load_engine(backend) is None:
+                    continue
+                price = elektra.create_prices(flow_date, 'T', 'N', iso, block, frequency, prices.copy(),
+                                              backend=backend)
+                self.assertAlmostEqual(price, expected, places=9, msg=f'{backend} {iso} {block} {flow_date}')
+
+    def test_monthly_dst_renumbering_matches_pandas(self):
+        # The short day sent as 1..23 inside a month: create_prices only renumbers a whole input of 23 hours
+        prices = month_of_prices('2024-03-01', '2024-03-31')
+        short_day = prices['flow_date'] == '2024-03-10'
+        prices.loc[short_day, 'hour_ending'] = range(1, 24)
+        flow_date = dt.datetime(2024, 3, 10)
+        for backend in ['pandas', 'vectorized', 'polars', 'arrow']:
+            for block in ['7x24', '7x8']:
+                with self.assertRaises(elektra.exceptions.InsufficientDataError, msg=f'{backend} {block}') as e:
+                    elektra.create_prices(flow_date, 'T', 'N', 'pjm', block, 'monthly', prices.copy(),
+                                          backend=backend)
+                self.assertIn('2024-03-10 HE 24. Expected: 1; Got: 0', str(e.exception), msg=backend)
+            price = elektra.create_prices(flow_date, 'T', 'N', 'pjm', '2x16', 'monthly', prices.copy(),
+                                          backend=backend)
+            self.assertAlmostEqual(price, elektra.create_prices(flow_date, 'T', 'N', 'pjm', '2x16', 'monthly',
+                                                                prices.copy()), places=9, msg=backend)
+
+    @unittest.skipUnless(importlib.util.find_spec('polars'), 'polars is not installed')
+    def test_polars_backend(self):
+        self.assertIs(backends.load_engine('polars'), backends.create_prices_polars)
+        price = backends.create_prices_polars(dt.datetime(2024, 3, 10), 'T', 'N', elektra.Iso.ISONE,
+                                              elektra.Block._7x24, elektra.Frequency.Daily, self.short_day.copy())
+        self.assertAlmostEqual(price, elektra.create_prices(dt.datetime(2024, 3, 10), 'T', 'N', 'isone', '7x24',
+                                                            'daily', self.short_day.copy()), places=9)
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_arrow_backend(self):
+        self.assertIs(backends.load_engine('arrow'), backends.create_prices_arrow)
+
+    def test_errors_match_pandas(self):
+        prices = self.month.drop(index=[100, 200])
+        for backend in ['pandas', 'vectorized', 'polars', 'arrow']:
+            with self.assertRaises(elektra.exceptions.InsufficientDataError) as e:
+                elektra.create_prices(dt.datetime(2024, 11, 12), 'T', 'N', 'pjm', '7x24', 'monthly', prices.copy(),
+                                      backend=backend)
+            self.assertIn('2024-11-05 HE 4. Expected: 1; Got: 0', str(e.exception), msg=backend)
+
+            with self.assertRaises(elektra.exceptions.NoRelevantHoursTodayError):
+                elektra.create_prices(dt.datetime(2024, 11, 16), 'T', 'N', 'pjm', '5x16', 'daily', self.month.copy(),
+                                      backend=backend)
+
+    def test_missing_dependency_falls_back(self):
+        with mock.patch.dict(sys.modules, {'polars': None}):
+            self.assertIsNone(backends.load_engine('polars'))
+            price = elektra.create_prices(dt.datetime(2020, 10, 17), 'T', 'N', 'miso', '2x16', 'daily',
+                                          pd.read_csv('tests/created_prices.csv'), backend='polars')
+        self.assertEqual(price, 22.55625)
+
+    def test_global_backend(self):
+        backends.set_backend('Vectorized')
+        try:
+            self.assertEqual(backends.get_backend(), 'vectorized')
+            self.assertIs(backends.load_engine(), backends.create_prices_vectorized)
+            self.assertIs(backends.load_engine('VECTORIZED'), backends.create_prices_vectorized)
+        finally:
+            backends.set_backend('pandas')
+        with self.assertRaises(elektra.exceptions.ElektraConfigError):
+            backends.set_backend('spark')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from elektra.batch import read_prices, price_node_requests, run_price_batch
+from elektra.exceptions import ElektraConfigError
+from elektra.cli import main
+
+
+class BatchPricingTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.prices = pd.read_csv('tests/created_prices.csv')
+        self.spec = pd.DataFrame({
+            'ticker': ['M.P4F8', 'M.P4F8', 'M.P4F9', 'M.P4FA'],
+            'node': ['INDIANA.HUB', 'INDIANA.HUB', 'INDIANA.HUB', 'MINN.HUB'],
+            'iso': ['miso', 'miso', 'miso', 'miso'],
+            'block': ['2x16', '7x24', '5x16', '2x16'],
+            'frequency': ['daily', 'daily', 'daily', 'monthly'],
+            'flow_date': ['2020-10-17', '2020-10-17', '2020-10-17', '2020-10-17'],
+        })
+        self.spec_path = os.path.join(self.tmp.name, 'spec.csv')
+        self.spec.to_csv(self.spec_path, index=False)
+        self.out_path = os.path.join(self.tmp.name, 'out.csv')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def check_results(self):
+        results = pd.read_csv(self.out_path)
+        self.assertEqual(len(results), 4)
+        self.assertAlmostEqual(results.loc[0, 'price'], 22.55625)
+        self.assertAlmostEqual(results.loc[1, 'price'], self.prices['price'].mean())
+        self.assertEqual(results.loc[2, 'error'], 'No relevant hours')
+        self.assertTrue(results.loc[3, 'error'].startswith('Incorrect number of prices for M.P4FA/MINN.HUB'))
+
+    def test_directory_of_node_files(self):
+        prices_dir = os.path.join(self.tmp.name, 'prices')
+        os.makedirs(prices_dir)
+        self.prices.to_csv(os.path.join(prices_dir, 'INDIANA.HUB.csv'), index=False)
+        self.prices.iloc[:12].to_csv(os.path.join(prices_dir, 'MINN.HUB.csv'), index=False)
+
+        main(['price', '--prices', prices_dir, '--spec', self.spec_path, '--out', self.out_path])
+        self.check_results()
+
+    def test_node_column_with_unused_columns(self):
+        prices = pd.concat([self.prices.assign(node='INDIANA.HUB'), self.prices.iloc[:12].assign(node='MINN.HUB'),
+                            self.prices.assign(node='OTHER')]).assign(congestion=1.0, loss=2.0)
+        prices_path = os.path.join(self.tmp.name, 'prices.csv')
+        prices.to_csv(prices_path, index=False)
+
+        main(['price', '--prices', prices_path, '--spec', self.spec_path, '--out', self.out_path])
+        self.check_results()
+
+    def test_streams_nodes_across_chunks(self):
+        prices = pd.concat([self.prices.assign(node='INDIANA.HUB'), self.prices.iloc[:12].assign(node='MINN.HUB')])
+        prices_path = os.path.join(self.tmp.name, 'prices.csv')
+        prices.to_csv(prices_path, index=False)
+
+        stats = run_price_batch(prices_path, self.spec, self.out_path, chunksize=5)
+        self.assertEqual(stats['rows_read'], 36)
+        self.check_results()
+
+        # A node whose rows are split by another node's cannot be streamed
+        pd.concat([prices, self.prices.iloc[:1].assign(node='INDIANA.HUB')]).to_csv(prices_path, index=False)
+        with self.assertRaises(ElektraConfigError):
+            run_price_batch(prices_path, self.spec, self.out_path, chunksize=5)
+
+    def test_read_projects_and_filters(self):
+        prices_path = os.path.join(self.tmp.name, 'prices.csv')
+        self.prices.assign(node='A', extra='x').to_csv(prices_path, index=False)
+
+        read = read_prices(prices_path, nodes=['A'], start='2020-10-17', end='2020-10-17')
+        self.assertEqual(sorted(read.columns), ['flow_date', 'hour_ending', 'node', 'price'])
+        self.assertEqual(len(read), 24)
+        self.assertTrue(read_prices(prices_path, nodes=['B']).empty)
+
+    def test_unsupported_frequency(self):
+        spec = self.spec.assign(frequency=['daily', 'hourly', 'daily', 'monthly'])
+        prices = self.prices.assign(node='INDIANA.HUB')
+        with self.assertRaises(ElektraConfigError):
+            price_node_requests(spec[spec['node'] == 'INDIANA.HUB'], prices)
+        prices_path = os.path.join(self.tmp.name, 'prices.csv')
+        prices.to_csv(prices_path, index=False)
+        with self.assertRaises(ElektraConfigError):
+            run_price_batch(prices_path, spec, self.out_path)
+        self.assertFalse(os.path.exists(self.out_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
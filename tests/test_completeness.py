@@ -0,0 +1,87 @@
+import unittest
+import datetime as dt
+import pandas as pd
+import elektra
+from elektra import hours
+from tests.test_cube import month_of_prices
+
+
+class HourGridTests(unittest.TestCase):
+    def test_dst_expected_rows(self):
+        grid = hours.hour_grid('2024-03-10', '2024-03-10')
+        self.assertEqual(grid['expected'].sum(), 23)
+        grid = hours.hour_grid('2024-11-03', '2024-11-03')
+        self.assertEqual(grid['expected'].sum(), 25)
+
+    def test_block_mask_matches_scalar_checks(self):
+        grid = hours.hour_grid('2024-11-01', '2024-11-30')
+        for iso in ['pjm', 'ercot', 'caiso']:
+            for block in hours.PRICED_BLOCKS:
+                mask = hours.block_mask(block, iso, grid)
+                iso_enum = elektra.utils.Iso(iso)
+                for (flow_date, he, _), required in zip(grid.itertuples(index=False), mask):
+                    day = flow_date.to_pydatetime()
+                    rlv_hr, _ = elektra.is_relevant_hour(block, iso_enum, he, day)
+                    self.assertEqual(elektra.is_relevant_day(block, iso_enum, day) and rlv_hr, required,
+                                     msg=f'{iso} {block} {day} HE {he}')
+
+
+class CompletenessTests(unittest.TestCase):
+    def setUp(self):
+        self.flow_date = dt.datetime(2020, 10, 17)
+        self.prices = pd.read_csv('tests/created_prices.csv')
+
+    def test_complete_day(self):
+        report = elektra.check_prices(self.flow_date, 'M.P4F8', 'INDIANA.HUB', 'miso', '2x16', 'daily', self.prices)
+        self.assertTrue(report.empty)
+
+    def test_every_gap_reported(self):
+        prices = pd.concat([self.prices.drop([3, 10]), self.prices.iloc[[5]]])
+        report = elektra.check_prices(self.flow_date, 'M.P4F8', 'INDIANA.HUB', 'miso', '7x24', 'daily', prices)
+
+        self.assertEqual(report['HE'].to_list(), [4, 6, 11])
+        self.assertEqual(report['issue'].to_list(), ['missing', 'duplicate', 'missing'])
+        self.assertTrue((report['node'] == 'INDIANA.HUB').all())
+
+        # HE 4 is off-peak, so it does not break the 2x16 price
+        report = elektra.check_prices(self.flow_date, 'M.P4F8', 'INDIANA.HUB', 'miso', '2x16', 'daily', prices)
+        self.assertEqual(report['HE'].to_list(), [11])
+        self.assertEqual(report['blocks'].to_list(), ['2x16'])
+
+    def test_extra_hour_on_short_day(self):
+        prices = pd.DataFrame({'flow_date': '2024-03-10', 'hour_ending': range(1, 25), 'price': 20.0})
+        report = elektra.completeness_report('2024-03-10', '2024-03-10', 'isone', prices)
+
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report.loc[0, 'HE'], 3)
+        self.assertEqual(report.loc[0, 'issue'], 'extra')
+        self.assertEqual(report.loc[0, 'blocks'], '')
+
+    def test_check_prices_renumbers_like_create_prices(self):
+        # A month whose short day is sent as 1..23 is not renumbered by create_prices
+        prices = month_of_prices('2024-03-01', '2024-03-31')
+        prices.loc[prices['flow_date'] == '2024-03-10', 'hour_ending'] = range(1, 24)
+        flow_date = dt.datetime(2024, 3, 10)
+        report = elektra.check_prices(flow_date, 'T', 'N', 'pjm', '7x24', 'monthly', prices.copy())
+        self.assertEqual(report[['HE', 'issue']].values.tolist(), [[3, 'extra'], [24, 'missing']])
+        with self.assertRaises(elektra.InsufficientDataError) as e:
+            elektra.create_prices(flow_date, 'T', 'N', 'pjm', '7x24', 'monthly', prices.copy())
+        self.assertIn('2024-03-10 HE 24. Expected: 1; Got: 0', str(e.exception))
+
+        # A single short day sent as 1..23 is
+        day = prices[prices['flow_date'] == '2024-03-10']
+        self.assertTrue(elektra.check_prices(flow_date, 'T', 'N', 'pjm', '7x24', 'daily', day.copy()).empty)
+
+    def test_bulk_nodes(self):
+        prices = pd.concat([self.prices.assign(node='A'), self.prices.drop([20]).assign(node='B')])
+        report = elektra.completeness_report('2020-10-17', '2020-10-17', 'miso', prices)
+
+        self.assertEqual(report['node'].to_list(), ['B'])
+        self.assertEqual(report.loc[0, 'HE'], 21)
+
+        periods = elektra.broken_periods(report)
+        self.assertEqual(sorted(periods['block']), ['2x16', '6x16', '7x16', '7x24', 'wrap'])
+
+
+if __name__ == '__main__':
+    unittest.main()
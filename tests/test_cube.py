@@ -0,0 +1,75 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+import elektra
+
+
+def month_of_prices(start, end):
+    '''
+        hourly prices in elektra's normalized hour-ending format: HE 3 is skipped on the short day, HE 2 is sent
+        twice on the long day
+    '''
+    grid = elektra.hours.hour_grid(start, end)
+    grid = grid.loc[grid.index.repeat(grid['expected'])].reset_index(drop=True)
+    return pd.DataFrame({
+        'flow_date': grid['flow_date'].dt.strftime('%Y-%m-%d'),
+        'hour_ending': grid['HE'],
+        'price': 30 + np.sin(np.arange(len(grid))) * 10,
+    })
+
+
+class PriceCubeTests(unittest.TestCase):
+    def setUp(self):
+        self.flow_date = dt.datetime(2024, 11, 3)
+        self.prices = month_of_prices('2024-11-01', '2024-11-30')
+
+    def test_matches_create_prices(self):
+        cube = elektra.create_price_cube(self.flow_date, 'T', 'N', 'pjm', self.prices)
+
+        for block in ['5x16', '2x16', '7x8', '7x16', '7x24', 'wrap', '6x16']:
+            for frequency in ['daily', 'monthly']:
+                try:
+                    expected = elektra.create_prices(self.flow_date, 'T', 'N', 'pjm', block, frequency,
+                                                     self.prices.copy())
+                except elektra.exceptions.NoRelevantHoursTodayError:
+                    self.assertTrue(np.isnan(cube.loc[block, frequency]))
+                    continue
+                self.assertAlmostEqual(cube.loc[block, frequency], expected, places=9, msg=f'{block} {frequency}')
+
+    def test_balance_of_month(self):
+        cube = elektra.create_price_cube(self.flow_date, 'T', 'N', 'pjm', self.prices, blocks=['7x24'])
+        rest = self.prices[self.prices['flow_date'] >= '2024-11-03']
+        self.assertAlmostEqual(cube.loc['7x24', 'balance_of_month'], rest['price'].mean(), places=9)
+
+    def test_missing_hour(self):
+        prices = self.prices.drop(index=100)
+        with self.assertRaises(elektra.exceptions.InsufficientDataError):
+            elektra.create_price_cube(self.flow_date, 'T', 'N', 'pjm', prices)
+
+        cube = elektra.create_price_cube(self.flow_date, 'T', 'N', 'pjm', prices, errors='coerce')
+        self.assertTrue(np.isnan(cube.loc['7x24', 'monthly']))
+        self.assertFalse(np.isnan(cube.loc['7x24', 'daily']))
+
+    def test_short_day_numbered_1_to_23(self):
+        # create_prices only renumbers a whole input of 23 hours, not a month with its short day sent as 1..23
+        prices = month_of_prices('2024-03-01', '2024-03-31')
+        prices.loc[prices['flow_date'] == '2024-03-10', 'hour_ending'] = range(1, 24)
+        flow_date = dt.datetime(2024, 3, 10)
+        with self.assertRaises(elektra.exceptions.InsufficientDataError):
+            elektra.create_price_cube(flow_date, 'T', 'N', 'pjm', prices)
+
+        cube = elektra.create_price_cube(flow_date, 'T', 'N', 'pjm', prices, errors='coerce')
+        self.assertTrue(np.isnan(cube.loc['7x24', 'monthly']))
+        self.assertTrue(np.isnan(cube.loc['7x8', 'daily']))
+        expected = elektra.create_prices(flow_date, 'T', 'N', 'pjm', '2x16', 'monthly', prices.copy())
+        self.assertAlmostEqual(cube.loc['2x16', 'monthly'], expected, places=9)
+
+        day = prices[prices['flow_date'] == '2024-03-10']
+        cube = elektra.create_price_cube(flow_date, 'T', 'N', 'pjm', day, periods=['daily'])
+        self.assertAlmostEqual(cube.loc['7x24', 'daily'], elektra.create_prices(
+            flow_date, 'T', 'N', 'pjm', '7x24', 'daily', day.copy()), places=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
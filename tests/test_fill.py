@@ -0,0 +1,57 @@
+import unittest
+import datetime as dt
+import pandas as pd
+import elektra
+from elektra.fill import fill_prices
+
+
+class FillTests(unittest.TestCase):
+    def setUp(self):
+        self.flow_date = dt.datetime(2020, 10, 17)
+        self.prices = pd.read_csv('tests/created_prices.csv')
+        self.prior_day = self.prices.assign(flow_date='2020-10-16', price=self.prices['price'] + 1)
+        self.gappy = self.prices[~self.prices['hour_ending'].isin([11, 24])]
+
+    def test_prior_day(self):
+        prices = pd.concat([self.prior_day, self.gappy])
+        filled, fills = fill_prices(self.flow_date, self.flow_date, 'miso', prices, policies=['prior_day'])
+
+        self.assertEqual(fills['HE'].to_list(), [11, 24])
+        self.assertEqual(fills['policy'].to_list(), ['prior_day', 'prior_day'])
+        self.assertEqual(fills['price'].to_list(), [22.10, 18.55])
+        self.assertEqual(len(filled), 48)
+
+    def test_interpolate_within_day(self):
+        filled, fills = fill_prices(self.flow_date, self.flow_date, 'miso', self.gappy, policies=['interpolate'])
+
+        # HE 24 has no later hour in the day to interpolate towards
+        self.assertEqual(fills['policy'].to_list(), ['interpolate', None])
+        self.assertAlmostEqual(fills.loc[0, 'price'], (20.81 + 19.28) / 2)
+
+    def test_proxy_with_basis(self):
+        hub = self.prices.assign(price=self.prices['price'] - 5)
+        filled, fills = fill_prices(self.flow_date, self.flow_date, 'miso', self.gappy, policies=['proxy'],
+                                    proxy_prices=hub)
+
+        self.assertAlmostEqual(fills.loc[0, 'price'], 21.10)
+        self.assertAlmostEqual(fills.loc[1, 'price'], 17.55)
+
+    def test_max_fills(self):
+        prices = pd.concat([self.prior_day, self.gappy])
+        filled, fills = fill_prices(self.flow_date, self.flow_date, 'miso', prices, max_fills=1)
+
+        self.assertTrue(fills['policy'].isna().all())
+        self.assertEqual(len(filled), 46)
+
+    def test_create_prices_with_fill(self):
+        with self.assertRaises(elektra.exceptions.InsufficientDataError):
+            elektra.create_prices(self.flow_date, 'M.P4F8', 'INDIANA.HUB', 'miso', '2x16', 'daily', self.gappy)
+
+        prices = pd.concat([self.prior_day, self.gappy])
+        result = elektra.create_prices(self.flow_date, 'M.P4F8', 'INDIANA.HUB', 'miso', '2x16', 'daily', prices,
+                                       fill={'policies': ['prior_day']})
+        self.assertAlmostEqual(result, 22.55625 + 1 / 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import datetime as dt
+from unittest import mock
+import numpy as np
+import pandas as pd
+import elektra
+from elektra import graph
+from elektra.graph import PriceGraph
+from elektra.history import block_history, monthly_history
+from elektra.spreads import create_spreads
+from tests.test_cube import month_of_prices
+
+
+class PriceGraphTests(unittest.TestCase):
+    def setUp(self):
+        prices = month_of_prices('2024-10-01', '2024-11-30')
+        self.prices = pd.concat([prices.assign(node='A'), prices.assign(node='HUB', price=prices['price'] + 5)],
+                                ignore_index=True)
+        self.graph = PriceGraph('pjm', self.prices)
+
+    def test_outputs_match_single_calls(self):
+        outputs = self.graph.compute({
+            'daily': self.graph.block_prices('daily'),
+            'monthly': self.graph.block_prices('monthly', blocks=['5x16', '7x24']),
+            'merged': self.graph.merged_prices('monthly'),
+            'basis': self.graph.spreads([('A', 'HUB')], 'daily'),
+        })
+
+        history = block_history('pjm', self.prices, windows=())
+        pd.testing.assert_frame_equal(outputs['daily'], history[['node', 'flow_date', 'block', 'price']])
+
+        months = monthly_history('pjm', self.prices, blocks=['5x16', '7x24']).set_index(['node', 'block', 'flow_date'])
+        monthly = outputs['monthly'].set_index(['node', 'block', 'flow_date'])
+        np.testing.assert_allclose(monthly['price'], months['price'])
+        merged = outputs['merged'].set_index(['node', 'block', 'flow_date'])['price']
+        np.testing.assert_allclose(merged, months.xs('7x24', level='block', drop_level=False)['price'])
+
+        basis = outputs['basis'].set_index(['block', 'flow_date'])
+        day = dt.datetime(2024, 11, 12)
+        expected = create_spreads(day, [('A', 'HUB')], 'pjm', 'daily', self.prices).set_index('block')
+        np.testing.assert_allclose(basis.xs(day, level='flow_date')['spread'], expected['spread'])
+        self.assertTrue(np.isnan(basis.loc[('5x16', dt.datetime(2024, 11, 2)), 'spread']))
+
+    def test_spreads_match_coerced_create_spreads(self):
+        # One dropped HUB hour breaks that day's 5x16 for both legs
+        missing = (self.prices['node'] == 'HUB') & (self.prices['flow_date'] == '2024-11-12') & \
+            (self.prices['hour_ending'] == 12)
+        prices = self.prices[~missing].reset_index(drop=True)
+        graph = PriceGraph('pjm', prices)
+        basis, = graph.compute([graph.spreads([('A', 'HUB')], 'daily')])
+        day = basis[basis['flow_date'] == dt.datetime(2024, 11, 12)].set_index('block')
+
+        expected = create_spreads(dt.datetime(2024, 11, 12), [('A', 'HUB')], 'pjm', 'daily', prices,
+                                  errors='coerce').set_index('block')
+        for column in ['node_price', 'reference_price', 'spread']:
+            np.testing.assert_allclose(day[column], expected.loc[day.index, column], err_msg=column)
+        self.assertTrue(day.loc['5x16', ['node_price', 'reference_price', 'spread']].isna().all())
+        self.assertFalse(day.loc['7x8'].isna().any())
+
+    def test_hourly_prices(self):
+        hourly, = self.graph.compute([self.graph.hourly_prices()], workers=1)
+        self.assertEqual(len(hourly), 2 * 61 * 24)
+        long_day = hourly[(hourly['node'] == 'A') & (hourly['flow_date'] == '2024-11-03') & (hourly['HE'] == 2)]
+        raw = self.prices[(self.prices['node'] == 'A') & (self.prices['flow_date'] == '2024-11-03') &
+                          (self.prices['hour_ending'] == 2)]
+        self.assertAlmostEqual(long_day['price'].item(), raw['price'].mean())
+        self.assertTrue(hourly['complete'].all())
+
+    def test_shared_intermediates_computed_once(self):
+        with mock.patch.object(graph, 'day_block_sums', wraps=graph.day_block_sums) as sums, \
+                mock.patch.object(graph, 'hour_stats', wraps=graph.hour_stats) as stats:
+            g = PriceGraph('pjm', self.prices)
+            outputs = [g.block_prices('daily'), g.block_prices('monthly'), g.merged_prices('daily'),
+                       g.spreads([('A', 'HUB')], 'monthly'), g.hourly_prices()]
+            self.assertIs(g.block_prices('daily'), outputs[0])
+            g.compute(outputs, workers=4)
+            g.compute([g.merged_prices('monthly')])
+        self.assertEqual(sums.call_count, 1)
+        self.assertEqual(stats.call_count, 1)
+        self.assertEqual(set(g.timings), set(g.nodes))
+
+    def test_merged_blocks_must_cover_each_hour_once(self):
+        for blocks in [['5x16', '7x8'], ['7x24', '5x16']]:
+            with self.assertRaises(elektra.ElektraConfigError, msg=blocks):
+                self.graph.compute([self.graph.merged_prices('monthly', from_blocks=blocks)])
+        merged, = self.graph.compute([self.graph.merged_prices('monthly', from_blocks=['5x16', 'wrap'])])
+        self.assertEqual(len(merged), 2 * 2)
+
+    def test_errors(self):
+        with self.assertRaises(elektra.ElektraConfigError):
+            PriceGraph('pjm', self.prices, blocks=['5x16']).merged_prices()
+        with self.assertRaises(elektra.ElektraConfigError):
+            self.graph.block_prices('hourly')
+        with self.assertRaises(elektra.ElektraConfigError):
+            self.graph.compute([self.graph.spreads([('A', 'NOWHERE')])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+import elektra
+from elektra.history import block_history, monthly_history
+from tests.test_cube import month_of_prices
+
+
+class HistoryTests(unittest.TestCase):
+    def setUp(self):
+        prices = month_of_prices('2024-10-01', '2024-11-30')
+        self.legs = {'A': prices, 'B': prices.assign(price=prices['price'] + 5)}
+        self.prices = pd.concat([p.assign(node=n) for n, p in self.legs.items()], ignore_index=True)
+
+    def create_price(self, node, block, frequency, flow_date):
+        return elektra.create_prices(flow_date, 'T', node, 'pjm', block, frequency, self.legs[node].copy(),
+                                     backend='vectorized')
+
+    def test_daily_prices(self):
+        history = block_history('pjm', self.prices, blocks=['5x16', '7x24'], windows=(7,))
+        self.assertEqual(len(history), 2 * 2 * 61)
+        rows = history.set_index(['node', 'block', 'flow_date'])
+        for day in [dt.datetime(2024, 10, 15), dt.datetime(2024, 11, 3), dt.datetime(2024, 11, 29)]:
+            self.assertAlmostEqual(rows.loc[('B', '7x24', day), 'price'], self.create_price('B', '7x24', 'daily', day))
+        self.assertTrue(np.isnan(rows.loc[('A', '5x16', dt.datetime(2024, 11, 2)), 'price']))
+
+    def test_rolling_windows(self):
+        history = block_history('pjm', self.prices, blocks=['5x16'], windows=(7, 30))
+        a = history[history['node'] == 'A'].set_index('flow_date')
+        self.assertTrue(a['rolling_7'].iloc[:6].isna().all())
+        self.assertTrue(a['rolling_30'].iloc[:29].isna().all())
+
+        # weekdays from Mon Nov 4 to Fri Nov 8, plus Thu Nov 7 and Fri Nov 8 alone
+        hours = self.legs['A'].assign(day=pd.to_datetime(self.legs['A']['flow_date']))
+        onpeak = hours[(hours['day'] >= '2024-11-04') & (hours['day'] <= '2024-11-10') &
+                       (hours['day'].dt.dayofweek < 5) & (hours['hour_ending'] >= 8) & (hours['hour_ending'] <= 23)]
+        self.assertAlmostEqual(a.loc['2024-11-10', 'rolling_7'], onpeak['price'].mean())
+
+    def test_bad_hours(self):
+        gap = (self.prices['node'] == 'A') & (self.prices['flow_date'] == '2024-11-05') & \
+            (self.prices['hour_ending'] == 12)
+        history = block_history('pjm', self.prices[~gap], blocks=['5x16', '7x8'], windows=(7,))
+        a = history[(history['node'] == 'A') & (history['block'] == '5x16')].set_index('flow_date')
+        self.assertTrue(np.isnan(a.loc['2024-11-05', 'price']))
+        self.assertTrue(a.loc['2024-11-05':'2024-11-11', 'rolling_7'].isna().all())
+        self.assertFalse(np.isnan(a.loc['2024-11-12', 'rolling_7']))
+        offpeak = history[(history['node'] == 'A') & (history['block'] == '7x8')].set_index('flow_date')
+        self.assertFalse(np.isnan(offpeak.loc['2024-11-05', 'price']))
+
+    def test_monthly(self):
+        history = monthly_history('pjm', self.prices, blocks=['2x16', 'wrap'])
+        self.assertEqual(len(history), 2 * 2 * 2)
+        for row in history.itertuples():
+            self.assertAlmostEqual(row.price, self.create_price(row.node, row.block, 'monthly', row.flow_date))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import datetime as dt
+import numpy as np
+import elektra
+from elektra import core, hours
+from elektra.utils import Iso, Block
+
+
+class HolidayCalendarTests(unittest.TestCase):
+    def test_alberta_holidays(self):
+        self.assertEqual(sorted(core.holiday_dates(2024, Iso.AESO)), [
+            dt.date(2024, 1, 1), dt.date(2024, 2, 19), dt.date(2024, 3, 29), dt.date(2024, 5, 20),
+            dt.date(2024, 7, 1), dt.date(2024, 9, 2), dt.date(2024, 10, 14), dt.date(2024, 11, 11),
+            dt.date(2024, 12, 25)])
+        # Canada Day 2029 is a Sunday
+        self.assertIn(dt.date(2029, 7, 2), core.holiday_dates(2029, 'aeso'))
+
+    def test_other_isos_follow_nerc(self):
+        for iso in [Iso.PJM, Iso.CAISO, Iso.ERCOT]:
+            self.assertEqual(core.holiday_dates(2024, iso), core.nerc_holiday_dates(2024))
+        self.assertTrue(elektra.is_peak_day(dt.datetime(2024, 2, 19), Iso.PJM))
+        self.assertFalse(elektra.is_peak_day(dt.datetime(2024, 2, 19), Iso.AESO))
+        self.assertTrue(elektra.is_peak_day(dt.datetime(2024, 11, 28), Iso.AESO))
+
+    def test_unknown_isos_follow_nerc(self):
+        self.assertEqual(core.holiday_rule_set('ercot_north'), 'nerc')
+        self.assertFalse(elektra.is_peak_day(dt.datetime(2024, 12, 25), 'ercot_north'))
+        self.assertEqual(elektra.convert(dt.datetime(2024, 11, 12), '7x24', '5x16', 'ercot_north'), 16)
+        volumes = elektra.translateBlocks('ercot_north', 2, 'daily', dt.datetime(2024, 11, 12), '7x24', ['Wrap'],
+                                          'MWh')
+        self.assertEqual(volumes['Wrap'].tolist(), [16])
+
+    def test_block_mask_uses_iso_holidays(self):
+        membership = elektra.block_membership('2024-01-01', '2024-12-31', 'aeso', frequency='daily')
+        for flow_date, row in membership.iterrows():
+            for block in ['5x16', '2x16', '6x16']:
+                self.assertEqual(row[block], elektra.is_relevant_day(Block(block), Iso.AESO, flow_date),
+                                 '{0} {1}'.format(flow_date, block))
+        self.assertFalse(membership.loc['2024-10-14', '5x16'])
+        self.assertTrue(elektra.block_membership('2024-10-14', '2024-10-14', 'pjm', frequency='daily')['5x16'].all())
+
+    def test_vectorized_is_holiday(self):
+        days = np.array(['2031-12-25', '1985-07-04', '2024-07-05', '2070-11-11'], dtype='datetime64[ns]')
+        self.assertEqual(hours.is_holiday(days).tolist(), [True, True, False, False])
+        self.assertEqual(hours.is_holiday(days, 'aeso').tolist(), [True, False, False, True])
+        self.assertEqual(len(hours.holiday_days(2024, 2024, Iso.AESO)), 9)
+
+    def test_register_holidays(self):
+        rules, isos = dict(core.HOLIDAY_RULES), dict(core.ISO_HOLIDAYS)
+        try:
+            core.register_holidays('texas', core.HOLIDAY_RULES['nerc'] + (lambda year: dt.date(year, 3, 2),),
+                                   isos=['ercot'])
+            self.assertTrue(elektra.is_offpeak_day(dt.datetime(2023, 3, 2), Iso.ERCOT))
+            self.assertEqual(hours.is_holiday(np.array(['2023-03-02'], dtype='datetime64[ns]'), Iso.ERCOT).tolist(),
+                             [True])
+            self.assertFalse(elektra.is_offpeak_day(dt.datetime(2023, 3, 2), Iso.PJM))
+        finally:
+            core.HOLIDAY_RULES.clear()
+            core.HOLIDAY_RULES.update(rules)
+            core.ISO_HOLIDAYS.clear()
+            core.ISO_HOLIDAYS.update(isos)
+        self.assertTrue(elektra.is_peak_day(dt.datetime(2023, 3, 2), Iso.ERCOT))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+import unittest
+
+import elektra
+from elektra.core import nerc_holiday_dates
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                          check=True)
+
+
+def cumulative_import_us(stderr, module):
+    '''
+        cumulative import time in microseconds of a top-level module, from python -X importtime output
+    '''
+    for line in stderr.splitlines():
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise AssertionError('{0} not imported'.format(module))
+
+
+class LazyImportTests(unittest.TestCase):
+    def test_core_does_not_import_pandas(self):
+        result = run_python(
+            'import sys, datetime as dt, elektra\n'
+            'elektra.is_peak_day(dt.datetime(2024, 12, 25))\n'
+            'elektra.is_relevant_hour(elektra.Block.Wrap, elektra.Iso.PJM, 2, dt.datetime(2024, 11, 3))\n'
+            'elektra.get_iso_details(elektra.Iso.CAISO)\n'
+            'print(sorted(m for m in ("pandas", "numpy", "dateutil") if m in sys.modules))')
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_vectorized_modules_skip_legacy_module(self):
+        result = run_python(
+            'import sys\n'
+            'import elektra.cube, elektra.history, elektra.store, elektra.batch\n'
+            'print("elektra.elektra" in sys.modules)')
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_import_time(self):
+        # the core must stay an order of magnitude cheaper to import than pandas
+        core = cumulative_import_us(run_python('import elektra').stderr, 'elektra')
+        pandas = cumulative_import_us(run_python('import pandas').stderr, 'pandas')
+        self.assertLess(core * 10, pandas)
+
+    def test_lazy_names(self):
+        self.assertEqual(elektra.create_prices.__module__, 'elektra.elektra')
+        self.assertIs(elektra.utils.Iso, elektra.Iso)
+        self.assertIn('translateBlocks', dir(elektra))
+        with self.assertRaises(AttributeError):
+            elektra.not_a_function
+
+    def test_star_import(self):
+        namespace = {}
+        exec('from elektra import *', namespace)
+        self.assertIs(namespace['create_prices'], elektra.create_prices)
+        self.assertIs(namespace['is_peak_day'], elektra.is_peak_day)
+        self.assertNotIn('importlib', namespace)
+
+    def test_holidays_match_pandas_calendar(self):
+        calendar = elektra.NERCHolidayCalendar()
+        for year in range(2000, 2041):
+            pandas_days = calendar.holidays(start='{0}-01-01'.format(year), end='{0}-12-31'.format(year))
+            self.assertEqual(nerc_holiday_dates(year), {d.date() for d in pandas_days})
+            self.assertTrue(elektra.get_nerc_holidays(year).equals(pandas_days))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import datetime as dt
+import numpy as np
+import elektra
+from elektra.utils import Iso, Block
+
+
+class BlockMembershipTests(unittest.TestCase):
+    def test_matches_scalar_checks(self):
+        membership = elektra.block_membership('2024-11-01', '2024-11-30', 'caiso')
+        self.assertEqual(membership.shape, (30 * 24, 7))
+        for (flow_date, he), row in membership.sample(200, random_state=1).iterrows():
+            for block in membership.columns:
+                relevant = elektra.is_relevant_day(Block(block), Iso.CAISO, flow_date) and \
+                    elektra.is_relevant_hour(Block(block), Iso.CAISO, he, flow_date)[0]
+                self.assertEqual(row[block], relevant, '{0} HE {1} {2}'.format(flow_date, he, block))
+
+    def test_as_mask(self):
+        membership = elektra.block_membership('2024-03-10', '2024-03-10', 'pjm', blocks=['7x24', '7x8'])
+        self.assertFalse(membership.loc[('2024-03-10', 3)].any())
+        self.assertEqual(membership.sum().tolist(), [23, 7])
+        prices = np.arange(24.0)
+        self.assertEqual(prices[membership['7x8'].to_numpy()].tolist(), [0, 1, 3, 4, 5, 6, 23])
+
+    def test_daily(self):
+        membership = elektra.block_membership('2024-12-24', '2024-12-28', 'pjm', frequency='daily')
+        self.assertEqual(membership['5x16'].tolist(), [True, False, True, True, False])
+        self.assertTrue(membership['7x24'].all())
+
+    def test_get_blocks(self):
+        self.assertEqual(elektra.get_blocks(dt.datetime(2024, 12, 25)), ['2x16', '7x8', '7x16', '7x24', 'wrap'])
+        self.assertIn('5x16', elektra.get_blocks(dt.datetime(2024, 12, 24), 'miso'))
+        self.assertIn('6x16', elektra.get_blocks(dt.datetime(2024, 12, 28), Iso.CAISO))
+
+
+if __name__ == '__main__':
+    unittest.main()
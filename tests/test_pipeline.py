@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from elektra import pipeline
+from elektra.cli import main
+from elektra.exceptions import ElektraConfigError
+from elektra.pipeline import run_pipeline
+
+
+class PipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.prices = pd.read_csv('tests/created_prices.csv')
+        self.prices_dir = os.path.join(self.tmp.name, 'prices')
+        os.makedirs(self.prices_dir)
+        nodes = ['NODE{0}'.format(i) for i in range(12)]
+        for i, node in enumerate(nodes):
+            self.prices.assign(price=self.prices['price'] + i).to_csv(
+                os.path.join(self.prices_dir, node + '.csv'), index=False)
+        self.spec = pd.DataFrame({
+            'ticker': ['T'] * 14,
+            'node': nodes + ['NODE0', 'MISSING'],
+            'iso': ['miso'] * 14,
+            'block': ['7x24'] * 12 + ['2x16', '2x16'],
+            'frequency': ['daily'] * 14,
+            'flow_date': ['2020-10-17'] * 14,
+        })
+        self.out_path = os.path.join(self.tmp.name, 'out.csv')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_prices_every_node(self):
+        stats = run_pipeline(self.prices_dir, self.spec, self.out_path, readers=3, workers=2, queue_size=2)
+        self.assertEqual(stats['files'], 12)
+        self.assertEqual(stats['rows_read'], 12 * 24)
+        self.assertEqual(stats['prices_written'], 14)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['stages']['price']['items'], 13)
+
+        results = pd.read_csv(self.out_path).set_index(['node', 'block'])
+        for i in range(12):
+            self.assertAlmostEqual(results.loc[('NODE{0}'.format(i), '7x24'), 'price'], self.prices['price'].mean() + i)
+        self.assertEqual(results.loc[('MISSING', '2x16'), 'error'], 'No prices for node')
+
+    def test_process_pool_from_cli(self):
+        spec_path = os.path.join(self.tmp.name, 'spec.csv')
+        self.spec.to_csv(spec_path, index=False)
+        main(['price', '--prices', self.prices_dir, '--spec', spec_path, '--out', self.out_path, '--workers', '2',
+              '--executor', 'process'])
+        results = pd.read_csv(self.out_path)
+        self.assertEqual(len(results), 14)
+        self.assertEqual(results['price'].notna().sum(), 13)
+
+    def test_node_in_two_files(self):
+        self.prices.assign(node='NODE0').to_csv(os.path.join(self.prices_dir, 'extra.csv'), index=False)
+        with self.assertRaises(ElektraConfigError):
+            run_pipeline(self.prices_dir, self.spec, self.out_path)
+
+    def test_failed_node_is_raised(self):
+        def fail_node0(requests, node_prices):
+            if (requests['node'] == 'NODE0').any():
+                raise ValueError('NODE0 failed')
+            return pipeline.price_node_requests(requests, node_prices), 0.0
+
+        with mock.patch.object(pipeline, '_price_node', fail_node0):
+            with self.assertRaises(ValueError):
+                run_pipeline(self.prices_dir, self.spec, self.out_path, readers=1, workers=1, queue_size=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+import elektra
+from elektra.results import HourlyPrices, scrub_hourly_array, scrub_hourly_nodes, block_volumes
+from tests.test_cube import month_of_prices
+
+
+class CompactResultTests(unittest.TestCase):
+    def setUp(self):
+        self.prices = month_of_prices('2024-11-01', '2024-11-05')
+
+    def test_scrub_matches_legacy(self):
+        for day in ['2024-11-01', '2024-11-03']:
+            prices = self.prices[self.prices['flow_date'] == day].reset_index(drop=True)
+            expected = elektra.scrub_hourly_prices(pd.Timestamp(day), 'T', 'N', 'pjm', prices.copy())
+            result = scrub_hourly_array(pd.Timestamp(day), 'T', 'N', 'pjm', prices.copy())
+            pd.testing.assert_frame_equal(result.to_frame(), expected.astype({'Value': 'float64'}))
+
+        self.assertEqual(result['HE'].tolist()[-2:], [24, 25])
+        self.assertEqual(result.to_frame()['Special'].tolist().count('long'), 2)
+        self.assertEqual(result.nbytes, 25 * 23)
+        with self.assertRaises(elektra.ElektraConfigError):
+            result.node('N')
+
+    def test_scrub_errors(self):
+        prices = pd.read_csv('tests/scrub_hourly_prices.csv').drop(index=[5])
+        with self.assertRaises(elektra.InsufficientDataError) as e:
+            scrub_hourly_array(dt.datetime(2020, 10, 17), 'T', 'N', 'pjm', prices)
+        self.assertIn('2020-10-17 HE 6. Expected: 1; Got: 0', str(e.exception))
+
+    def test_scrub_nodes(self):
+        prices = pd.concat([self.prices.assign(node='A'), self.prices.assign(node='B')], ignore_index=True)
+        result = scrub_hourly_nodes('2024-11-01', '2024-11-05', 'pjm', prices.drop(index=[30]), errors='coerce')
+        self.assertEqual(len(result), 2 * (5 * 24 + 1))
+        a = result.node('A').to_frame()
+        self.assertEqual(a['Value'].isna().sum(), 1)
+        day = self.prices[self.prices['flow_date'] == '2024-11-02']
+        expected = scrub_hourly_array(dt.datetime(2024, 11, 2), 'T', 'B', 'pjm', day).to_frame()
+        b = result.node('B').to_frame()
+        pd.testing.assert_frame_equal(b.iloc[24:48].drop(columns='node').reset_index(drop=True), expected)
+
+        combined = HourlyPrices.concat([result.node('B'), result.node('A')])
+        self.assertEqual(combined.nodes, ['B', 'A'])
+        self.assertEqual(combined.to_frame()['node'].iloc[0], 'B')
+
+    def test_block_volumes(self):
+        for frequency in ['monthly', 'hourly']:
+            args = ('pjm', 5, frequency, dt.datetime(2024, 11, 1), '7x24', ['5x16', '2x16', '7x8'], 'MWh')
+            volumes = block_volumes(*args)
+            pd.testing.assert_frame_equal(volumes.to_frame(), elektra.translateBlocks(*args))
+        self.assertEqual(volumes['7x8'].sum(), 5 * 8)
+        self.assertEqual(volumes.values.dtype, np.float64)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import json
+import threading
+import unittest
+import urllib.request
+import pandas as pd
+from elektra.server import make_server
+
+
+class PricingServerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server(port=0)
+        cls.url = 'http://127.0.0.1:{0}'.format(cls.server.server_address[1])
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def call(self, path, payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+
+    def test_create_prices_batch(self):
+        prices = pd.read_csv('tests/created_prices.csv').to_dict(orient='records')
+        response = self.call('/create_prices', {'prices': prices, 'requests': [
+            {'flow_date': '2020-10-17', 'ticker': 'M.P4F8', 'node': 'INDIANA.HUB', 'iso': 'miso', 'block': '2x16',
+             'frequency': 'daily'},
+            {'flow_date': '2020-10-18', 'ticker': 'M.P4F8', 'node': 'INDIANA.HUB', 'iso': 'miso', 'block': '2x16',
+             'frequency': 'daily'},
+        ]})
+
+        self.assertEqual(response['results'][0], {'result': 22.55625})
+        self.assertEqual(response['results'][1]['type'], 'InsufficientDataError')
+
+        stats = self.call('/stats')['endpoints']['/create_prices']
+        self.assertGreaterEqual(stats['items'], 2)
+        self.assertGreaterEqual(stats['errors'], 1)
+
+    def test_translate_blocks(self):
+        response = self.call('/translate_blocks', {'requests': [
+            {'iso': 'pjm', 'mw': 20, 'frequency': 'monthly', 'contract_start': '2020-10-01', 'in_block': '7x24',
+             'out_blocks': ['5x16', '2x16'], 'out_uom': 'mwh'},
+        ]})
+        rows = response['results'][0]['result']
+        self.assertEqual(len(rows), 31)
+        self.assertEqual(sum(r['5x16'] for r in rows), 20 * 16 * 22)
+
+    def test_merge_block_prices(self):
+        response = self.call('/merge_block_prices', {'requests': [
+            {'prices': [{'month': '2021-12-01', '5x16': 73.35, 'Wrap': 60.95}], 'iso': 'pjm'},
+        ]})
+        self.assertAlmostEqual(response['results'][0]['result'][0]['Total'], 67.0833, places=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
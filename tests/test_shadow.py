@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+import datetime as dt
+from unittest import mock
+import pandas as pd
+import elektra
+from elektra import backends, shadow
+from tests.test_cube import month_of_prices
+
+
+class ShadowModeTests(unittest.TestCase):
+    def setUp(self):
+        self.settings = shadow.get_shadow()
+        self.stats = shadow.stats
+        shadow.stats = shadow.ShadowStats()
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.log_dir.name, 'shadow.jsonl')
+        shadow.set_shadow(1.0, backend='vectorized', log_path=self.log_path, seed=1)
+        self.month = month_of_prices('2024-11-01', '2024-11-30')
+
+    def tearDown(self):
+        shadow._settings.update(self.settings)
+        shadow.stats = self.stats
+        self.log_dir.cleanup()
+
+    def test_matching_prices(self):
+        price = shadow.shadow_create_prices(dt.datetime(2024, 11, 12), 'T', 'N', 'pjm', '5x16', 'monthly', self.month)
+        self.assertEqual(price, elektra.create_prices(dt.datetime(2024, 11, 12), 'T', 'N', 'pjm', '5x16', 'monthly',
+                                                      self.month.copy()))
+        report = shadow.stats.report()['create_prices']
+        self.assertEqual((report['calls'], report['sampled'], report['mismatches']), (1, 1, 0))
+        self.assertEqual(len(shadow.stats.timings('create_prices')), 1)
+        self.assertFalse(os.path.exists(self.log_path))
+
+    def test_inputs_serialized_only_on_mismatch(self):
+        with mock.patch.object(shadow, '_price_inputs', wraps=shadow._price_inputs) as price_inputs:
+            shadow.shadow_create_prices(dt.datetime(2024, 11, 3), 'T', 'N', 'pjm', '7x24', 'daily', self.month)
+            self.assertEqual(price_inputs.call_count, 0)
+            with mock.patch.dict(backends.ENGINES, {'vectorized': lambda *args: 0.0}):
+                shadow.shadow_create_prices(dt.datetime(2024, 11, 3), 'T', 'N', 'pjm', '7x24', 'daily', self.month)
+            self.assertEqual(price_inputs.call_count, 1)
+
+    def test_legacy_errors_are_raised(self):
+        with self.assertRaises(elektra.InsufficientDataError):
+            shadow.shadow_create_prices(dt.datetime(2024, 11, 12), 'T', 'N', 'pjm', '7x24', 'monthly',
+                                        self.month.drop(index=[100]))
+        self.assertEqual(shadow.stats.report()['create_prices']['mismatches'], 0)
+
+    def test_unsampled_calls(self):
+        shadow.set_shadow(0.0)
+        shadow.shadow_create_prices(dt.datetime(2024, 11, 12), 'T', 'N', 'pjm', '5x16', 'daily', self.month)
+        report = shadow.stats.report()['create_prices']
+        self.assertEqual((report['calls'], report['sampled']), (1, 0))
+        with self.assertRaises(elektra.ElektraConfigError):
+            shadow.set_shadow(1.5)
+
+    def test_price_mismatch_is_recorded_and_replayed(self):
+        def off_by_one(*args):
+            return backends.create_prices_vectorized(*args) + 1
+
+        with mock.patch.dict(backends.ENGINES, {'vectorized': off_by_one}):
+            price = shadow.shadow_create_prices(dt.datetime(2024, 11, 3), 'T', 'N', 'spp', 'wrap', 'daily',
+                                                self.month)
+            record, = shadow.read_mismatches(self.log_path)
+            self.assertFalse(shadow.replay(record)['match'])
+
+        self.assertEqual(record['legacy'], {'result': price})
+        self.assertAlmostEqual(record['fast']['result'], price + 1)
+        self.assertEqual(record['inputs']['flow_date'], '2024-11-03T00:00:00')
+        self.assertEqual(len(record['inputs']['input_prices']), len(self.month))
+        self.assertEqual(shadow.stats.mismatches('create_prices'), [record])
+        self.assertTrue(shadow.replay(record)['match'])
+
+    def test_translate_blocks(self):
+        out_blocks = ['5x16', '2x16', '7x8', 'Wrap', '7x24']
+        result = shadow.shadow_translate_blocks('pjm', 5, 'monthly', dt.datetime(2024, 11, 1), '7x24', out_blocks,
+                                                'MWh')
+        pd.testing.assert_frame_equal(result, elektra.translateBlocks('pjm', 5, 'monthly', dt.datetime(2024, 11, 1),
+                                                                      '7x24', out_blocks, 'MWh'))
+        self.assertEqual(shadow.stats.report()['translateBlocks']['mismatches'], 0)
+
+        # CAISO peak days are weekdays on both paths, so Saturdays are whole Wrap days
+        for frequency, start in [('daily', dt.datetime(2024, 11, 2)), ('monthly', dt.datetime(2024, 11, 1))]:
+            result = shadow.shadow_translate_blocks('caiso', 5, frequency, start, 'Wrap', out_blocks, 'MWh')
+            self.assertEqual(result['7x24'].sum(), 120 if frequency == 'daily' else 5 * 401)
+        with self.assertRaises(elektra.ElektraConfigError):
+            shadow.shadow_translate_blocks('caiso', 5, 'daily', dt.datetime(2024, 11, 2), '7x8', ['7x24'], 'MWh')
+        self.assertEqual(shadow.stats.report()['translateBlocks']['mismatches'], 0)
+        self.assertFalse(os.path.exists(self.log_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+import elektra
+from elektra.exceptions import ElektraConfigError
+from elektra.shapes import hourly_shape, shape_hours, shape_forward_curve
+
+
+class HourlyShapeTests(unittest.TestCase):
+    def test_year_of_hours(self):
+        shape = hourly_shape('pjm', '2024-01-01', '2024-12-31', ['7x24', '5x16', '2x16', '7x8'])
+
+        self.assertEqual(shape.shape, (8784, 4))
+        self.assertEqual(shape.values.dtype, np.float64)
+        self.assertEqual(shape['7x24'].sum(), 8784)
+        # 5x16, 2x16 and 7x8 partition the 7x24 hours
+        self.assertTrue((shape[['5x16', '2x16', '7x8']].sum(axis=1) == shape['7x24']).all())
+
+    def test_dst_days(self):
+        shape = hourly_shape('spp', '2024-03-10', '2024-03-10', ['7x24'])
+        self.assertEqual(len(shape), 23)
+        self.assertNotIn(3, shape.index.get_level_values('HE'))
+
+        shape = hourly_shape('spp', '2024-11-03', '2024-11-03', ['7x24', '7x8'])
+        self.assertEqual(len(shape), 25)
+        self.assertEqual(shape.loc[('2024-11-03', 25), '7x8'], 1)
+
+    def test_daily_totals_match_translate_blocks(self):
+        for iso, start in [('pjm', dt.datetime(2023, 12, 1)), ('caiso', dt.datetime(2024, 11, 1)),
+                           ('ercot', dt.datetime(2024, 3, 1))]:
+            for in_block, out_blocks in [('7x24', ['5x16', '2x16', '7x8', 'Wrap', '7x24']),
+                                         ('Wrap', ['7x8', '2x16', 'Wrap']), ('7x16', ['5x16', '2x16'])]:
+                daily = elektra.translateBlocks(iso, 5, 'monthly', start, in_block, out_blocks, 'mwh')
+                hourly = elektra.translateBlocks(iso, 5, 'hourly', start, in_block, out_blocks, 'mwh',
+                                                 contract_end=start + pd.offsets.MonthEnd(0))
+                totals = hourly.groupby('date')[out_blocks].sum().reset_index(drop=True)
+                self.assertTrue((totals == daily[out_blocks]).all().all(), msg='{0} {1}'.format(iso, in_block))
+
+        # convert's peak days apply to CAISO Saturdays too, and its unsupported pairs are unsupported hourly
+        saturday = elektra.translateBlocks('caiso', 1, 'hourly', dt.datetime(2024, 11, 2), 'Wrap', ['7x24'], 'mwh')
+        self.assertEqual(saturday['7x24'].sum(), 24)
+        with self.assertRaises(ElektraConfigError):
+            elektra.translateBlocks('pjm', 1, 'hourly', dt.datetime(2024, 11, 2), '7x8', ['7x24'], 'mwh')
+
+
+class ForwardCurveTests(unittest.TestCase):
+    def setUp(self):
+        self.strips = pd.DataFrame({'5x16': [73.35, 91.85], '2x16': [65.0, 70.0], '7x8': [55.0, 60.0]},
+                                   index=pd.to_datetime(['2024-10-01', '2024-11-01']))
+
+    def test_hours_and_block_prices(self):
+        curve = shape_forward_curve(self.strips, 'pjm')
+        self.assertEqual(len(curve), 31 * 24 + 30 * 24 + 1)
+        self.assertEqual(curve.loc[('2024-11-03', 25), 'price'], 60.0)
+        self.assertEqual(curve.loc[('2024-11-11', 12), 'price'], 91.85)
+        # Thanksgiving is a 2x16 day
+        self.assertEqual(curve.loc[('2024-11-28', 12), 'price'], 70.0)
+
+    def test_round_trip_with_merge_block_prices(self):
+        strips = pd.DataFrame({'5x16': [73.35, 91.85], 'Wrap': [60.95, 68.10]},
+                              index=pd.to_datetime(['2021-12-01', '2022-01-01']))
+        curve = shape_forward_curve(strips, 'pjm')
+        months = pd.PeriodIndex(curve.index.get_level_values('flow_date'), freq='M')
+        merged = elektra.merge_block_prices(strips.copy(), 'pjm')
+        np.testing.assert_allclose(curve['price'].groupby(months).mean(), merged['Total'])
+
+    def test_shape_factors_keep_block_averages(self):
+        factors = np.linspace(0.5, 1.5, 24)
+        curve = shape_forward_curve(self.strips.assign(node='A'), 'pjm', shape=factors)
+        hours, _ = shape_hours('2024-10-01', '2024-11-30')
+        onpeak = elektra.hours.block_mask('5x16', 'pjm', hours) & (hours['flow_date'].dt.month == 11).to_numpy()
+        self.assertAlmostEqual(curve['A'].to_numpy()[onpeak].mean(), 91.85)
+        day = curve.loc['2024-11-12', 'A']
+        self.assertGreater(day.loc[23], day.loc[8])
+
+    def test_daily_and_many_nodes(self):
+        strips = pd.concat([self.strips.assign(node='A'), (self.strips + 1).assign(node='B')])
+        daily = shape_forward_curve(strips, 'pjm', frequency='daily', dtype='float32')
+        self.assertEqual(daily.shape, (61, 2))
+        self.assertEqual(daily['A'].dtype, np.float32)
+        self.assertAlmostEqual(daily.loc['2024-11-02', 'A'], (70.0 * 16 + 60.0 * 8) / 24, places=4)
+        np.testing.assert_allclose(daily['B'] - daily['A'], 1, rtol=1e-5)
+
+    def test_blocks_must_cover_each_hour_once(self):
+        with self.assertRaises(ElektraConfigError):
+            shape_forward_curve(self.strips[['5x16', '7x8']], 'pjm')
+        with self.assertRaises(ElektraConfigError):
+            shape_forward_curve(self.strips.assign(wrap=1.0), 'pjm')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+import elektra
+from elektra.exceptions import InsufficientDataError
+from elektra.spreads import create_spreads, hourly_spreads
+from tests.test_cube import month_of_prices
+
+
+class SpreadTests(unittest.TestCase):
+    def setUp(self):
+        prices = month_of_prices('2024-11-01', '2024-11-30')
+        self.legs = {
+            'HUB': prices,
+            'A': prices.assign(price=prices['price'] * 1.1),
+            'B': prices.assign(price=prices['price'] - 3),
+        }
+        self.prices = pd.concat([p.assign(node=n) for n, p in self.legs.items()], ignore_index=True)
+        self.pairs = [('A', 'HUB'), ('B', 'HUB')]
+
+    def create_price(self, node, block, frequency, flow_date):
+        return elektra.create_prices(flow_date, 'T', node, 'pjm', block, frequency, self.legs[node].copy())
+
+    def test_matches_create_prices(self):
+        for flow_date, frequency in [(dt.datetime(2024, 11, 3), 'daily'), (dt.datetime(2024, 11, 1), 'monthly')]:
+            spreads = create_spreads(flow_date, self.pairs, 'pjm', frequency, self.prices, blocks=['2x16', '7x8'])
+            for row in spreads.itertuples():
+                self.assertAlmostEqual(row.node_price, self.create_price(row.node, row.block, frequency, flow_date))
+                self.assertAlmostEqual(
+                    row.spread, row.node_price - self.create_price(row.reference, row.block, frequency, flow_date))
+                self.assertIsNone(row.error)
+
+    def test_no_relevant_hours(self):
+        spreads = create_spreads(dt.datetime(2024, 11, 2), self.pairs, 'pjm', 'daily', self.prices)
+        saturday = spreads[spreads['block'] == '5x16']
+        self.assertTrue(saturday['spread'].isna().all())
+        self.assertTrue((saturday['error'] == 'No relevant hours').all())
+
+    def test_both_legs_checked(self):
+        hub = (self.prices['node'] == 'HUB') & (self.prices['flow_date'] == '2024-11-04') & \
+            (self.prices['hour_ending'] == 10)
+        prices = self.prices[~hub]
+
+        with self.assertRaisesRegex(InsufficientDataError, 'HUB'):
+            create_spreads(dt.datetime(2024, 11, 4), self.pairs, 'pjm', 'daily', prices)
+
+        spreads = create_spreads(dt.datetime(2024, 11, 4), self.pairs, 'pjm', 'daily', prices, errors='coerce')
+        onpeak = spreads[spreads['block'] == '5x16']
+        self.assertTrue(onpeak['spread'].isna().all())
+        self.assertTrue(onpeak['error'].str.contains('HE 10').all())
+        self.assertTrue(spreads[spreads['block'] == '7x8']['error'].isna().all())
+
+    def test_hourly_spreads(self):
+        spreads = hourly_spreads('2024-11-03', '2024-11-03', self.pairs, self.prices)
+        self.assertEqual(len(spreads), 2 * 24)
+        self.assertTrue(spreads['complete'].all())
+        a = spreads[spreads['node'] == 'A']
+        np.testing.assert_allclose(a['spread'], a['node_price'] * (1 - 1 / 1.1))
+        b = spreads[spreads['node'] == 'B']
+        np.testing.assert_allclose(b['spread'], -3)
+
+
+if __name__ == '__main__':
+    unittest.main()
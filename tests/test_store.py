@@ -0,0 +1,81 @@
+import os
+import unittest
+import tempfile
+import datetime as dt
+import numpy as np
+import pandas as pd
+import elektra
+from elektra.exceptions import ElektraConfigError
+from elektra.store import PriceStore
+from tests.test_cube import month_of_prices
+
+
+class PriceStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = PriceStore(self.dir.name)
+        prices = month_of_prices('2024-10-01', '2024-11-30')
+        self.prices = pd.concat([prices.assign(node='A/1'), prices.assign(node='B', price=prices['price'] + 1)],
+                                ignore_index=True)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        self.assertEqual(self.store.write_prices('pjm', self.prices), 4)
+        self.assertEqual(self.store.nodes('pjm'), ['A/1', 'B'])
+        self.assertEqual([str(m) for m in self.store.months('pjm', 'B')], ['2024-10', '2024-11'])
+
+        prices = self.store.read_prices('pjm', 'A/1', '2024-11-01', '2024-11-30')
+        self.assertEqual(len(prices), 30 * 24 + 1)
+        expected = self.prices[(self.prices['node'] == 'A/1') & (self.prices['flow_date'] >= '2024-11-01')]
+        np.testing.assert_allclose(prices['price'], expected['price'])
+
+        flow_date = dt.datetime(2024, 11, 3)
+        self.assertAlmostEqual(
+            elektra.create_prices(flow_date, 'T', 'B', 'pjm', '7x24', 'daily',
+                                  self.store.read_prices('pjm', 'B', flow_date, flow_date)),
+            elektra.create_prices(flow_date, 'T', 'B', 'pjm', '7x24', 'daily',
+                                  self.prices[self.prices['node'] == 'B'].drop(columns='node').reset_index(drop=True)))
+
+    def test_dot_node_names_stay_in_the_iso(self):
+        prices = self.prices[self.prices['node'] == 'B'].drop(columns='node')
+        for node in ['..', '.', '.hidden']:
+            self.store.write_prices('pjm', prices, node=node)
+            self.assertTrue(self.store.partition_path('pjm', node, '2024-11').startswith(
+                os.path.join(self.dir.name, 'pjm', '%2E')))
+        self.assertEqual(sorted(os.listdir(self.dir.name)), ['pjm'])
+        self.assertEqual(self.store.nodes('pjm'), ['.', '..', '.hidden'])
+        self.assertEqual(len(self.store.read_prices('pjm', '..', '2024-11-01', '2024-11-30')), 30 * 24 + 1)
+        with self.assertRaises(ElektraConfigError):
+            self.store.write_prices('pjm', prices, node='')
+
+    def test_append_and_upsert(self):
+        self.store.write_prices('pjm', self.prices[self.prices['flow_date'] < '2024-11-01'])
+        self.store.write_prices('pjm', self.prices[self.prices['flow_date'] >= '2024-11-01'])
+        with self.assertRaises(ElektraConfigError):
+            self.store.write_prices('pjm', self.prices.iloc[:1])
+
+        restated = pd.DataFrame({'flow_date': ['2024-11-05'], 'hour_ending': [10], 'price': [99.0]})
+        self.store.write_prices('pjm', restated, node='B', mode='upsert')
+        prices = self.store.read_prices('pjm', 'B', '2024-11-05', '2024-11-05')
+        self.assertEqual(len(prices), 24)
+        self.assertEqual(prices.loc[prices['hour_ending'] == 10, 'price'].tolist(), [99.0])
+
+    def test_missing_hours_from_index(self):
+        gap = (self.prices['node'] == 'B') & (self.prices['flow_date'] == '2024-11-05') & \
+            (self.prices['hour_ending'] == 12)
+        self.store.write_prices('pjm', self.prices[~gap])
+
+        index = self.store.hour_index('pjm', 'B', '2024-10-31', '2024-11-03')
+        self.assertEqual(len(index), 4 * 24)
+        self.assertTrue((index['found'] == index['expected']).all())
+
+        missing = self.store.missing_hours('pjm', 'B', '2024-11-01', '2024-11-30', block='5x16')
+        self.assertEqual(list(zip(missing['flow_date'].dt.strftime('%Y-%m-%d'), missing['HE'])), [('2024-11-05', 12)])
+        self.assertTrue(self.store.missing_hours('pjm', 'B', '2024-11-01', '2024-11-30', block='7x8').empty)
+        self.assertEqual(len(self.store.missing_hours('pjm', 'B', '2024-12-01', '2024-12-01')), 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
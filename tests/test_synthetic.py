@@ -0,0 +1,45 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+import elektra
+from elektra.synthetic import synthetic_prices
+
+
+class SyntheticPriceTests(unittest.TestCase):
+    def test_dst_days(self):
+        prices = synthetic_prices('2024-03-09', '2024-03-10', seed=1)
+        spring = prices[prices['flow_date'] == '2024-03-10']
+        self.assertEqual(spring['hour_ending'].tolist(), [1, 2] + list(range(4, 25)))
+
+        prices = synthetic_prices('2024-11-03', '2024-11-03', nodes=['A', 'B'], seed=1)
+        self.assertEqual(len(prices), 50)
+        fall = prices[prices['node'] == 'B']
+        self.assertEqual(fall['hour_ending'].tolist(), [1, 2, 2] + list(range(3, 25)))
+        self.assertFalse(np.isnan(elektra.create_prices(dt.datetime(2024, 11, 3), 'T', 'B', 'pjm', '7x24', 'daily',
+                                                        fall.drop(columns='node').reset_index(drop=True))))
+
+    def test_seeded(self):
+        first = synthetic_prices('2024-01-01', '2024-01-31', nodes=3, seed=42)
+        pd.testing.assert_frame_equal(first, synthetic_prices('2024-01-01', '2024-01-31', nodes=3, seed=42))
+        self.assertFalse(first['price'].equals(synthetic_prices('2024-01-01', '2024-01-31', nodes=3, seed=43)['price']))
+
+    def test_injected_issues(self):
+        prices, issues = synthetic_prices('2024-01-01', '2024-03-31', nodes=4, seed=3, gaps=0.01, duplicates=0.01,
+                                          return_issues=True)
+        self.assertEqual(len(prices), 4 * 91 * 24 - 1 * 4 - (issues['issue'] == 'missing').sum() +
+                         (issues['issue'] == 'duplicate').sum())
+        report = elektra.completeness_report('2024-01-01', '2024-03-31', 'pjm', prices)
+        report = report[report['issue'] != 'extra']
+        self.assertEqual(sorted(zip(report['node'], report['flow_date'], report['HE'], report['issue'])),
+                         sorted(zip(issues['node'], issues['flow_date'], issues['HE'], issues['issue'])))
+
+    def test_categorical(self):
+        prices = synthetic_prices('2024-01-01', '2024-01-02', nodes=12, seed=1, categorical=True)
+        self.assertEqual(prices['node'].dtype.name, 'category')
+        self.assertEqual(prices['node'].iloc[0], 'NODE00')
+        self.assertEqual(len(prices), 12 * 48)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import datetime as dt
+import numpy as np
+import pandas as pd
+import elektra
+from elektra.valuation import value_deals
+from tests.test_cube import month_of_prices
+
+
+class ValuationTests(unittest.TestCase):
+    def setUp(self):
+        self.prices = month_of_prices('2024-11-01', '2024-11-30')
+        self.hourly = pd.concat([self.prices.assign(node='A'), self.prices.assign(node='B', price=self.prices['price'] + 2)])
+        self.deals = pd.DataFrame({
+            'deal': ['d1', 'd2', 'd3'],
+            'mw': [10, 5, -20],
+            'block': ['5x16', '7x24', 'wrap'],
+            'iso': ['pjm', 'pjm', 'pjm'],
+            'node': ['A', 'A', 'B'],
+            'start': ['2024-11-01', '2024-11-01', '2024-11-03'],
+            'end': ['2024-11-30', '2024-11-30', '2024-11-10'],
+            'fixed_price': [25.0, 30.0, 28.0],
+        })
+
+    def create_price(self, node, block, frequency, flow_date):
+        prices = self.hourly[self.hourly['node'] == node].drop(columns='node').reset_index(drop=True)
+        return elektra.create_prices(flow_date, 'T', node, 'pjm', block, frequency, prices, backend='vectorized')
+
+    def test_daily_against_hourly_prices(self):
+        values = value_deals(self.deals, hourly_prices=self.hourly)
+        self.assertEqual(len(values), 30 + 30 + 8)
+        self.assertTrue(values['complete'].all())
+
+        d2 = values[values['deal'] == 'd2'].set_index('flow_date')
+        self.assertEqual(d2.loc['2024-11-03', 'mwh'], 5 * 25)
+        self.assertAlmostEqual(d2.loc['2024-11-03', 'value'],
+                               5 * 25 * (self.create_price('A', '7x24', 'daily', dt.datetime(2024, 11, 3)) - 30))
+
+        d1 = values[values['deal'] == 'd1'].set_index('flow_date')
+        self.assertEqual(d1.loc['2024-11-02', 'value'], 0)
+        self.assertAlmostEqual(d1.loc['2024-11-12', 'value'],
+                               10 * 16 * (self.create_price('A', '5x16', 'daily', dt.datetime(2024, 11, 12)) - 25))
+
+    def test_monthly_grain(self):
+        values = value_deals(self.deals, hourly_prices=self.hourly, grain='monthly').set_index('deal')
+        monthly = self.create_price('A', '5x16', 'monthly', dt.datetime(2024, 11, 1))
+        self.assertEqual(values.loc['d1', 'mwh'], 10 * 16 * 20)
+        self.assertAlmostEqual(values.loc['d1', 'market_price'], monthly)
+        self.assertAlmostEqual(values.loc['d1', 'value'], 10 * 16 * 20 * (monthly - 25))
+
+    def test_block_prices(self):
+        block_prices = pd.DataFrame({'node': ['A'], 'block': ['5x16'], 'month': ['2024-11-01'], 'price': [40.0]})
+        values = value_deals(self.deals[:1], block_prices=block_prices, grain='monthly')
+        self.assertEqual(values.loc[0, 'value'], 10 * 16 * 20 * 15.0)
+
+    def test_missing_hours(self):
+        hourly = self.hourly.drop(index=self.hourly.index[100])
+        values = value_deals(self.deals[1:2], hourly_prices=hourly).set_index('flow_date')
+        self.assertFalse(values.loc['2024-11-05', 'complete'])
+        self.assertTrue(np.isnan(values.loc['2024-11-05', 'value']))
+        self.assertTrue(values.loc['2024-11-06', 'complete'])
+
+
+if __name__ == '__main__':
+    unittest.main()